@@ -1,330 +1,181 @@
 #!/usr/bin/env python3
 
-import datetime
-
-from flask import Flask
+from flask import Flask, Response, g, request
 from flask_restful import Api, Resource
 
-from modules.crawler import UAExchangeRatesCrawler
-from modules.db import Event
+from modules.service import (
+    BINARY_MIMETYPES,
+    STREAMING_MIMETYPES,
+    CrawlerHTTPService,
+    get_date,
+)
 from version import __version__
 
+# Responses of these resources change only when a crawler imports rates,
+# so they are validated by the last import date. Pages of changes aren't
+# among them: a page also grows when rates get sequence numbers without
+# a new import (rates of a crawler which started before the last import
+# completed, or ones numbered by migrate.py).
 
-def get_date(date_as_string):
-    year = int(date_as_string[:4])
-    month = int(date_as_string[4:6])
-    day = int(date_as_string[6:8])
-
-    if len(date_as_string) > 8:
+CACHEABLE_PATHS = ("/currencies/", "/rates/", "/bulk-rates/")
 
-        hour = int(date_as_string[8:10])
-        minute = int(date_as_string[10:12])
-        second = int(date_as_string[12:])
 
-    else:
+def get_rates_mimetype() -> str:
+    """
+    Returns a media type of rates the client prefers (according to
+    the Accept header of the current request).
+    """
 
-        hour = 0
-        minute = 0
-        second = 0
+    return request.accept_mimetypes.best_match(
+        ("application/json",) + STREAMING_MIMETYPES + BINARY_MIMETYPES,
+        default="application/json",
+    )
 
-    return datetime.datetime(year, month, day, hour, minute, second)
 
+def get_rates_page() -> dict:
+    """
+    Returns parameters of a page of rates (the max number of rates
+    & the cursor of the page) from the query string of the current request.
+    """
 
-def get_date_as_string(date: datetime.datetime) -> str:
-    return date.strftime("%Y-%m-%dT%H:%M:%S")
+    return {"limit": request.args.get("limit"), "cursor": request.args.get("cursor")}
 
 
-class CrawlerHTTPService(UAExchangeRatesCrawler):
-    def __init__(self, file):
-        super().__init__(file, updating_event=Event.NONE)
-
-    def get_error_response_using_date(self, date):
-        return self.get_error_response(
-            code=3, message=f"Unable to parse a date: {date}"
-        )
-
+class Hello(Resource):
     @staticmethod
-    def _get_event_ttl(event: dict, event_lifespan: int) -> int:
-        return round(
-            event_lifespan
-            - (datetime.datetime.now() - event["event_date"]).total_seconds()
-        )
-
-    def _fill_current_rates_loading_heartbeat(self, heartbeat: dict):
-
-        event_lifespan = self._config.get(
-            "heartbeat_current_rates_loading_event_lifespan"
-        )
-        event = self._db.get_last_event(Event.CURRENT_RATES_LOADING)
-
-        if event is not None:
-
-            event_ttl = self._get_event_ttl(event, event_lifespan)
-            event_date = get_date_as_string(event["event_date"])
-
-            if event_ttl <= 0:
-                heartbeat["warnings"].append(
-                    f"The last current rates loading triggered over {event_lifespan} seconds ago. It looks like the "
-                    f"regular execution of load_current.py doesn't work."
-                )
-
-        else:
-
-            event_date = None
-
-            heartbeat["warnings"].append(
-                "Current rates loading has never been triggered. Perhaps this is not a problem (for instance, "
-                "if the application has just been deployed so load_current.py hasn't executed once yet)."
-            )
-
-        heartbeat["current_rates_loading_date"] = event_date
-
-    def _fill_current_rates_availability_heartbeat(self, heartbeat: dict):
-
-        availability_dates = {}
-        available_currencies = []
-        unavailable_currencies = []
-
-        event_lifespan = self._config.get(
-            "heartbeat_current_rates_availability_event_lifespan"
-        )
-
-        currency_codes = self.get_currency_codes()
-
-        for currency_code in currency_codes:
-
-            event_ttl = 0
-            event_date = None
-
-            event = self._db.get_last_event(Event.CURRENT_RATES_AVAILABILITY)
-
-            if event is not None:
-                event_ttl = self._get_event_ttl(event, event_lifespan)
-                event_date = get_date_as_string(event["event_date"])
-
-            availability_dates[currency_code] = event_date
-
-            if event_ttl > 0:
-                available_currencies.append(currency_code)
-            else:
-                unavailable_currencies.append(currency_code)
+    def get():
+        return crawler.get_error_response(code=1, message="No action specified.")
 
-        if unavailable_currencies:
-            heartbeat["warnings"].append(
-                f"At least one currency is not available at bank's website within {event_lifespan} last seconds."
-            )
 
-        heartbeat["currencies_availability"] = {
-            "availability_dates": availability_dates,
-            "available_currencies": available_currencies,
-            "unavailable_currencies": unavailable_currencies,
+class Info(Resource):
+    @staticmethod
+    def get():
+        data = {
+            "version": __version__,
+            "response_cache": crawler.get_response_cache_metrics(),
         }
 
-    def _fill_historical_rates_loading_heartbeat(self, heartbeat: dict):
-
-        event_lifespan = self._config.get(
-            "heartbeat_historical_rates_loading_event_lifespan"
-        )
-        event = self._db.get_last_event(Event.HISTORICAL_RATES_LOADING)
-
-        if event is not None:
-
-            event_ttl = self._get_event_ttl(event, event_lifespan)
-            event_date = get_date_as_string(event["event_date"])
-
-            if event_ttl < 0:
-                heartbeat["warnings"].append(
-                    f"The last successful historical rates loading triggered over {event_lifespan} seconds ago."
-                )
-
-        else:
-
-            event_date = None
-
-            heartbeat["warnings"].append(
-                "Historical rates loading has never been triggered. Perhaps this is not a problem (for instance, "
-                "if the application has just been deployed so load_history.py hasn't executed once yet)."
-            )
-
-        heartbeat["historical_rates_loading_date"] = event_date
-
-    def get_heartbeat(self) -> tuple:
+        return data, 200
 
-        heartbeat = {
-            "warnings": [],
-            "current_date": get_date_as_string(datetime.datetime.now())
-        }
 
-        self._fill_current_rates_loading_heartbeat(heartbeat)
-        self._fill_historical_rates_loading_heartbeat(heartbeat)
+class Currencies(Resource):
+    @staticmethod
+    def get():
+        data = {"currencies": crawler.get_currency_codes()}
 
-        self._fill_current_rates_availability_heartbeat(heartbeat)
-        self._fill_current_rates_updating_heartbeat(heartbeat)
+        return data, 200
 
-        return heartbeat, len(heartbeat["warnings"]) == 0
 
-    def _fill_current_rates_updating_heartbeat(self, heartbeat: dict):
+class Rates(Resource):
+    @staticmethod
+    def get():
+        return crawler.get_error_response(code=2, message="No currency specified.")
 
-        updating_dates = {}
-        updated_currencies = []
-        outdated_currencies = []
 
-        event_lifespan = self._config.get(
-            "heartbeat_current_rates_updating_event_lifespan"
+class RatesUsingCurrencyCode(Resource):
+    @staticmethod
+    def get(currency_code: str):
+        return crawler.get_currency_rates(
+            currency_code, mimetype=get_rates_mimetype(), **get_rates_page()
         )
 
-        currency_codes = self.get_currency_codes()
-
-        for currency_code in currency_codes:
-
-            event_ttl = 0
-            event_date = None
-
-            event = self._db.get_last_event(Event.CURRENT_RATES_UPDATING)
-
-            if event is not None:
-                event_ttl = self._get_event_ttl(event, event_lifespan)
-                event_date = get_date_as_string(event["event_date"])
-
-            updating_dates[currency_code] = event_date
-
-            if event_ttl > 0:
-                updated_currencies.append(currency_code)
-            else:
-                outdated_currencies.append(currency_code)
-
-        if outdated_currencies:
-            heartbeat["warnings"].append(
-                f"At least one currency is not available at bank's website within {event_lifespan} last seconds."
-            )
-
-        heartbeat["currencies_updating"] = {
-            "updating_dates": updating_dates,
-            "updated_currencies": updated_currencies,
-            "outdated_currencies": outdated_currencies,
-        }
 
+class RatesUsingCurrencyCodeAndImportDate(Resource):
     @staticmethod
-    def get_error_response(code, message):
-        data = {"error_message": message, "error_code": code}
-
-        return data, 200
-
-    def get_currency_codes(self) -> list:
-        """
-        Returns the list of currency codes set in the configuration file.
-        """
+    def get(currency_code: str, import_date: str):
 
-        currency_codes_filter = self._config["currency_codes_filter"]
-        currency_codes = self._config["currency_codes"].values()
+        try:
+            import_date = get_date(import_date)
+        except ValueError:
+            return crawler.get_error_response_using_date(import_date)
 
-        return (
-            currency_codes_filter
-            if currency_codes_filter
-            else list(set(list(currency_codes)))
+        return crawler.get_currency_rates(
+            currency_code,
+            import_date,
+            mimetype=get_rates_mimetype(),
+            **get_rates_page(),
         )
 
-    def get_currency_rates(
-        self,
-        currency_code: str,
-        import_date: datetime.datetime = None,
-        start_date: datetime.datetime = None,
-        end_date: datetime.datetime = None,
-    ):
-
-        currency_code = currency_code.upper()
-
-        if currency_code not in self.get_currency_codes():
 
-            message = (
-                f"Exchange rates for the currency code"
-                f' "{currency_code}" cannot be found at UAE CB.'
-            )
-
-            return self.get_error_response(code=4, message=message)
-
-        else:
-
-            datetime_format_string = "%Y%m%d%H%M%S"
-            date_format_string = "%Y%m%d"
-
-            import_dates = []
-
-            rates = self._db.get_currency_rates(
-                currency_code, import_date, start_date, end_date
-            )
-
-            for rate in rates:
-                import_dates.append(rate["import_date"])
-
-                rate.update(
-                    {
-                        "import_date": rate["import_date"].strftime(
-                            datetime_format_string
-                        ),
-                        "rate_date": rate["rate_date"].strftime(date_format_string),
-                    }
-                )
+class RatesUsingCurrencyCodeAndImportDateAndStartDate(Resource):
+    @staticmethod
+    def get(currency_code: str, import_date: str, start_date: str):
 
-            max_import_date = (
-                max(import_dates)
-                if len(import_dates) > 0
-                else datetime.datetime(1, 1, 1)
-            )
-            max_import_date = max_import_date.strftime(datetime_format_string)
+        try:
+            import_date = get_date(import_date)
+        except ValueError:
+            return crawler.get_error_response_using_date(import_date)
 
-            data = {"rates": rates, "max_import_date": max_import_date}
+        try:
+            start_date = get_date(start_date)
+        except ValueError:
+            return crawler.get_error_response_using_date(start_date)
 
-            return data, 200
+        return crawler.get_currency_rates(
+            currency_code,
+            import_date,
+            start_date,
+            mimetype=get_rates_mimetype(),
+            **get_rates_page(),
+        )
 
 
-class Hello(Resource):
+class RatesUsingCurrencyCodeAndImportDateAndStartDateAndEndDate(Resource):
     @staticmethod
-    def get():
-        return crawler.get_error_response(code=1, message="No action specified.")
-
+    def get(currency_code: str, import_date: str, start_date: str, end_date: str):
 
-class Info(Resource):
-    @staticmethod
-    def get():
-        return {"version": __version__}, 200
+        try:
+            import_date = get_date(import_date)
+        except ValueError:
+            return crawler.get_error_response_using_date(import_date)
 
+        try:
+            start_date = get_date(start_date)
+        except ValueError:
+            return crawler.get_error_response_using_date(start_date)
 
-class Currencies(Resource):
-    @staticmethod
-    def get():
-        data = {"currencies": crawler.get_currency_codes()}
+        try:
+            end_date = get_date(end_date)
+        except ValueError:
+            return crawler.get_error_response_using_date(end_date)
 
-        return data, 200
+        return crawler.get_currency_rates(
+            currency_code,
+            import_date,
+            start_date,
+            end_date,
+            mimetype=get_rates_mimetype(),
+            **get_rates_page(),
+        )
 
 
-class Rates(Resource):
+class BulkRates(Resource):
     @staticmethod
     def get():
         return crawler.get_error_response(code=2, message="No currency specified.")
 
 
-class RatesUsingCurrencyCode(Resource):
+class BulkRatesUsingCurrencyCodes(Resource):
     @staticmethod
-    def get(currency_code: str):
-        return crawler.get_currency_rates(currency_code)
+    def get(currency_codes: str):
+        return crawler.get_currencies_rates(currency_codes)
 
 
-class RatesUsingCurrencyCodeAndImportDate(Resource):
+class BulkRatesUsingCurrencyCodesAndImportDate(Resource):
     @staticmethod
-    def get(currency_code: str, import_date: str):
+    def get(currency_codes: str, import_date: str):
 
         try:
             import_date = get_date(import_date)
         except ValueError:
             return crawler.get_error_response_using_date(import_date)
 
-        return crawler.get_currency_rates(currency_code, import_date)
+        return crawler.get_currencies_rates(currency_codes, import_date)
 
 
-class RatesUsingCurrencyCodeAndImportDateAndStartDate(Resource):
+class BulkRatesUsingCurrencyCodesAndImportDateAndStartDate(Resource):
     @staticmethod
-    def get(currency_code: str, import_date: str, start_date: str):
+    def get(currency_codes: str, import_date: str, start_date: str):
 
         try:
             import_date = get_date(import_date)
@@ -336,12 +187,12 @@ class RatesUsingCurrencyCodeAndImportDateAndStartDate(Resource):
         except ValueError:
             return crawler.get_error_response_using_date(start_date)
 
-        return crawler.get_currency_rates(currency_code, import_date, start_date)
+        return crawler.get_currencies_rates(currency_codes, import_date, start_date)
 
 
-class RatesUsingCurrencyCodeAndImportDateAndStartDateAndEndDate(Resource):
+class BulkRatesUsingCurrencyCodesAndImportDateAndStartDateAndEndDate(Resource):
     @staticmethod
-    def get(currency_code: str, import_date: str, start_date: str, end_date: str):
+    def get(currency_codes: str, import_date: str, start_date: str, end_date: str):
 
         try:
             import_date = get_date(import_date)
@@ -358,11 +209,35 @@ class RatesUsingCurrencyCodeAndImportDateAndStartDateAndEndDate(Resource):
         except ValueError:
             return crawler.get_error_response_using_date(end_date)
 
-        return crawler.get_currency_rates(
-            currency_code, import_date, start_date, end_date
+        return crawler.get_currencies_rates(
+            currency_codes, import_date, start_date, end_date
         )
 
 
+class Changes(Resource):
+    @staticmethod
+    def get():
+        return crawler.get_changes()
+
+
+class ChangesSinceToken(Resource):
+    @staticmethod
+    def get(token: str):
+        return crawler.get_changes(token)
+
+
+class Notifications(Resource):
+    @staticmethod
+    def get():
+        return crawler.get_notifications()
+
+
+class NotificationsSinceToken(Resource):
+    @staticmethod
+    def get(token: str):
+        return crawler.get_notifications(token)
+
+
 class Heartbeat(Resource):
     @staticmethod
     def get():
@@ -377,6 +252,42 @@ crawler = CrawlerHTTPService(__file__)
 app = Flask(__name__)
 api = Api(app)
 
+
+@app.before_request
+def respond_if_not_modified():
+    """
+    Answers a conditional request for a cacheable resource with 304 Not Modified
+    before the resource is requested from the database.
+    """
+
+    if request.method != "GET" or not request.path.startswith(CACHEABLE_PATHS):
+        return None
+
+    last_import_date = crawler.get_last_import_date()
+
+    if last_import_date is None:
+        return None
+
+    g.last_import_date = last_import_date
+    g.etag = crawler.get_etag(last_import_date, request.full_path, get_rates_mimetype())
+
+    if request.if_none_match.contains_weak(g.etag):
+        return Response(
+            status=304, headers=crawler.get_caching_headers(g.etag, g.last_import_date)
+        )
+
+    return None
+
+
+@app.after_request
+def add_caching_headers(response: Response) -> Response:
+
+    if g.get("etag") is not None and response.status_code == 200:
+        response.headers.update(crawler.get_caching_headers(g.etag, g.last_import_date))
+
+    return response
+
+
 api.add_resource(Hello, "/")
 
 api.add_resource(Info, "/info/")
@@ -401,6 +312,33 @@ api.add_resource(
     "/rates/<currency_code>/<import_date>/<start_date>/<end_date>/",
 )
 
+api.add_resource(BulkRates, "/bulk-rates/")
+
+api.add_resource(BulkRatesUsingCurrencyCodes, "/bulk-rates/<currency_codes>/")
+
+api.add_resource(
+    BulkRatesUsingCurrencyCodesAndImportDate,
+    "/bulk-rates/<currency_codes>/<import_date>/",
+)
+
+api.add_resource(
+    BulkRatesUsingCurrencyCodesAndImportDateAndStartDate,
+    "/bulk-rates/<currency_codes>/<import_date>/<start_date>/",
+)
+
+api.add_resource(
+    BulkRatesUsingCurrencyCodesAndImportDateAndStartDateAndEndDate,
+    "/bulk-rates/<currency_codes>/<import_date>/<start_date>/<end_date>/",
+)
+
+api.add_resource(Changes, "/changes/")
+
+api.add_resource(ChangesSinceToken, "/changes/<token>/")
+
+api.add_resource(Notifications, "/notifications/")
+
+api.add_resource(NotificationsSinceToken, "/notifications/<token>/")
+
 api.add_resource(Heartbeat, "/heartbeat/")
 
 if __name__ == "__main__":
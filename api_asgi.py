@@ -0,0 +1,411 @@
+#!/usr/bin/env python3
+
+"""
+ASGI version of the REST service. It has the same routes, media types
+& caching headers api.py has, and reads rates & heartbeat details via
+an asynchronous client, so a process serves many requests while their
+queries are in progress. Requests the asynchronous client doesn't serve
+yet (rates streamed or serialized to binary formats, rates of several
+currencies & changes) are handled by the synchronous code in a thread pool.
+Clients waiting for notifications wait in the event loop, so a process
+holds no thread per waiting client. The Flask app (api.py) stays
+the default one; to run this one, install requirements-asgi.txt and use
+an ASGI server, e.g.:
+
+    uvicorn api_asgi:app --workers 4
+"""
+
+import asyncio
+import contextlib
+import functools
+
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+from modules.async_db import AsyncUAExchangeRatesCrawlerDB
+from modules.cache import LocalResponseCache
+from modules.db import Event
+from modules.service import (
+    BINARY_MIMETYPES,
+    STREAMING_MIMETYPES,
+    CrawlerHTTPService,
+    get_best_mimetype,
+    get_date,
+    if_none_match_contains,
+)
+from version import __version__
+
+
+class AsyncCrawlerHTTPService(CrawlerHTTPService):
+    _async_db: AsyncUAExchangeRatesCrawlerDB
+
+    def __init__(self, file):
+        super().__init__(file)
+
+        self._async_db = AsyncUAExchangeRatesCrawlerDB(self._config)
+
+    def disconnect(self):
+
+        self._async_db.disconnect()
+
+        super().disconnect()
+
+    def get_raw_response(self, body, mimetype: str) -> Response:
+
+        # Chunks are iterated in a thread pool by Starlette itself, since
+        # they are read from a cursor of the synchronous client.
+
+        if isinstance(body, bytes):
+            return Response(body, media_type=mimetype)
+
+        return StreamingResponse(body, media_type=mimetype)
+
+    async def get_last_import_date_async(self):
+        return await self._async_db.get_last_import_date()
+
+    async def get_heartbeat_async(self) -> tuple:
+
+        result = self._get_cached_heartbeat()
+
+        if result is None:
+
+            (
+                current_rates_loading_event,
+                historical_rates_loading_event,
+                current_rates_availability_events,
+                current_rates_updating_events,
+            ) = await asyncio.gather(
+                self._async_db.get_last_event(Event.CURRENT_RATES_LOADING),
+                self._async_db.get_last_event(Event.HISTORICAL_RATES_LOADING),
+                self._async_db.get_last_events_by_currencies(
+                    Event.CURRENT_RATES_AVAILABILITY
+                ),
+                self._async_db.get_last_events_by_currencies(
+                    Event.CURRENT_RATES_UPDATING
+                ),
+            )
+
+            result = self.build_heartbeat(
+                current_rates_loading_event,
+                historical_rates_loading_event,
+                current_rates_availability_events,
+                current_rates_updating_events,
+            )
+
+            self._cache_heartbeat(result)
+
+        return result
+
+    async def get_currency_rates_async(
+        self,
+        currency_code: str,
+        import_date=None,
+        start_date=None,
+        end_date=None,
+        mimetype="application/json",
+        limit=None,
+        cursor=None,
+    ):
+
+        if mimetype != "application/json":
+            return await run_in_threadpool(
+                self.get_currency_rates,
+                currency_code,
+                import_date,
+                start_date,
+                end_date,
+                mimetype=mimetype,
+                limit=limit,
+                cursor=cursor,
+            )
+
+        currency_code = currency_code.upper()
+
+        if currency_code not in self.get_currency_codes():
+            return self.get_unknown_currency_code_response(currency_code)
+
+        page_size, after_date, error_response = self.get_page_parameters(limit, cursor)
+
+        if error_response is not None:
+            return error_response
+
+        cache_key = (
+            currency_code,
+            import_date,
+            start_date,
+            end_date,
+            after_date,
+            page_size,
+            await self._async_db.get_last_import_date(),
+        )
+
+        data = None
+
+        if self._response_cache is not None:
+            data = await self._call_response_cache(self._response_cache.get, cache_key)
+
+        if data is None:
+
+            rates = await self._async_db.get_currency_rates(
+                currency_code,
+                import_date,
+                start_date,
+                end_date,
+                after_date,
+                None if page_size is None else page_size + 1,
+            )
+
+            data = self.get_currency_rates_data(rates, page_size)
+
+            if self._response_cache is not None:
+                await self._call_response_cache(
+                    self._response_cache.set, cache_key, data
+                )
+
+        return data, 200
+
+    async def get_notifications_async(self, token: str | None = None):
+        """
+        Does the same get_notifications does, but waits for notifications
+        in the event loop, so waiting clients hold no threads.
+        """
+
+        sequence_number, error_response = self.get_notifications_sequence_number(token)
+
+        if error_response is not None:
+            return error_response
+
+        if sequence_number is None:
+            return await run_in_threadpool(self.get_notifications)
+
+        self._notification_broker.subscribe(self._db)
+
+        notifications = await self._notification_broker.wait_async(
+            sequence_number, self._config["notifications_wait_timeout"]
+        )
+
+        return self.get_notifications_data(notifications, sequence_number)
+
+    async def _call_response_cache(self, method, *args):
+
+        # The shared cache is read & written via the synchronous client,
+        # so it is called in a thread pool rather than blocking the event loop.
+
+        if isinstance(self._response_cache, LocalResponseCache):
+            return method(*args)
+
+        return await run_in_threadpool(method, *args)
+
+
+def get_json_response(result) -> Response:
+
+    if isinstance(result, Response):
+        return result
+
+    data, status_code = result
+
+    return JSONResponse(data, status_code=status_code)
+
+
+def get_rates_mimetype(request) -> str:
+    """
+    Returns a media type of rates the client prefers (according to
+    the Accept header of the request).
+    """
+
+    return get_best_mimetype(
+        request.headers.get("accept"),
+        ("application/json",) + STREAMING_MIMETYPES + BINARY_MIMETYPES,
+        default="application/json",
+    )
+
+
+def get_dates(path_params: dict) -> tuple:
+    """
+    Returns dates parsed from parameters of a path (ones which are absent
+    are left out), and an error response if one of them cannot be parsed.
+    """
+
+    dates = {}
+
+    for date_name in ("import_date", "start_date", "end_date"):
+
+        if date_name not in path_params:
+            break
+
+        try:
+            dates[date_name] = get_date(path_params[date_name])
+        except ValueError:
+            return dates, crawler.get_error_response_using_date(path_params[date_name])
+
+    return dates, None
+
+
+def cacheable(endpoint):
+    """
+    Makes an endpoint, whose responses change only when a crawler imports
+    rates, answer conditional requests with 304 Not Modified before it
+    reads the database, and add caching headers to its responses (the same
+    way api.py does it).
+    """
+
+    @functools.wraps(endpoint)
+    async def cacheable_endpoint(request):
+
+        last_import_date = await crawler.get_last_import_date_async()
+
+        if last_import_date is None:
+            return await endpoint(request)
+
+        etag = crawler.get_etag(
+            last_import_date,
+            f"{request.url.path}?{request.url.query}",
+            get_rates_mimetype(request),
+        )
+        caching_headers = crawler.get_caching_headers(etag, last_import_date)
+
+        if if_none_match_contains(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=caching_headers)
+
+        response = await endpoint(request)
+
+        if response.status_code == 200:
+            response.headers.update(caching_headers)
+
+        return response
+
+    return cacheable_endpoint
+
+
+async def hello(request):
+    return get_json_response(
+        crawler.get_error_response(code=1, message="No action specified.")
+    )
+
+
+async def info(request):
+
+    data = {
+        "version": __version__,
+        "response_cache": crawler.get_response_cache_metrics(),
+    }
+
+    return JSONResponse(data)
+
+
+@cacheable
+async def currencies(request):
+    return JSONResponse({"currencies": crawler.get_currency_codes()})
+
+
+@cacheable
+async def rates(request):
+
+    path_params = request.path_params
+
+    if "currency_code" not in path_params:
+        return get_json_response(
+            crawler.get_error_response(code=2, message="No currency specified.")
+        )
+
+    dates, error_response = get_dates(path_params)
+
+    if error_response is not None:
+        return get_json_response(error_response)
+
+    result = await crawler.get_currency_rates_async(
+        path_params["currency_code"],
+        **dates,
+        mimetype=get_rates_mimetype(request),
+        limit=request.query_params.get("limit"),
+        cursor=request.query_params.get("cursor"),
+    )
+
+    return get_json_response(result)
+
+
+@cacheable
+async def bulk_rates(request):
+
+    path_params = request.path_params
+
+    if "currency_codes" not in path_params:
+        return get_json_response(
+            crawler.get_error_response(code=2, message="No currency specified.")
+        )
+
+    dates, error_response = get_dates(path_params)
+
+    if error_response is not None:
+        return get_json_response(error_response)
+
+    result = await run_in_threadpool(
+        functools.partial(
+            crawler.get_currencies_rates, path_params["currency_codes"], **dates
+        )
+    )
+
+    return get_json_response(result)
+
+
+async def changes(request):
+
+    result = await run_in_threadpool(
+        crawler.get_changes, request.path_params.get("token")
+    )
+
+    return get_json_response(result)
+
+
+async def notifications(request):
+
+    result = await crawler.get_notifications_async(request.path_params.get("token"))
+
+    return get_json_response(result)
+
+
+async def heartbeat(request):
+
+    details, success = await crawler.get_heartbeat_async()
+
+    return JSONResponse(details, status_code=200 if success else 500)
+
+
+@contextlib.asynccontextmanager
+async def lifespan(_):
+
+    yield
+
+    crawler.disconnect()
+
+
+crawler = AsyncCrawlerHTTPService(__file__)
+
+app = Starlette(
+    routes=[
+        Route("/", hello),
+        Route("/info/", info),
+        Route("/currencies/", currencies),
+        Route("/rates/", rates),
+        Route("/rates/{currency_code}/", rates),
+        Route("/rates/{currency_code}/{import_date}/", rates),
+        Route("/rates/{currency_code}/{import_date}/{start_date}/", rates),
+        Route("/rates/{currency_code}/{import_date}/{start_date}/{end_date}/", rates),
+        Route("/bulk-rates/", bulk_rates),
+        Route("/bulk-rates/{currency_codes}/", bulk_rates),
+        Route("/bulk-rates/{currency_codes}/{import_date}/", bulk_rates),
+        Route("/bulk-rates/{currency_codes}/{import_date}/{start_date}/", bulk_rates),
+        Route(
+            "/bulk-rates/{currency_codes}/{import_date}/{start_date}/{end_date}/",
+            bulk_rates,
+        ),
+        Route("/changes/", changes),
+        Route("/changes/{token}/", changes),
+        Route("/notifications/", notifications),
+        Route("/notifications/{token}/", notifications),
+        Route("/heartbeat/", heartbeat),
+    ],
+    lifespan=lifespan,
+)
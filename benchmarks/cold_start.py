@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+
+"""
+Measures how long it takes a new process to import the REST service (which
+is what each gunicorn worker or a new replica does before it is able
+to serve requests). No connection to the database is made on import,
+so the database is not needed.
+
+Usage: cold_start.py [module name (api by default)] [number of processes]
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def get_import_duration(module_name: str) -> float:
+
+    start_time = time.perf_counter()
+
+    subprocess.run(
+        [sys.executable, "-c", f"import {module_name}"],
+        cwd=ROOT_DIRECTORY,
+        stdout=subprocess.DEVNULL,
+        check=True,
+    )
+
+    return time.perf_counter() - start_time
+
+
+def main():
+
+    module_name = sys.argv[1] if len(sys.argv) > 1 else "api"
+    processes_number = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+
+    # The first process may cache the configuration & compile modules,
+    # which is not what the rest of them do.
+
+    get_import_duration(module_name)
+
+    durations = [
+        get_import_duration(module_name) * 1000 for _ in range(processes_number)
+    ]
+
+    print(
+        f"import {module_name}: median {statistics.median(durations):.1f} ms, "
+        f"max {max(durations):.1f} ms ({processes_number} processes)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+
+"""
+Compares the conversion of data of a historical file to rates the crawler
+does with the one it used to do row by row, on a generated multi-year
+workbook laid out the way the bank's files are. Reading the workbook
+is not measured, since both of them start with the same data.
+
+Usage: excel_conversion.py [number of years] [number of runs]
+"""
+
+import datetime
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import load_history  # noqa: E402
+from tests import fixtures  # noqa: E402
+
+
+def get_durations(convert, excel_data, runs_number: int) -> list:
+
+    durations = []
+
+    for _ in range(runs_number):
+        start_time = time.perf_counter()
+        convert(excel_data)
+        durations.append((time.perf_counter() - start_time) * 1000)
+
+    return durations
+
+
+def main():
+
+    years_number = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    runs_number = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+
+    # The workbook has an unknown currency, which is warned about each run.
+
+    logging.disable(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as directory:
+
+        file_path = os.path.join(directory, "rates.xlsx")
+
+        fixtures.write_historical_workbook(
+            file_path, datetime.date(2018, 1, 1), years_number * 365, False
+        )
+
+        excel_data = load_history.read_excel_file(file_path)
+
+    print(f"{len(excel_data)} row(s), {runs_number} run(s) per conversion:")
+    print()
+    print(f"{'Conversion':40} {'Rates':>8} {'Median, ms':>12} {'Max, ms':>12}")
+
+    for currency_codes_filter in ([], ["USD", "EUR"]):
+
+        crawler = fixtures.get_crawler(
+            load_history.HistoricalUAExchangeRatesCrawler, currency_codes_filter
+        )
+
+        def convert_row_by_row(data):
+            return fixtures.load_currency_rates_row_by_row(crawler, data)
+
+        def convert(data):
+            currency_rates = []
+            crawler._load_currency_rates_from_excel_data(data, currency_rates)
+            return currency_rates
+
+        filter_title = ", ".join(currency_codes_filter) or "all currencies"
+
+        for title, conversion in (
+            ("row by row", convert_row_by_row),
+            ("vectorized", convert),
+        ):
+
+            durations = get_durations(conversion, excel_data, runs_number)
+            rates_number = len(conversion(excel_data))
+
+            print(
+                f"{title + ' (' + filter_title + ')':40} {rates_number:>8} "
+                f"{statistics.median(durations):>12.2f} {max(durations):>12.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
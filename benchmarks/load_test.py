@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+
+"""
+Load test of running instances of the REST service: sends requests
+to each of the given base URLs (e.g. the Flask app run via gunicorn
+& the ASGI app run via uvicorn) from a number of concurrent clients,
+and then compares requests per second & latencies.
+
+Usage example:
+
+    gunicorn --workers 4 --bind :8000 api:app
+    uvicorn --workers 4 --port 8001 api_asgi:app
+
+    load_test.py http://localhost:8000 http://localhost:8001 --path /rates/USD/
+"""
+
+import argparse
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+_local = threading.local()
+
+
+def get_session() -> requests.Session:
+
+    if not hasattr(_local, "session"):
+        _local.session = requests.Session()
+
+    return _local.session
+
+
+def get_request_duration(url: str) -> tuple:
+
+    start_time = time.perf_counter()
+
+    try:
+        response = get_session().get(url)
+        success = response.status_code == requests.codes.ok
+    except requests.exceptions.RequestException:
+        success = False
+
+    return time.perf_counter() - start_time, success
+
+
+def get_percentile(durations: list, percentile: int) -> float:
+
+    durations = sorted(durations)
+    index = min(len(durations) - 1, round(len(durations) * percentile / 100))
+
+    return durations[index]
+
+
+def run_load_test(base_url: str, paths: list, requests_number: int, concurrency: int):
+
+    urls = [
+        base_url.rstrip("/") + paths[number % len(paths)]
+        for number in range(requests_number)
+    ]
+
+    # Connections are established (and caches are warmed up) beforehand,
+    # so they don't affect the results.
+
+    with ThreadPoolExecutor(concurrency) as executor:
+
+        list(executor.map(get_request_duration, urls[:concurrency]))
+
+        start_time = time.perf_counter()
+        results = list(executor.map(get_request_duration, urls))
+        total_duration = time.perf_counter() - start_time
+
+    durations = [duration * 1000 for duration, _ in results]
+    errors_number = sum(1 for _, success in results if not success)
+
+    print(
+        f"{base_url:30} {requests_number / total_duration:>10.1f} "
+        f"{statistics.median(durations):>10.2f} "
+        f"{get_percentile(durations, 99):>10.2f} {errors_number:>8}"
+    )
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("base_urls", nargs="+", help="base URLs of the service")
+    parser.add_argument(
+        "--path",
+        dest="paths",
+        action="append",
+        help="path to request (may be repeated; /rates/USD/ by default)",
+    )
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+
+    arguments = parser.parse_args()
+    paths = arguments.paths or ["/rates/USD/"]
+
+    print(
+        f"{arguments.requests} request(s) of {', '.join(paths)} "
+        f"by {arguments.concurrency} concurrent client(s):"
+    )
+    print()
+    print(f"{'URL':30} {'RPS':>10} {'p50, ms':>10} {'p99, ms':>10} {'Errors':>8}")
+
+    for base_url in arguments.base_urls:
+        run_load_test(base_url, paths, arguments.requests, arguments.concurrency)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+
+"""
+Compares formats of rates the REST service is able to respond with:
+a size of a response & time it takes to build one (the database query
+included). Rates are read from the database set in the config.yaml file,
+so it is supposed to be filled by crawlers beforehand. The response cache
+is disabled, so every response of every format is built from the database.
+
+Usage: rates_formats.py [currency code] [number of requests per format]
+"""
+
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import api  # noqa: E402
+
+MIMETYPES = ("application/json",) + api.STREAMING_MIMETYPES + api.BINARY_MIMETYPES
+
+
+def get_response_duration(client, url: str, mimetype: str) -> tuple:
+
+    start_time = time.perf_counter()
+
+    response = client.get(url, headers={"Accept": mimetype})
+    response_size = len(response.get_data())
+
+    return time.perf_counter() - start_time, response_size
+
+
+def main():
+
+    currency_code = sys.argv[1] if len(sys.argv) > 1 else "USD"
+    requests_number = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    url = f"/rates/{currency_code}/"
+    client = api.app.test_client()
+
+    # Only JSON responses are cached, so the cache would let them skip
+    # the query the other formats make.
+
+    api.crawler._response_cache = None
+
+    print(f"{url}, {requests_number} request(s) per format:")
+    print()
+    print(f"{'Format':40} {'Size, bytes':>12} {'Median, ms':>12} {'Max, ms':>12}")
+
+    # The query itself is measured as well, so time taken by serialization
+    # can be told apart.
+
+    durations = []
+
+    for _ in range(requests_number):
+        start_time = time.perf_counter()
+        api.crawler.get_currency_rates(currency_code)
+        durations.append((time.perf_counter() - start_time) * 1000)
+
+    print(
+        f"{'(a list of dicts, not serialized)':40} {'-':>12} "
+        f"{statistics.median(durations):>12.2f} {max(durations):>12.2f}"
+    )
+
+    for mimetype in MIMETYPES:
+
+        durations = []
+        response_size = 0
+
+        for _ in range(requests_number):
+            duration, response_size = get_response_duration(client, url, mimetype)
+            durations.append(duration * 1000)
+
+        print(
+            f"{mimetype:40} {response_size:>12} "
+            f"{statistics.median(durations):>12.2f} {max(durations):>12.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -10,43 +10,32 @@ file in the same directory.
 
 import datetime
 import logging
-
-from bs4 import BeautifulSoup
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
 
 from modules.crawler import UAExchangeRatesCrawler
 from modules.db import Event
+from modules.parsers import get_rates_parser
 
 
 class CurrentUAExchangeRatesCrawler(UAExchangeRatesCrawler):
+    _get_rates: Callable
+
+    def __init__(self, file, updating_event):
+
+        super().__init__(file, updating_event)
+
+        self._get_rates = get_rates_parser(self._config["current_rates_parser"])
 
     def _parse_rates_text_for_date(
         self, text: str, rate_date: datetime.datetime
     ) -> tuple:
 
-        soup = BeautifulSoup(text, features="html.parser")
-
         exchange_rates = []
         unknown_currencies = []
 
-        tags = soup.find_all("td")
-        currency_title = None
-
-        for tag in tags:
-
-            # <td class="font-r fs-small text-navy-custom"></td>
+        for currency_title, currency_rate in self._get_rates(text):
 
-            if len(tag.text) == 0:
-                continue
-
-            # <td class="font-r fs-small text-navy-custom">US Dollar</td>
-
-            if not tag.text[0].isdigit():
-                currency_title = tag.text
-                continue
-
-            # <td class="font-r fs-small text-navy-custom">3.6725</td>
-
-            currency_rate = tag.text
             currency_code = self.get_currency_code(currency_title)
 
             if currency_code is None:
@@ -64,13 +53,11 @@ class CurrentUAExchangeRatesCrawler(UAExchangeRatesCrawler):
                     }
                 )
 
-            currency_title = None
-
         return exchange_rates, unknown_currencies
 
-    def _parse_rates_for_date(self, rate_date: datetime.datetime) -> tuple | None:
+    def _get_rates_text_for_date(self, rate_date: datetime.datetime) -> str | None:
 
-        date_for_date = None
+        rates_text = None
 
         page_url = "https://www.centralbank.ae/umbraco/Surface/Exchange/GetExchangeRateAllCurrencyDate"  # noqa: E501
         page_url = f"{page_url}?dateTime={rate_date:%Y-%m-%d}"
@@ -78,11 +65,32 @@ class CurrentUAExchangeRatesCrawler(UAExchangeRatesCrawler):
         response = self._get_response_for_request(page_url)
 
         if response is not None and response.status_code == 200:
-            date_for_date = self._parse_rates_text_for_date(response.text, rate_date)
+            rates_text = response.text
+
+        return rates_text
 
-        return date_for_date
+    def _import_rates_text_for_date(
+        self, text: str, rate_date: datetime.datetime
+    ) -> int:
+
+        exchange_rates, unknown_currencies = self._parse_rates_text_for_date(
+            text, rate_date
+        )
+
+        self._unknown_currencies_warning(unknown_currencies)
+
+        with self._db.buffered_events():
+
+            for exchange_rate in exchange_rates:
+                self._db.insert_event_current_rates_availability(
+                    currency_code=exchange_rate["currency_code"],
+                    rate_date=exchange_rate["rate_date"],
+                    rate=exchange_rate["rate"],
+                )
 
-    def run(self):
+            return self._process_currency_rates_to_import(exchange_rates)
+
+    def _import(self):
 
         log_title = "import of current exchange rates"
 
@@ -91,43 +99,38 @@ class CurrentUAExchangeRatesCrawler(UAExchangeRatesCrawler):
         days_to_check = self._config.get("days_to_check")
         date_to_check = self._current_datetime.replace(hour=0, minute=0, second=0)
 
-        changed_rates_number = 0
+        dates_to_check = [
+            date_to_check - datetime.timedelta(days=days_number)
+            for days_number in range(days_to_check)
+        ]
 
-        while days_to_check > 0:
+        changed_rates_number = 0
 
-            logging.debug(f"DATE TO CHECK: {date_to_check:%Y-%m-%d}")
-            logging.debug(f"DAYS TO CHECK: {days_to_check}")
+        # Pages are requested concurrently, but parsed & imported
+        # in the same order as they would be processed one by one.
 
-            data_for_date = self._parse_rates_for_date(date_to_check)
+        with ThreadPoolExecutor(self._config["max_concurrency"]) as executor:
 
-            if data_for_date is not None:
+            rates_texts = executor.map(self._get_rates_text_for_date, dates_to_check)
 
-                exchange_rates, unknown_currencies = data_for_date
+            for date_to_check, rates_text in zip(dates_to_check, rates_texts):
 
-                self._unknown_currencies_warning(unknown_currencies)
+                logging.debug(f"DATE TO CHECK: {date_to_check:%Y-%m-%d}")
+                logging.debug(f"DAYS TO CHECK: {days_to_check}")
 
-                for exchange_rate in exchange_rates:
-                    self._db.insert_event_current_rates_availability(
-                        currency_code=exchange_rate["currency_code"],
-                        rate_date=exchange_rate["rate_date"],
-                        rate=exchange_rate["rate"],
+                if rates_text is not None:
+                    changed_rates_number += self._import_rates_text_for_date(
+                        rates_text, date_to_check
                     )
 
-                changed_rates_number += self._process_currency_rates_to_import(
-                    exchange_rates
-                )
-
-            days_to_check -= 1
-            date_to_check -= datetime.timedelta(days=1)
+                days_to_check -= 1
 
-        self._db.insert_import_date(self._current_datetime)
+        self._complete_import()
 
         self._log_import_completed(
             title=log_title, changed_rates_number=changed_rates_number, event=Event.CURRENT_RATES_LOADING
         )
 
-        self._db.disconnect()
-
 
 if __name__ == "__main__":
     CurrentUAExchangeRatesCrawler(
@@ -9,11 +9,11 @@ in the same directory.
 
 import datetime
 import hashlib
+import itertools
 import logging
 import os
 import re
-import shutil
-import ssl
+from concurrent.futures import ProcessPoolExecutor
 
 import pandas
 import requests
@@ -22,9 +22,12 @@ from bs4 import BeautifulSoup
 from modules.crawler import UAExchangeRatesCrawler
 from modules.db import Event
 
+FILE_CHUNK_SIZE = 64 * 1024
+
 
 class HistoricalUAExchangeRatesCrawler(UAExchangeRatesCrawler):
     __historical_files_directory: str = ""
+    _hash_algorithm: str
 
     def __init__(self, file, updating_event):
 
@@ -32,6 +35,10 @@ class HistoricalUAExchangeRatesCrawler(UAExchangeRatesCrawler):
 
         self._init_historical_files_directory()
 
+        self._hash_algorithm = get_hash_algorithm(
+            self._config["history_file_hash_algorithm"]
+        )
+
     def _init_historical_files_directory(self) -> None:
 
         self.__historical_files_directory = os.path.join(
@@ -66,63 +73,82 @@ class HistoricalUAExchangeRatesCrawler(UAExchangeRatesCrawler):
 
         return links
 
-    def _load_currency_rates_from_file(self, link, currency_rates):
+    def _load_currency_rates_from_excel_data(
+        self, excel_data: pandas.DataFrame, currency_rates: list
+    ):
 
-        ssl._create_default_https_context = ssl._create_unverified_context
+        # Rows without a currency, a rate or a date (e.g. a footer of a file)
+        # cannot be imported anyway.
 
-        unknown_currencies = []
+        excel_data = excel_data.dropna(subset=["Currency", "Rate", "Date"])
 
-        excel_data = pandas.read_excel(link, sheet_name=0, header=2)
-        excel_dict = excel_data.to_dict()
-
-        currency_column = excel_dict["Currency"]
-        rate_column = excel_dict["Rate"]
-        date_column = excel_dict["Date"]
+        currency_names = excel_data["Currency"]
+        currency_codes = currency_names.map(
+            {
+                currency_name: self.get_currency_code(currency_name)
+                for currency_name in currency_names.unique()
+            }
+        )
 
-        max_index = len(currency_column) - 1
+        unknown_currencies = currency_names[currency_codes.isna()].unique().tolist()
 
-        for index in range(0, max_index):
+        allowed_currency_codes = [
+            currency_code
+            for currency_code in currency_codes.dropna().unique()
+            if self._is_currency_code_allowed(currency_code)
+        ]
 
-            currency_name = currency_column[index]
-            currency_code = self.get_currency_code(currency_name)
+        rows_to_import = currency_codes.isin(allowed_currency_codes)
 
-            if currency_code is None:
-                unknown_currencies.append(currency_name)
-                continue
+        currency_codes = currency_codes[rows_to_import]
 
-            if not self._is_currency_code_allowed(currency_code):
-                continue
+        rate_dates = pandas.to_datetime(excel_data.loc[rows_to_import, "Date"])
+        rate_dates = rate_dates.dt.normalize() + pandas.Timedelta(days=1)
 
-            rate_date = self.get_datetime_from_date(date_column[index])
+        rates = excel_data.loc[rows_to_import, "Rate"].astype(float)
 
+        for currency_code, rate_date, rate in zip(
+            currency_codes.tolist(),
+            rate_dates.to_numpy(dtype="datetime64[us]").tolist(),
+            rates.tolist(),
+        ):
             currency_rates.append(
                 {
                     "currency_code": currency_code,
                     "import_date": self._current_datetime,
-                    "rate_date": rate_date + datetime.timedelta(days=1),
-                    "rate": float(rate_column[index]),
+                    "rate_date": rate_date,
+                    "rate": rate,
                 }
             )
 
         self._unknown_currencies_warning(unknown_currencies)
 
-    def _currency_rates_from_file(self, file_link: str) -> list | None:
+    def _currency_rates_from_file(
+        self, file_link: str, loaded_file: tuple, historical_file: dict | None
+    ) -> list:
 
         currency_rates = []
 
+        file_is_modified, file_hash, file_validators, excel_data = loaded_file
+
         logging.debug("LINK TO PROCESS: %s", file_link)
 
-        file_path = self.__file_path_in_historical_files_directory(file_link)
+        if file_hash is None:
 
-        if file_path is not None:
+            logging.debug("Unable to download the file!")
 
-            file_hash = self.__file_hash(file_path)
+        elif not file_is_modified:
 
-            logging.debug("Downloaded file hash: %s", file_hash)
+            logging.debug(
+                "The file hasn't been updated "
+                "since the last processing (%s), "
+                "because the server responded it is not modified.",
+                self.date_with_time_as_string(historical_file["import_date"]),
+            )
 
-            historical_file = self._db.historical_file(file_link)
+        else:
 
-            load = False
+            logging.debug("Downloaded file hash: %s", file_hash)
 
             if historical_file is None:
 
@@ -131,8 +157,6 @@ class HistoricalUAExchangeRatesCrawler(UAExchangeRatesCrawler):
                     "(unable to find a previous file hash in the database)."
                 )
 
-                load = True
-
             elif historical_file["hash"] != file_hash:
 
                 logging.debug(
@@ -145,8 +169,6 @@ class HistoricalUAExchangeRatesCrawler(UAExchangeRatesCrawler):
                     )
                 )
 
-                load = True
-
             else:
 
                 logging.debug(
@@ -157,26 +179,40 @@ class HistoricalUAExchangeRatesCrawler(UAExchangeRatesCrawler):
                     self.date_with_time_as_string(historical_file["import_date"]),
                 )
 
-            if load:
+            if excel_data is not None:
 
-                self._load_currency_rates_from_file(file_link, currency_rates)
+                self._load_currency_rates_from_excel_data(excel_data, currency_rates)
 
                 if historical_file is None:
                     self._db.insert_historical_file(
-                        file_link, file_hash, import_date=self._current_datetime
+                        file_link,
+                        file_hash,
+                        import_date=self._current_datetime,
+                        file_validators=file_validators,
                     )
                 else:
                     self._db.update_historical_file(
-                        file_link, file_hash, import_date=self._current_datetime
+                        file_link,
+                        file_hash,
+                        import_date=self._current_datetime,
+                        file_validators=file_validators,
                     )
 
-        return currency_rates
+            elif file_validators != get_file_validators(historical_file):
 
-    def run(self):
+                # The file is the same, but the server has changed its
+                # validators (or they haven't been stored before).
 
-        ssl_ctx = ssl.create_default_context()
-        ssl_ctx.check_hostname = False
-        ssl_ctx.verify_mode = ssl.CERT_NONE
+                self._db.update_historical_file(
+                    file_link,
+                    file_hash,
+                    import_date=historical_file["import_date"],
+                    file_validators=file_validators,
+                )
+
+        return currency_rates
+
+    def _import(self):
 
         log_title = "import of historical exchange rates"
 
@@ -188,17 +224,44 @@ class HistoricalUAExchangeRatesCrawler(UAExchangeRatesCrawler):
 
             changed_rates_number = 0
 
-            for link_to_file in links_to_files:
+            historical_files = self._db.historical_files(links_to_files)
+
+            files_paths = [
+                self.__file_path_in_historical_files_directory(link_to_file)
+                for link_to_file in links_to_files
+            ]
 
-                currency_rates = self._currency_rates_from_file(link_to_file)
+            previous_historical_files = [
+                historical_files.get(link_to_file) for link_to_file in links_to_files
+            ]
 
-                logging.debug("Crawling results: %d rate(s).", len(currency_rates))
+            # Files are downloaded & parsed by a pool of processes,
+            # but their rates are imported in the order of the links.
 
-                changed_rates_number += self._process_currency_rates_to_import(
-                    currency_rates
+            with ProcessPoolExecutor(self._config["history_max_workers"]) as executor:
+
+                loaded_files = executor.map(
+                    load_historical_file,
+                    links_to_files,
+                    files_paths,
+                    previous_historical_files,
+                    itertools.repeat(self._hash_algorithm),
                 )
 
-            self._db.insert_import_date(self._current_datetime)
+                for link_to_file, loaded_file in zip(links_to_files, loaded_files):
+
+                    currency_rates = self._currency_rates_from_file(
+                        link_to_file, loaded_file, historical_files.get(link_to_file)
+                    )
+
+                    logging.debug("Crawling results: %d rate(s).", len(currency_rates))
+
+                    with self._db.buffered_events():
+                        changed_rates_number += self._process_currency_rates_to_import(
+                            currency_rates
+                        )
+
+            self._complete_import()
 
             self._log_import_completed(
                 title=log_title, changed_rates_number=changed_rates_number, event=Event.HISTORICAL_RATES_LOADING
@@ -208,49 +271,194 @@ class HistoricalUAExchangeRatesCrawler(UAExchangeRatesCrawler):
 
             self._log_import_failed(title=log_title)
 
-        self._db.disconnect()
+    def __file_path_in_historical_files_directory(self, file_link: str) -> str:
+
+        return os.path.join(
+            self.__historical_files_directory, get_historical_file_name(file_link)
+        )
+
+
+def get_historical_file_name(file_link: str) -> str:
+    """
+    Returns a name of a local copy of a historical file: the name the link
+    ends with, prefixed with a hash of the whole link, so files of links
+    which end with the same name (and are downloaded by different workers
+    at the same time) never share a copy.
+    """
+
+    link_hash = hashlib.sha1(file_link.encode()).hexdigest()[:12]
+
+    return f"{link_hash}_{file_link.split('/')[-1]}"
+
+
+def get_hash_algorithm(hash_algorithm: str) -> str:
+    """
+    Returns the given name of a hash algorithm if hashlib supports it
+    (the one is checked once, so it doesn't fail in each worker process),
+    or md5 otherwise.
+    """
+
+    if hash_algorithm in hashlib.algorithms_available:
+
+        try:
+            hashlib.new(hash_algorithm).hexdigest()
+        except (TypeError, ValueError):
+            pass  # e.g. SHAKE algorithms, which need a length of a digest
+        else:
+            return hash_algorithm
 
-    def __file_path_in_historical_files_directory(self, file_link: str) -> str | None:
+    logging.warning(
+        'Unable to hash files using "%s" (history_file_hash_algorithm), '
+        "md5 will be used instead.",
+        hash_algorithm,
+    )
 
-        file_name = file_link.split("/")[-1]
-        file_path = os.path.join(self.__historical_files_directory, file_name)
+    return "md5"
 
-        file_is_downloaded = False
-        attempt_number = 0
 
-        while not file_is_downloaded:
+def load_historical_file(
+    file_link: str,
+    file_path: str,
+    historical_file: dict | None,
+    hash_algorithm: str,
+) -> tuple:
+    """
+    Downloads a historical file (unless the server responds it hasn't been
+    modified since the previous processing) & calculates its hash. Then,
+    if the hash differs from the previous one, reads the downloaded file
+    (so the data is exactly the one the hash has been calculated for).
+    It is executed by worker processes, so it takes & returns picklable
+    values only.
 
-            if attempt_number == 3:
-                break
+    :return: whether the file is modified, its hash (None if the file
+    cannot be downloaded), its validators & its data (None if the file
+    hasn't been downloaded, modified or changed)
+    """
 
-            attempt_number += 1
+    file_is_modified = True
+    file_hash = None
+    file_validators = None
+    excel_data = None
 
-            logging.debug("Attempt #%d to download the file...", attempt_number)
+    request_headers = get_conditional_request_headers(historical_file)
+    response, downloaded_file_hash = download_file(
+        file_link, file_path, request_headers, hash_algorithm
+    )
 
-            try:
+    if response is None:
+        return file_is_modified, file_hash, file_validators, excel_data
+
+    if response.status_code == requests.codes.not_modified:
+
+        file_is_modified = False
+        file_hash = historical_file["hash"]
+        file_validators = get_file_validators(historical_file)
+
+    else:
+
+        file_hash = downloaded_file_hash
+        file_validators = get_response_validators(response)
+
+        if historical_file is None or historical_file["hash"] != file_hash:
+            excel_data = read_excel_file(file_path)
+
+    return file_is_modified, file_hash, file_validators, excel_data
+
+
+def get_conditional_request_headers(historical_file: dict | None) -> dict:
+    """
+    Returns headers which make the server respond with 304 Not Modified
+    if a file hasn't been modified since the previous processing.
+    """
+
+    request_headers = {}
+
+    if historical_file is not None:
+
+        if historical_file.get("etag") is not None:
+            request_headers["If-None-Match"] = historical_file["etag"]
+
+        if historical_file.get("last_modified") is not None:
+            request_headers["If-Modified-Since"] = historical_file["last_modified"]
+
+    return request_headers
+
+
+def get_file_validators(historical_file: dict | None) -> dict:
+
+    if historical_file is None:
+        historical_file = {}
+
+    return {
+        "etag": historical_file.get("etag"),
+        "last_modified": historical_file.get("last_modified"),
+        "content_length": historical_file.get("content_length"),
+    }
+
+
+def get_response_validators(response: requests.Response) -> dict:
+
+    return {
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+        "content_length": response.headers.get("Content-Length"),
+    }
+
+
+def download_file(
+    file_link: str, file_path: str, request_headers: dict, hash_algorithm: str
+) -> tuple:
+    """
+    Downloads a file chunk by chunk, writing each chunk to the disk
+    and feeding it to a hash function at the same time.
+
+    :return: the response (None if the file cannot be downloaded)
+    & the file hash (None if the file hasn't been modified)
+    """
+
+    response = None
+    file_hash = None
+    attempt_number = 0
+
+    while response is None:
+
+        if attempt_number == 3:
+            break
+
+        attempt_number += 1
+
+        logging.debug("Attempt #%d to download the file...", attempt_number)
+
+        try:
+
+            with requests.get(
+                file_link, headers=request_headers, stream=True
+            ) as file_response:
+
+                file_response.raise_for_status()
+
+                if file_response.status_code != requests.codes.not_modified:
+
+                    file_hasher = hashlib.new(hash_algorithm)
 
-                with requests.get(file_link, stream=True) as response:
                     with open(file_path, "wb") as file:
-                        shutil.copyfileobj(response.raw, file)
-                        file_is_downloaded = True
-            except (requests.exceptions.RequestException, shutil.Error) as exception:
-                logging.error(exception)
+                        for chunk in file_response.iter_content(FILE_CHUNK_SIZE):
+                            file.write(chunk)
+                            file_hasher.update(chunk)
 
-        if not file_is_downloaded:
-            logging.debug("Unable to download the file!")
-            file_path = None
+                    file_hash = file_hasher.hexdigest()
+
+                response = file_response
 
-        return file_path
+        except (requests.exceptions.RequestException, OSError) as exception:
+            logging.error(exception)
 
-    @staticmethod
-    def __file_hash(file_path: str):
+    return response, file_hash
 
-        md5 = hashlib.md5()
 
-        with open(file_path, "rb") as file:
-            md5.update(file.read())
+def read_excel_file(file_path: str) -> pandas.DataFrame:
 
-        return md5.hexdigest()
+    return pandas.read_excel(file_path, sheet_name=0, header=2)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+
+"""
+Prepares the database for the crawlers & the REST service: creates
+indexes their queries rely on & the capped collection of notifications
+about imports, numbers rates inserted before sequence numbers have been
+introduced, rebuilds latest rates, and then checks that none
+of the queries falls back to a collection scan.
+
+It has no arguments, but can be customized via the config.yaml
+file in the same directory. It is safe to run it on every deployment.
+"""
+
+import logging
+
+from modules.crawler import UAExchangeRatesCrawler
+from modules.db import Event
+
+
+class UAExchangeRatesDBMigration(UAExchangeRatesCrawler):
+    def _import(self):
+
+        logging.debug("Creating indexes...")
+
+        self._db.create_indexes()
+
+        logging.debug("Indexes have been created.")
+
+        self._db.create_notifications_collection(
+            self._config["notifications_collection_size"]
+        )
+
+        logging.debug("The collection of notifications has been created.")
+
+        logging.debug("Numbering rates inserted without sequence numbers...")
+
+        rates_number = self._db.backfill_sequence_numbers()
+
+        logging.debug("%d rate(s) have been numbered.", rates_number)
+
+        logging.debug("Rebuilding latest rates...")
+
+        self._db.rebuild_latest_rates()
+
+        logging.debug("Latest rates have been rebuilt.")
+
+        collection_scans = self._db.get_collection_scans()
+
+        for query_title in collection_scans:
+            logging.warning(
+                'The "%s" query falls back to a collection scan.', query_title
+            )
+
+        if len(collection_scans) == 0:
+            logging.info("All queries use indexes.")
+
+
+if __name__ == "__main__":
+    UAExchangeRatesDBMigration(file=__file__, updating_event=Event.NONE).run()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+
+"""
+Asynchronous client of the database for the ASGI REST service (see
+api_asgi.py). It makes the same queries the REST service makes using
+UAExchangeRatesCrawlerDB, but via Motor, so a process is able to wait
+for many of them at the same time.
+"""
+
+import datetime
+import time
+
+import pymongo
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from modules import queries
+from modules.db import Event
+
+
+class AsyncUAExchangeRatesCrawlerDB:
+    _client: AsyncIOMotorClient
+    _currency_rates_collection = None
+    _import_dates_collection = None
+    _events_collection = None
+    _latest_rates_collection = None
+    _last_import_date_cache_lifespan: int = 0
+    _last_import_date_cache: tuple | None = None
+
+    def __init__(self, config: dict):
+
+        self._client = AsyncIOMotorClient(
+            config["mongodb_connection_string"],
+            serverSelectionTimeoutMS=config["mongodb_max_delay"],
+            maxPoolSize=config["asgi_mongodb_max_pool_size"],
+            minPoolSize=config["asgi_mongodb_min_pool_size"],
+        )
+
+        database = self._client[config["mongodb_database_name"]]
+
+        self._currency_rates_collection = database["currency_rates"]
+        self._import_dates_collection = database["import_dates"]
+        self._events_collection = database["events"]
+        self._latest_rates_collection = database["latest_rates"]
+
+        self._last_import_date_cache_lifespan = config.get(
+            "last_import_date_cache_lifespan", 0
+        )
+
+    def disconnect(self):
+
+        self._client.close()
+
+    async def get_last_import_date(self) -> datetime.datetime | None:
+        """
+        Returns the date of the last completed import, which is cached
+        the same way UAExchangeRatesCrawlerDB caches it.
+        """
+
+        if self._last_import_date_cache is not None:
+
+            last_import_date, expiration_time = self._last_import_date_cache
+
+            if time.monotonic() < expiration_time:
+                return last_import_date
+
+        record = await self._import_dates_collection.find_one(
+            {}, {"_id": 0, "date": 1}, sort=[("date", pymongo.DESCENDING)]
+        )
+
+        last_import_date = None if record is None else record["date"]
+
+        if self._last_import_date_cache_lifespan > 0:
+            expiration_time = time.monotonic() + self._last_import_date_cache_lifespan
+            self._last_import_date_cache = (last_import_date, expiration_time)
+
+        return last_import_date
+
+    async def get_currency_rates(
+        self,
+        currency_code: str,
+        import_date: datetime.datetime | None,
+        start_date: datetime.datetime | None,
+        end_date: datetime.datetime | None,
+        after_date: datetime.datetime | None = None,
+        limit: int | None = None,
+    ) -> list:
+
+        if import_date is None:
+
+            query_filter = queries.get_latest_rates_filter(
+                [currency_code], start_date, end_date, after_date
+            )
+            query_fields = {"_id": 0, "import_date": 1, "rate_date": 1, "rate": 1}
+
+            cursor = self._latest_rates_collection.find(
+                query_filter,
+                query_fields,
+                sort=[("rate_date", pymongo.ASCENDING)],
+                limit=limit or 0,
+            )
+
+            return await cursor.to_list(length=None)
+
+        stages = queries.get_currency_rates_stages(
+            currency_code,
+            import_date,
+            start_date,
+            end_date,
+            await self.get_last_import_date(),
+            after_date,
+            limit,
+        )
+
+        cursor = self._currency_rates_collection.aggregate(stages)
+
+        return [queries.get_currency_rate_from_group(group) async for group in cursor]
+
+    async def get_last_event(self, event: Event) -> dict | None:
+
+        query_filter = {"event_name": event.value}
+        query_fields = {"_id": 0, "event_name": 0}
+
+        return await self._events_collection.find_one(
+            query_filter, query_fields, sort=[("event_date", -1)]
+        )
+
+    async def get_last_events_by_currencies(self, event: Event) -> dict:
+
+        stages = queries.get_last_events_by_currencies_stages(event.value)
+
+        events = {}
+
+        async for record in self._events_collection.aggregate(stages):
+            events[record["_id"]] = {"event_date": record["event_date"]}
+
+        return events
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+
+"""
+Caches of responses of the REST service. A response is cached as JSON,
+so any cache returns a new copy of it, which a caller is free to change.
+"""
+
+import collections
+import datetime
+import json
+import threading
+import time
+
+from modules.db import UAExchangeRatesCrawlerDB
+
+
+def get_key_string(key: tuple) -> str:
+
+    return "|".join("" if part is None else str(part) for part in key)
+
+
+class LocalResponseCache:
+    """
+    A cache kept in memory of a process, which removes the least recently
+    used responses once their total size exceeds the limit.
+    """
+
+    _max_size: int
+    _lifespan: int
+    _entries: collections.OrderedDict
+    _size: int
+    _lock: threading.Lock
+    _metrics: collections.Counter
+
+    def __init__(self, max_size: int, lifespan: int) -> None:
+
+        self._max_size = max_size
+        self._lifespan = lifespan
+        self._entries = collections.OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self._metrics = collections.Counter()
+
+    def get(self, key: tuple) -> dict | None:
+
+        key = get_key_string(key)
+
+        with self._lock:
+
+            entry = self._entries.get(key)
+
+            if entry is not None and time.monotonic() >= entry[1]:
+
+                self._remove(key)
+                self._metrics["expirations"] += 1
+
+                entry = None
+
+            if entry is None:
+                self._metrics["misses"] += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self._metrics["hits"] += 1
+
+        return json.loads(entry[0])
+
+    def set(self, key: tuple, data: dict) -> None:
+
+        key = get_key_string(key)
+        response = json.dumps(data).encode()
+
+        if len(response) > self._max_size:
+            return
+
+        with self._lock:
+
+            if key in self._entries:
+                self._remove(key)
+
+            self._entries[key] = (response, time.monotonic() + self._lifespan)
+            self._size += len(response)
+
+            while self._size > self._max_size:
+                self._remove(next(iter(self._entries)))
+                self._metrics["evictions"] += 1
+
+    def _remove(self, key: str) -> None:
+
+        response, _ = self._entries.pop(key)
+        self._size -= len(response)
+
+    def get_metrics(self) -> dict:
+
+        with self._lock:
+            return {
+                "backend": "local",
+                "hits": self._metrics["hits"],
+                "misses": self._metrics["misses"],
+                "evictions": self._metrics["evictions"],
+                "expirations": self._metrics["expirations"],
+                "entries": len(self._entries),
+                "size": self._size,
+                "max_size": self._max_size,
+            }
+
+
+class SharedResponseCache:
+    """
+    A cache kept in the database, so processes of the REST service
+    (e.g. gunicorn workers) share responses instead of each warming
+    up its own cache. Expired responses are removed by MongoDB.
+    """
+
+    _db: UAExchangeRatesCrawlerDB
+    _lifespan: int
+    _lock: threading.Lock
+    _metrics: collections.Counter
+
+    def __init__(self, db: UAExchangeRatesCrawlerDB, lifespan: int) -> None:
+
+        self._db = db
+        self._lifespan = lifespan
+        self._lock = threading.Lock()
+        self._metrics = collections.Counter()
+
+    def get(self, key: tuple) -> dict | None:
+
+        response = self._db.get_cached_response(get_key_string(key))
+
+        with self._lock:
+            self._metrics["misses" if response is None else "hits"] += 1
+
+        return None if response is None else json.loads(response)
+
+    def set(self, key: tuple, data: dict) -> None:
+
+        expiration_date = datetime.datetime.now() + datetime.timedelta(
+            seconds=self._lifespan
+        )
+
+        self._db.set_cached_response(
+            get_key_string(key), json.dumps(data).encode(), expiration_date
+        )
+
+    def get_metrics(self) -> dict:
+
+        with self._lock:
+            return {
+                "backend": "shared",
+                "hits": self._metrics["hits"],
+                "misses": self._metrics["misses"],
+            }
+
+
+def get_response_cache(
+    config: dict, db: UAExchangeRatesCrawlerDB
+) -> LocalResponseCache | SharedResponseCache | None:
+    """
+    Returns a cache set by the response_cache_backend option
+    (None if responses must not be cached).
+    """
+
+    backend = config["response_cache_backend"]
+    lifespan = config["response_cache_lifespan"]
+
+    if backend == "local":
+        return LocalResponseCache(config["response_cache_max_size"] * 1024**2, lifespan)
+
+    if backend == "shared":
+        return SharedResponseCache(db, lifespan)
+
+    return None
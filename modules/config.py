@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+
+"""
+Loading of the configuration file & logging configuration. A parsed
+configuration file is cached next to it, so a process doesn't parse
+the whole YAML file each time it starts (unless the file is changed).
+"""
+
+import json
+import logging
+import logging.config
+import os
+
+import yaml
+
+CONFIG_FILE_NAME = "config.yaml"
+CONFIG_CACHE_FILE_NAME = ".config.cache.json"
+
+LOGGING_CONFIG_NAMES = {
+    "load_current.py": "load_current_logging",
+    "load_history.py": "load_history_logging",
+    "api.py": "api_logging",
+    "api_asgi.py": "api_logging",
+    "migrate.py": "migrate_logging",
+}
+
+
+def get_config(directory: str) -> dict:
+    """
+    Returns the configuration from the config.yaml file in the given
+    directory, with default values of missing or invalid parameters.
+    """
+
+    config_filepath = os.path.join(directory, CONFIG_FILE_NAME)
+    cache_filepath = os.path.join(directory, CONFIG_CACHE_FILE_NAME)
+
+    try:
+        config_stat = os.stat(config_filepath)
+        config_version = (config_stat.st_mtime_ns, config_stat.st_size)
+    except OSError:
+        config_version = None
+
+    config = get_cached_config(cache_filepath, config_version)
+
+    if config is None:
+
+        config = get_yaml_data(config_filepath)
+
+        if config_version is not None:
+            cache_config(cache_filepath, config_version, config)
+
+    # Defaults are applied to a cached configuration as well, since they
+    # might have been changed since it has been cached.
+
+    check_parameters(config)
+
+    return config
+
+
+def get_yaml_data(yaml_filepath: str) -> dict:
+
+    # The C loader (if PyYAML is built with libyaml) is several times
+    # faster than the pure Python one.
+
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+    try:
+
+        with open(yaml_filepath, encoding="utf-8-sig") as yaml_file:
+            yaml_data = yaml.load(yaml_file, Loader=loader)
+
+    except EnvironmentError:
+
+        yaml_data = {}
+
+    return yaml_data if isinstance(yaml_data, dict) else {}
+
+
+def get_cached_config(cache_filepath: str, config_version: tuple | None) -> dict | None:
+
+    # The cache is a JSON file rather than a pickle one, since unpickling
+    # a file, which anyone might have written, could run arbitrary code.
+
+    if config_version is None:
+        return None
+
+    try:
+
+        with open(cache_filepath, encoding="utf-8") as cache_file:
+            cache = json.load(cache_file)
+
+        cached_version, config = cache["version"], cache["config"]
+
+    except (EnvironmentError, ValueError, TypeError, KeyError):
+
+        return None
+
+    if cached_version != list(config_version) or not isinstance(config, dict):
+        return None
+
+    return config
+
+
+def cache_config(cache_filepath: str, config_version: tuple, config: dict) -> None:
+
+    # A configuration, which JSON cannot represent as it is (e.g. with dates
+    # or non-string keys), is not cached.
+
+    try:
+        cache = json.dumps({"version": list(config_version), "config": config})
+    except (TypeError, ValueError):
+        return
+
+    if json.loads(cache)["config"] != config:
+        return
+
+    # The cache is written to a temporary file first, so processes which
+    # start at the same time never read a half-written one.
+
+    temporary_filepath = f"{cache_filepath}.{os.getpid()}"
+
+    try:
+
+        with open(temporary_filepath, "w", encoding="utf-8") as cache_file:
+            cache_file.write(cache)
+
+        os.replace(temporary_filepath, cache_filepath)
+
+    except EnvironmentError as error:
+
+        logging.debug("Unable to cache the configuration: %s", error)
+
+
+def check_parameters(config: dict) -> None:
+    def check_parameter(
+        parameter_key: str,
+        parameter_type: type,
+        default_value: int | str | list | dict,
+    ):
+
+        value = config.get(parameter_key)
+
+        if type(value) != parameter_type:
+            config[parameter_key] = default_value
+
+    def check_positive_parameter(parameter_key: str, default_value: int):
+
+        check_parameter(parameter_key, int, default_value)
+
+        if config[parameter_key] <= 0:
+            config[parameter_key] = default_value
+
+    check_parameter("currency_codes_filter", list, [])
+    check_parameter("mongodb_connection_string", str, "mongodb://localhost:27017")
+    check_parameter("mongodb_database_name", str, "uae_currency_rates")
+    check_parameter("mongodb_max_delay", int, 5)
+    check_parameter("last_import_date_cache_lifespan", int, 5)
+    check_parameter("heartbeat_cache_lifespan", int, 10)
+    check_parameter("http_cache_max_age", int, 60)
+    check_parameter("changes_page_size", int, 1000)
+    check_parameter("notifications_wait_timeout", int, 30)
+    check_parameter("notifications_collection_size", int, 1048576)
+    check_parameter("response_cache_backend", str, "local")
+    check_parameter("response_cache_lifespan", int, 3600)
+    check_parameter("response_cache_max_size", int, 64)
+    check_parameter("asgi_mongodb_max_pool_size", int, 100)
+    check_parameter("asgi_mongodb_min_pool_size", int, 0)
+    check_positive_parameter("max_concurrency", 4)
+    check_parameter("current_rates_parser", str, "html.parser")
+    check_positive_parameter("history_max_workers", 4)
+    check_parameter("history_file_hash_algorithm", str, "md5")
+    check_parameter("telegram_bot_api_token", str, "")
+    check_parameter("telegram_chat_id", int, 0)
+    check_parameter("telegram_api_url", str, "https://api.telegram.org")
+    check_parameter("api_url", str, "")
+    check_parameter("api_endpoint_to_get_logs", str, "")
+    check_parameter("user_agent", str, "")
+    check_parameter("currency_codes", dict, {})
+
+
+def setup_logging(config: dict, file: str) -> None:
+    """
+    Applies logging configuration of the given script (or basic one
+    in case of failure).
+    """
+
+    logging_config_name = LOGGING_CONFIG_NAMES.get(os.path.split(file)[1])
+
+    if logging_config_name is not None:
+
+        try:
+
+            logging.config.dictConfig(config.get(logging_config_name))
+
+        except Exception as error:
+
+            print(error)
+            print(
+                "Error in logging configuration. Basic configuration will be applied."
+            )
+
+            logging.basicConfig(level=logging.DEBUG)
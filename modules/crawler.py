@@ -10,27 +10,33 @@ Basic crawler class. Contains core functionality for a working prototype:
 - logger instance
 """
 
+import abc
 import datetime
 import logging
-import logging.config
 import os
+import threading
 from itertools import groupby
 
 import requests
-import yaml
 from requests import Response
 from requests.structures import CaseInsensitiveDict
 
+from modules.config import get_config, setup_logging
+from modules.currencies import CurrencyCodes
 from modules.db import Event, UAExchangeRatesCrawlerDB
+from modules.telegram import TelegramNotifier
 
 
-class UAExchangeRatesCrawler:
+class UAExchangeRatesCrawler(abc.ABC):
     _current_directory: str
     _current_datetime: datetime.datetime
     _current_date: datetime.datetime
     _config: dict
+    _currency_codes: CurrencyCodes
     _db: UAExchangeRatesCrawlerDB
-    _session: requests.sessions.Session = requests.session()
+    _notifier: TelegramNotifier
+    _imported_rates_keys: set
+    _thread_data: threading.local = threading.local()
     _updating_event: Event
 
     def __init__(self, file, updating_event: Event) -> None:
@@ -40,35 +46,48 @@ class UAExchangeRatesCrawler:
 
         self._config = self._get_config()
         self._db = UAExchangeRatesCrawlerDB(self._config)
+        self._db.create_latest_rates_index()
+
+        self._currency_codes = CurrencyCodes(
+            self._config["currency_codes"], self._config["currency_codes_filter"]
+        )
+
+        self._notifier = TelegramNotifier(
+            self._config["telegram_bot_api_token"],
+            self._config["telegram_chat_id"],
+            api_url=self._config["telegram_api_url"],
+        )
 
         self.setup_logging(file)
 
         self._updating_event = updating_event
+        self._imported_rates_keys = set()
 
         self.review_currency_codes()
 
         logging.debug("Crawler initialized.")
 
-    def send_to_telegram_chat(self, text: str) -> None:
-
-        bot_api_token = self._config.get("telegram_bot_api_token")
-        chat_id = self._config.get("telegram_chat_id")
+    def run(self) -> None:
+        """
+        Imports rates, and then sends texts queued for Telegram & disconnects
+        from the database (even if the import fails).
+        """
 
         try:
+            self._import()
+        finally:
+            self._notifier.close()
+            self._db.disconnect()
 
-            url = f"https://api.telegram.org/bot{bot_api_token}/sendMessage"
-
-            data = {
-                "parse_mode": "HTML",
-                "chat_id": chat_id,
-                "text": text,
-            }
+    @abc.abstractmethod
+    def _import(self) -> None:
+        """
+        Does the work of a particular crawler (see run).
+        """
 
-            requests.post(url, params=data)
+    def send_to_telegram_chat(self, text: str) -> None:
 
-        except Exception as error:
-            print(error)
-            print("Error while sending a message to Telegram.")
+        self._notifier.send(text)
 
     def setup_logging(self, file: str) -> None:
         """
@@ -77,31 +96,7 @@ class UAExchangeRatesCrawler:
         :return: nothing
         """
 
-        current_file = os.path.split(file)[1]
-
-        if current_file == "load_current.py":
-            logging_config_name = "load_current_logging"
-        elif current_file == "load_history.py":
-            logging_config_name = "load_history_logging"
-        elif current_file == "api.py":
-            logging_config_name = "api_logging"
-        else:
-            logging_config_name = None
-
-        if logging_config_name is not None:
-
-            try:
-
-                logging.config.dictConfig(self._config.get(logging_config_name))
-
-            except Exception as error:
-
-                print(error)
-                print(
-                    "Error in logging configuration. Basic configuration will be applied."
-                )
-
-                logging.basicConfig(level=logging.DEBUG)
+        setup_logging(self._config, file)
 
     @staticmethod
     def get_beginning_of_this_second() -> datetime.datetime:
@@ -161,46 +156,8 @@ class UAExchangeRatesCrawler:
         self._db.insert_event_rates_loading(event)
 
     def _get_config(self) -> dict:
-        def get_yaml_data(yaml_filepath: str) -> dict:
 
-            try:
-
-                with open(yaml_filepath, encoding="utf-8-sig") as yaml_file:
-                    yaml_data = yaml.safe_load(yaml_file)
-
-            except EnvironmentError:
-
-                yaml_data = []
-
-            return yaml_data
-
-        def check_parameter(
-            parameter_key: str,
-            parameter_type: type,
-            default_value: int | str | list | dict,
-        ):
-
-            value = config.get(parameter_key)
-
-            if type(value) != parameter_type:
-                config[parameter_key] = default_value
-
-        config_filepath = os.path.join(self._current_directory, "config.yaml")
-
-        config = get_yaml_data(config_filepath)
-
-        check_parameter("currency_codes_filter", list, [])
-        check_parameter("mongodb_connection_string", str, "mongodb://localhost:27017")
-        check_parameter("mongodb_database_name", str, "uae_currency_rates")
-        check_parameter("mongodb_max_delay", int, 5)
-        check_parameter("telegram_bot_api_token", str, "")
-        check_parameter("telegram_chat_id", int, 0)
-        check_parameter("api_url", str, "")
-        check_parameter("api_endpoint_to_get_logs", str, "")
-        check_parameter("user_agent", str, "")
-        check_parameter("currency_codes", dict, {})
-
-        return config
+        return get_config(self._current_directory)
 
     def _get_logs_url(self, import_date: str):
         if (
@@ -224,6 +181,10 @@ class UAExchangeRatesCrawler:
         logging.debug("Process obtained rates...")
 
         changed_rates = []
+        rates_to_insert = []
+
+        imported_rates = self._get_imported_currency_rates(currency_rates_to_import)
+        last_import_date = self._db.get_last_import_date()
 
         for currency_rate_to_import in currency_rates_to_import:
 
@@ -235,22 +196,36 @@ class UAExchangeRatesCrawler:
                 self.rate_value_presentation(currency_rate_to_import["rate"]),
             )
 
-            if not self._db.rate_is_new_or_changed(currency_rate_to_import):
+            rate_key = (
+                currency_rate_to_import["currency_code"],
+                currency_rate_to_import["rate_date"],
+            )
+            rate_revisions = imported_rates.setdefault(rate_key, [])
+
+            if any(
+                rate_revision["rate"] == currency_rate_to_import["rate"]
+                for rate_revision in rate_revisions
+            ):
                 logging.debug(
                     "{}: skipped (already imported)".format(rate_presentation)
                 )
                 continue
 
-            currency_rate_on_date = self._db.currency_rate_on_date(
-                currency_rate_to_import["currency_code"],
-                currency_rate_to_import["rate_date"],
+            currency_rate_on_date = self._currency_rate_on_date(
+                currency_rate_to_import, rate_revisions, last_import_date
             )
 
             changed_rates.append((currency_rate_on_date, currency_rate_to_import))
 
-            self._db.insert_currency_rate(currency_rate_to_import)
+            rate_revisions.append(currency_rate_to_import)
+            rates_to_insert.append(currency_rate_to_import)
+
+            self._imported_rates_keys.add(rate_key)
+
             logging.debug("{}: imported".format(rate_presentation))
 
+        self._db.insert_currency_rates(rates_to_insert)
+
         logging.debug("Obtained rates have been processed.")
 
         logging.debug(self._description_of_rates_changed(len(changed_rates)))
@@ -259,6 +234,90 @@ class UAExchangeRatesCrawler:
 
         return len(changed_rates)
 
+    @staticmethod
+    def _get_rate_revision_order(currency_rate: dict) -> tuple:
+        """
+        Returns a key to order revisions of a rate the same way
+        the database does it: by import date, and then by value.
+        """
+
+        return currency_rate["import_date"], currency_rate["rate"]
+
+    def _complete_import(self) -> None:
+        """
+        Makes rates imported by the crawler visible: updates latest rates
+        (with rates of imports which have never been completed as well)
+        and then writes the import date. After that, notifies the REST
+        service about currencies & dates of imported rates (if any).
+        """
+
+        self._db.update_latest_rates(self._current_datetime)
+        self._db.insert_import_date(self._current_datetime)
+
+        if len(self._imported_rates_keys) > 0:
+            self._db.insert_notification(
+                self._current_datetime, sorted(self._imported_rates_keys)
+            )
+
+    def _get_imported_currency_rates(self, currency_rates: list) -> dict:
+        """
+        Loads (using a single query) rates which have been imported before
+        for the currencies & the window of dates given rates belong to.
+        Returns revisions of rates grouped by currency codes & rate dates.
+        """
+
+        imported_rates = {}
+
+        if len(currency_rates) == 0:
+            return imported_rates
+
+        currency_codes = list({rate["currency_code"] for rate in currency_rates})
+        rate_dates = [rate["rate_date"] for rate in currency_rates]
+
+        for rate in self._db.get_imported_currency_rates(
+            currency_codes, start_date=min(rate_dates), end_date=max(rate_dates)
+        ):
+            rate_key = (rate["currency_code"], rate["rate_date"])
+            imported_rates.setdefault(rate_key, []).append(rate)
+
+        return imported_rates
+
+    @staticmethod
+    def _currency_rate_on_date(
+        currency_rate: dict,
+        rate_revisions: list,
+        last_import_date: datetime.datetime | None,
+    ) -> dict:
+        """
+        Returns a rate on a date the same way the database does it:
+        the latest revision imported until the last completed import.
+        """
+
+        if last_import_date is not None:
+            rate_revisions = [
+                rate_revision
+                for rate_revision in rate_revisions
+                if rate_revision["import_date"] <= last_import_date
+            ]
+
+        if len(rate_revisions) == 0:
+            return {
+                "currency_code": currency_rate["currency_code"],
+                "import_date": None,
+                "rate_date": currency_rate["rate_date"],
+                "rate": 0,
+            }
+
+        rate_revision = max(
+            rate_revisions, key=UAExchangeRatesCrawler._get_rate_revision_order
+        )
+
+        return {
+            "import_date": rate_revision["import_date"],
+            "rate_date": rate_revision["rate_date"],
+            "rate": rate_revision["rate"],
+        }
+
     @staticmethod
     def _description_of_rates_changed(changed_rates_number: int) -> str:
         return f"Number of changed rates: {changed_rates_number}."
@@ -268,16 +327,11 @@ class UAExchangeRatesCrawler:
 
     def _is_currency_code_allowed(self, currency_code: str) -> bool:
 
-        result = True
-
-        if len(self._config["currency_codes_filter"]) > 0:
-            result = currency_code in self._config["currency_codes_filter"]
-
-        return result
+        return self._currency_codes.is_allowed(currency_code)
 
     def get_currency_code(self, currency_presentation: str) -> str:
 
-        return self._config["currency_codes"].get(currency_presentation)
+        return self._currency_codes.get_code(currency_presentation)
 
     def review_currency_codes(self) -> None:
         """
@@ -306,9 +360,24 @@ class UAExchangeRatesCrawler:
     def _unknown_currencies_warning(self, unknown_currencies: list) -> None:
 
         if len(unknown_currencies) > 0:
-            unknown_currencies = list(set(unknown_currencies))
+            unknown_currencies = sorted(set(map(str, unknown_currencies)))
+
+            currencies_presentations = []
 
-            currencies_string = ", ".join(unknown_currencies)
+            for currency_presentation in unknown_currencies:
+
+                suggestions = self._currency_codes.get_suggestions(
+                    currency_presentation
+                )
+
+                if len(suggestions) > 0:
+                    currency_presentation += " (did you mean {}?)".format(
+                        " or ".join(suggestions)
+                    )
+
+                currencies_presentations.append(currency_presentation)
+
+            currencies_string = ", ".join(currencies_presentations)
 
             logging.warning(
                 "Unknown currencies have been skipped: {}".format(currencies_string)
@@ -350,7 +419,7 @@ class UAExchangeRatesCrawler:
 
             try:
 
-                response = self._session.get(request_url, headers=headers)
+                response = self._get_session().get(request_url, headers=headers)
 
                 logging.debug(f"Response status code: {response.status_code}")
 
@@ -362,6 +431,20 @@ class UAExchangeRatesCrawler:
 
         return response
 
+    def _get_session(self) -> requests.Session:
+        """
+        Returns a session of the current thread: pages are requested
+        by several threads at once, and requests doesn't promise a session
+        is safe to share between them.
+        """
+
+        session = getattr(self._thread_data, "session", None)
+
+        if session is None:
+            session = self._thread_data.session = requests.session()
+
+        return session
+
     def get_current_date_presentation(self) -> str:
         return self._get_date_as_string(self._current_date)
 
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+
+"""
+Lookup of currency codes by their presentations (titles of currencies
+the bank uses), compiled once from the configuration.
+"""
+
+import difflib
+
+
+class CurrencyCodes:
+    _codes: dict
+    _presentations: dict
+    _allowed_codes: frozenset
+    _cache: dict
+
+    def __init__(self, currency_codes: dict, currency_codes_filter: list) -> None:
+
+        self._codes = {}
+        self._presentations = {}
+
+        for currency_presentation, currency_code in currency_codes.items():
+
+            normalized_presentation = self.normalize(currency_presentation)
+
+            self._codes[normalized_presentation] = currency_code
+            self._presentations[normalized_presentation] = currency_presentation
+
+        self._allowed_codes = frozenset(currency_codes_filter)
+        self._cache = {}
+
+    @staticmethod
+    def normalize(currency_presentation: str) -> str:
+        """
+        Makes presentations which differ in whitespaces or casing equal.
+        """
+
+        return " ".join(str(currency_presentation).split()).casefold()
+
+    def get_code(self, currency_presentation: str | None) -> str | None:
+
+        if currency_presentation is None:
+            return None
+
+        try:
+            return self._cache[currency_presentation]
+        except KeyError:
+            pass
+
+        currency_code = self._codes.get(self.normalize(currency_presentation))
+        self._cache[currency_presentation] = currency_code
+
+        return currency_code
+
+    def is_allowed(self, currency_code: str) -> bool:
+
+        return len(self._allowed_codes) == 0 or currency_code in self._allowed_codes
+
+    def get_suggestions(self, currency_presentation: str) -> list:
+        """
+        Returns known presentations which look like the given one.
+        """
+
+        normalized_presentations = difflib.get_close_matches(
+            self.normalize(currency_presentation), self._presentations, n=3
+        )
+
+        return [
+            self._presentations[normalized_presentation]
+            for normalized_presentation in normalized_presentations
+        ]
@@ -1,8 +1,18 @@
+import contextlib
 import datetime
 import enum
+import threading
+import time
+from typing import Iterator
 
+import pymongo.cursor
 import pymongo.database
+import pymongo.errors
 import pymongo.mongo_client
+from bson import ObjectId
+from pymongo.write_concern import WriteConcern
+
+from modules import queries
 
 
 class Event(enum.Enum):
@@ -25,8 +35,18 @@ class UAExchangeRatesCrawlerDB:
     __CURRENCY_RATES_COLLECTION: pymongo.collection = None
     __IMPORT_DATES_COLLECTION: pymongo.collection = None
     __EVENTS_COLLECTION: pymongo.collection = None
+    __LATEST_RATES_COLLECTION: pymongo.collection = None
+    __RESPONSE_CACHE_COLLECTION: pymongo.collection = None
+    __COUNTERS_COLLECTION: pymongo.collection = None
+    __NOTIFICATIONS_COLLECTION: pymongo.collection = None
+    __LAST_IMPORT_DATE_CACHE_LIFESPAN: int = 0
+    __SEQUENCE_NUMBERS_LOCK_LIFESPAN: int = 60
+    __SEQUENCE_NUMBERS_LOCK_RETRY_DELAY: float = 0.1
+    __LATEST_RATES_COUNTER_ID: str = "latest_rates_sequence_number"
+    __last_import_date_cache: tuple | None = None
+    __events_buffer: list | None = None
 
-    def __init__(self, config: dict):
+    def __init__(self, config: dict, cache_last_import_date: bool = False):
 
         self.__CLIENT = pymongo.MongoClient(
             config["mongodb_connection_string"],
@@ -39,45 +59,86 @@ class UAExchangeRatesCrawlerDB:
         self.__CURRENCY_RATES_COLLECTION = self.__DATABASE["currency_rates"]
         self.__IMPORT_DATES_COLLECTION = self.__DATABASE["import_dates"]
         self.__EVENTS_COLLECTION = self.__DATABASE["events"]
+        self.__LATEST_RATES_COLLECTION = self.__DATABASE["latest_rates"]
+        self.__RESPONSE_CACHE_COLLECTION = self.__DATABASE["response_cache"]
+        self.__COUNTERS_COLLECTION = self.__DATABASE["counters"]
+        self.__NOTIFICATIONS_COLLECTION = self.__DATABASE["notifications"]
+
+        # Crawlers write rates depending on the last import date, so only
+        # the REST service caches it.
+
+        if cache_last_import_date:
+            self.__LAST_IMPORT_DATE_CACHE_LIFESPAN = config.get(
+                "last_import_date_cache_lifespan", 0
+            )
 
     def disconnect(self):
 
+        self.flush_events()
+
         self.__CLIENT.close()
 
     def get_last_import_date(self) -> datetime.datetime:
+        """
+        Returns the date of the last completed import. The REST service
+        caches the value for a few seconds (see cache_last_import_date
+        & last_import_date_cache_lifespan), since each of its requests needs
+        it. Each process revalidates its own cache using the database, so all
+        of them see a new import within the cache lifespan at the latest.
+        """
 
-        grouping_stage = {"$group": {"_id": "$date"}}
+        if self.__last_import_date_cache is not None:
 
-        sorting_stage = {"$sort": {"_id": -1}}
+            last_import_date, expiration_time = self.__last_import_date_cache
 
-        limiting_stage = {"$limit": 1}
+            if time.monotonic() < expiration_time:
+                return last_import_date
 
-        stages = [grouping_stage, sorting_stage, limiting_stage]
-        result = None
+        last_import_date = self.__get_last_import_date()
 
-        records = list(self.__IMPORT_DATES_COLLECTION.aggregate(stages))
+        if self.__LAST_IMPORT_DATE_CACHE_LIFESPAN > 0:
+            expiration_time = time.monotonic() + self.__LAST_IMPORT_DATE_CACHE_LIFESPAN
+            self.__last_import_date_cache = (last_import_date, expiration_time)
 
-        if len(records) > 0:
-            result = records[0]["_id"]
+        return last_import_date
+
+    def __get_last_import_date(self) -> datetime.datetime | None:
+
+        query_fields = {"_id": 0, "date": 1}
+
+        record = self.__IMPORT_DATES_COLLECTION.find_one(
+            {}, query_fields, sort=[("date", pymongo.DESCENDING)]
+        )
 
-        return result
+        return None if record is None else record["date"]
 
     def insert_historical_file(
-        self, file_link: str, file_hash: str, import_date: datetime.datetime
+        self,
+        file_link: str,
+        file_hash: str,
+        import_date: datetime.datetime,
+        file_validators: dict,
     ) -> None:
         query_values = {
             "link": file_link,
             "hash": file_hash,
             "import_date": import_date,
         }
+        query_values.update(file_validators)
 
         self.__HISTORICAL_FILES_COLLECTION.insert_one(query_values)
 
     def update_historical_file(
-        self, file_link: str, file_hash: str, import_date: datetime.datetime
+        self,
+        file_link: str,
+        file_hash: str,
+        import_date: datetime.datetime,
+        file_validators: dict,
     ) -> None:
         query_filter = {"link": file_link}
-        query_values = {"$set": {"hash": file_hash, "import_date": import_date}}
+        query_values = {
+            "$set": {"hash": file_hash, "import_date": import_date, **file_validators}
+        }
 
         self.__HISTORICAL_FILES_COLLECTION.update_one(query_filter, query_values)
 
@@ -87,48 +148,107 @@ class UAExchangeRatesCrawlerDB:
 
         return self.__HISTORICAL_FILES_COLLECTION.find_one(query_filter, query_fields)
 
+    def historical_files(self, links: list) -> dict:
+        query_filter = {"link": {"$in": links}}
+        query_fields = {"_id": 0}
+
+        historical_files = {}
+
+        for historical_file in self.__HISTORICAL_FILES_COLLECTION.find(
+            query_filter, query_fields
+        ):
+            historical_files[historical_file.pop("link")] = historical_file
+
+        return historical_files
+
     def get_currency_rates(
         self,
         currency_code: str,
         import_date: datetime.datetime | None,
         start_date: datetime.datetime,
         end_date: datetime.datetime,
-    ):
+        after_date: datetime.datetime | None = None,
+        limit: int | None = None,
+    ) -> list:
+        """
+        Returns rates of a currency on dates within the period given,
+        ordered by dates. To read them page by page, pass the date
+        of the last rate of the previous page & the size of a page.
+        """
 
-        matching_stage = {"$match": {"currency_code": {"$eq": currency_code.upper()}}}
+        return list(
+            self.iterate_currency_rates(
+                currency_code, import_date, start_date, end_date, after_date, limit
+            )
+        )
 
-        last_import_date = self.get_last_import_date()
+    def iterate_currency_rates(
+        self,
+        currency_code: str,
+        import_date: datetime.datetime | None,
+        start_date: datetime.datetime,
+        end_date: datetime.datetime,
+        after_date: datetime.datetime | None = None,
+        limit: int | None = None,
+    ) -> Iterator[dict]:
+        """
+        Yields the same rates as get_currency_rates() does, but one by one
+        as they are read from a cursor, so they are never kept in memory
+        at once.
+        """
 
-        if last_import_date is not None or import_date is not None:
-            matching_stage["$match"]["import_date"] = {}
+        # Latest rates are kept up to date by crawlers, so the aggregation
+        # over all revisions is needed for rates imported after a date only.
 
-        if last_import_date is not None:
-            matching_stage["$match"]["import_date"].update({"$lte": last_import_date})
+        if import_date is None:
+            yield from self.__get_latest_rates(
+                currency_code, start_date, end_date, after_date, limit
+            )
+            return
 
-        if import_date is not None:
-            matching_stage["$match"]["import_date"].update({"$gt": import_date})
+        stages = self.__get_currency_rates_stages(
+            currency_code, import_date, start_date, end_date, after_date, limit
+        )
 
-        if start_date is not None or end_date is not None:
+        cursor = self.__CURRENCY_RATES_COLLECTION.aggregate(stages)
 
-            matching_stage["$match"]["rate_date"] = {}
+        for group in cursor:
+            yield queries.get_currency_rate_from_group(group)
 
-            if start_date is not None:
-                matching_stage["$match"]["rate_date"]["$gte"] = start_date
+    def get_currencies_rates(
+        self,
+        currency_codes: list,
+        import_date: datetime.datetime | None,
+        start_date: datetime.datetime,
+        end_date: datetime.datetime,
+    ) -> list:
 
-            if end_date is not None:
-                matching_stage["$match"]["rate_date"]["$lte"] = end_date
+        if import_date is None:
 
-        grouping_stage = {
-            "$group": {
-                "_id": "$rate_date",
-                "import_date": {
-                    "$max": {"import_date": "$import_date", "rate": "$rate"}
-                },
+            query_filter = queries.get_latest_rates_filter(
+                currency_codes, start_date, end_date
+            )
+            query_fields = {
+                "_id": 0,
+                "currency_code": 1,
+                "import_date": 1,
+                "rate_date": 1,
+                "rate": 1,
             }
-        }
-        sorting_stage = {"$sort": {"_id": 1}}
+            query_sort = [
+                ("currency_code", pymongo.ASCENDING),
+                ("rate_date", pymongo.ASCENDING),
+            ]
+
+            cursor = self.__LATEST_RATES_COLLECTION.find(
+                query_filter, query_fields, sort=query_sort
+            )
 
-        stages = [matching_stage, grouping_stage, sorting_stage]
+            return list(cursor)
+
+        stages = self.__get_currencies_rates_stages(
+            currency_codes, import_date, start_date, end_date
+        )
 
         rates = []
 
@@ -137,48 +257,551 @@ class UAExchangeRatesCrawlerDB:
         for rate in cursor:
             rates.append(
                 {
+                    "currency_code": rate["_id"]["currency_code"],
                     "import_date": rate["import_date"]["import_date"],
-                    "rate_date": rate["_id"],
+                    "rate_date": rate["_id"]["rate_date"],
                     "rate": rate["import_date"]["rate"],
                 }
             )
 
         return rates
 
-    def currency_rate_on_date(
-        self, currency_code: str, date: datetime.datetime
+    def __get_latest_rates(
+        self,
+        currency_code: str,
+        start_date: datetime.datetime,
+        end_date: datetime.datetime,
+        after_date: datetime.datetime | None,
+        limit: int | None,
+    ) -> pymongo.cursor.Cursor:
+
+        query_filter = queries.get_latest_rates_filter(
+            [currency_code], start_date, end_date, after_date
+        )
+        query_fields = {"_id": 0, "import_date": 1, "rate_date": 1, "rate": 1}
+
+        return self.__LATEST_RATES_COLLECTION.find(
+            query_filter,
+            query_fields,
+            sort=[("rate_date", pymongo.ASCENDING)],
+            limit=limit or 0,
+        )
+
+    def update_latest_rates(self, import_date: datetime.datetime) -> None:
+        """
+        Makes revisions of rates, which become visible once an import with
+        the given date is completed, the latest ones for their currencies
+        & dates (unless later revisions are the latest ones already, e.g.
+        written by an overlapping crawler). It takes revisions written since
+        the previous update, including ones of imports which have never been
+        completed (e.g. because a crawler has crashed).
+        """
+
+        last_import_date = self.get_last_import_date()
+
+        if last_import_date is None or last_import_date < import_date:
+            last_import_date = import_date
+
+        counter = self.__COUNTERS_COLLECTION.find_one(
+            {"_id": self.__LATEST_RATES_COUNTER_ID}
+        )
+        first_sequence_number = 0 if counter is None else counter["value"] + 1
+
+        # Rates are numbered & inserted under a lock (see insert_currency_rates),
+        # so rates written later than the last one found get greater numbers.
+
+        last_rate = self.__CURRENCY_RATES_COLLECTION.find_one(
+            {"sequence_number": {"$gte": first_sequence_number}},
+            {"_id": 0, "sequence_number": 1},
+            sort=[("sequence_number", pymongo.DESCENDING)],
+        )
+
+        if last_rate is None:
+            return
+
+        sequence_numbers_filter = {
+            "$gte": first_sequence_number,
+            "$lte": last_rate["sequence_number"],
+        }
+
+        self.__CURRENCY_RATES_COLLECTION.aggregate(
+            self.__get_latest_rates_stages(
+                {
+                    "sequence_number": sequence_numbers_filter,
+                    "import_date": {"$lte": last_import_date},
+                },
+                when_matched=self.__get_latest_rates_updating_stages(),
+            )
+        )
+
+        # Rates of a later import, which is still in progress, are left
+        # for the update completing it.
+
+        first_invisible_rate = self.__CURRENCY_RATES_COLLECTION.find_one(
+            {
+                "sequence_number": sequence_numbers_filter,
+                "import_date": {"$gt": last_import_date},
+            },
+            {"_id": 0, "sequence_number": 1},
+            sort=[("sequence_number", pymongo.ASCENDING)],
+        )
+
+        if first_invisible_rate is None:
+            last_sequence_number = last_rate["sequence_number"]
+        else:
+            last_sequence_number = first_invisible_rate["sequence_number"] - 1
+
+        self.__COUNTERS_COLLECTION.update_one(
+            {"_id": self.__LATEST_RATES_COUNTER_ID},
+            {"$max": {"value": last_sequence_number}},
+            upsert=True,
+        )
+
+    @staticmethod
+    def __get_latest_rates_updating_stages() -> list:
+        """
+        Returns stages which replace a latest rate with a new one only if
+        the new one is later: by import date, and then by value (the same
+        way revisions are grouped).
+        """
+
+        new_rate_is_later = {
+            "$lt": [
+                {"import_date": "$import_date", "rate": "$rate"},
+                {"import_date": "$$new.import_date", "rate": "$$new.rate"},
+            ]
+        }
+
+        return [
+            {
+                "$set": {
+                    "import_date": {
+                        "$cond": [
+                            new_rate_is_later,
+                            "$$new.import_date",
+                            "$import_date",
+                        ]
+                    },
+                    "rate": {"$cond": [new_rate_is_later, "$$new.rate", "$rate"]},
+                }
+            }
+        ]
+
+    def rebuild_latest_rates(self) -> None:
+        """
+        Fills latest rates in using all revisions of rates imported
+        until the last completed import (e.g. for rates imported
+        before latest rates have been introduced).
+        """
+
+        query_filter = {}
+
+        last_import_date = self.get_last_import_date()
+
+        if last_import_date is not None:
+            query_filter["import_date"] = {"$lte": last_import_date}
+
+        self.__CURRENCY_RATES_COLLECTION.aggregate(
+            self.__get_latest_rates_stages(query_filter, when_matched="replace")
+        )
+
+    def __get_latest_rates_stages(
+        self, query_filter: dict, when_matched: str | list
+    ) -> list:
+        """
+        Returns stages which pick the latest revision of each rate matching
+        the filter and merge it into latest rates.
+        """
+
+        matching_stage = {"$match": query_filter}
+
+        grouping_stage = {
+            "$group": {
+                "_id": {"currency_code": "$currency_code", "rate_date": "$rate_date"},
+                "import_date": {
+                    "$max": {"import_date": "$import_date", "rate": "$rate"}
+                },
+            }
+        }
+
+        projection_stage = {
+            "$project": {
+                "_id": 0,
+                "currency_code": "$_id.currency_code",
+                "rate_date": "$_id.rate_date",
+                "import_date": "$import_date.import_date",
+                "rate": "$import_date.rate",
+            }
+        }
+
+        merging_stage = {
+            "$merge": {
+                "into": self.__LATEST_RATES_COLLECTION.name,
+                "on": ["currency_code", "rate_date"],
+                "whenMatched": when_matched,
+                "whenNotMatched": "insert",
+            }
+        }
+
+        return [matching_stage, grouping_stage, projection_stage, merging_stage]
+
+    def __get_currency_rates_stages(
+        self,
+        currency_code: str,
+        import_date: datetime.datetime | None,
+        start_date: datetime.datetime,
+        end_date: datetime.datetime,
+        after_date: datetime.datetime | None = None,
+        limit: int | None = None,
+    ) -> list:
+
+        return queries.get_currency_rates_stages(
+            currency_code,
+            import_date,
+            start_date,
+            end_date,
+            self.get_last_import_date(),
+            after_date,
+            limit,
+        )
+
+    def __get_currencies_rates_stages(
+        self,
+        currency_codes: list,
+        import_date: datetime.datetime | None,
+        start_date: datetime.datetime,
+        end_date: datetime.datetime,
+    ) -> list:
+
+        return queries.get_currencies_rates_stages(
+            currency_codes,
+            import_date,
+            start_date,
+            end_date,
+            self.get_last_import_date(),
+        )
+
+    def get_imported_currency_rates(
+        self,
+        currency_codes: list,
+        start_date: datetime.datetime,
+        end_date: datetime.datetime,
+    ) -> list:
+
+        query_filter = self.__get_imported_currency_rates_filter(
+            currency_codes, start_date, end_date
+        )
+        query_fields = {
+            "_id": 0,
+            "currency_code": 1,
+            "rate_date": 1,
+            "import_date": 1,
+            "rate": 1,
+        }
+
+        return list(self.__CURRENCY_RATES_COLLECTION.find(query_filter, query_fields))
+
+    @staticmethod
+    def __get_imported_currency_rates_filter(
+        currency_codes: list,
+        start_date: datetime.datetime,
+        end_date: datetime.datetime,
     ) -> dict:
-        rates = self.get_currency_rates(
-            currency_code, import_date=None, start_date=date, end_date=date
+
+        return {
+            "currency_code": {"$in": currency_codes},
+            "rate_date": {"$gte": start_date, "$lte": end_date},
+        }
+
+    def insert_currency_rates(self, rates: list):
+        if len(rates) > 0:
+
+            with self.__sequence_numbers_lock(self.__CURRENCY_RATES_COLLECTION):
+
+                first_sequence_number = self.__reserve_sequence_numbers(
+                    self.__CURRENCY_RATES_COLLECTION, len(rates)
+                )
+
+                for sequence_number, rate in enumerate(rates, first_sequence_number):
+                    rate["sequence_number"] = sequence_number
+
+                self.__CURRENCY_RATES_COLLECTION.insert_many(rates)
+
+    @contextlib.contextmanager
+    def __sequence_numbers_lock(self, collection: pymongo.collection.Collection):
+        """
+        Lets one process at a time reserve sequence numbers of documents
+        of the collection & write the documents, so a document is never
+        written after one with a greater number (otherwise a client, which
+        has got the latter, would skip the former). The lock expires after
+        a while in case a process holding it has crashed (a live process
+        renews it until it is released).
+        """
+
+        lock_id = f"{collection.name}_lock"
+        owner = ObjectId()
+
+        while True:
+
+            try:
+
+                # If the lock is held (and hasn't expired), the filter doesn't
+                # match it, so the upsert fails with a duplicate _id. Leases
+                # are compared with the server's clock, since clocks of hosts
+                # crawlers run on may differ.
+
+                self.__COUNTERS_COLLECTION.update_one(
+                    {
+                        "_id": lock_id,
+                        "$expr": {"$lt": ["$expiration_date", "$$NOW"]},
+                    },
+                    self.__get_sequence_numbers_lock_stages(owner),
+                    upsert=True,
+                )
+
+                break
+
+            except pymongo.errors.DuplicateKeyError:
+                time.sleep(self.__SEQUENCE_NUMBERS_LOCK_RETRY_DELAY)
+
+        # The lease is renewed while the lock is held, so a process writing
+        # a lot of documents (or waiting for a slow server) doesn't lose it.
+
+        released = threading.Event()
+        renewal = threading.Thread(
+            target=self.__renew_sequence_numbers_lock,
+            args=(lock_id, owner, released),
+            name=lock_id,
+            daemon=True,
         )
+        renewal.start()
 
-        if len(rates) == 0:
-            return {
-                "currency_code": currency_code,
-                "import_date": None,
-                "rate_date": date,
-                "rate": 0,
+        try:
+            yield
+        finally:
+            released.set()
+            renewal.join()
+
+            self.__COUNTERS_COLLECTION.delete_one({"_id": lock_id, "owner": owner})
+
+    def __get_sequence_numbers_lock_stages(self, owner: ObjectId) -> list:
+
+        lifespan = self.__SEQUENCE_NUMBERS_LOCK_LIFESPAN * 1000
+
+        return [
+            {
+                "$set": {
+                    "owner": owner,
+                    "expiration_date": {"$add": ["$$NOW", lifespan]},
+                }
             }
-        else:
-            return rates[0]
+        ]
+
+    def __renew_sequence_numbers_lock(
+        self, lock_id: str, owner: ObjectId, released: threading.Event
+    ) -> None:
+
+        while not released.wait(self.__SEQUENCE_NUMBERS_LOCK_LIFESPAN / 3):
+
+            try:
+
+                result = self.__COUNTERS_COLLECTION.update_one(
+                    {"_id": lock_id, "owner": owner},
+                    self.__get_sequence_numbers_lock_stages(owner),
+                )
+
+            except pymongo.errors.PyMongoError:
+
+                # The lease is renewed by the next attempt (before it expires,
+                # unless the server is unavailable for a while).
+
+                continue
+
+            if result.matched_count == 0:
+                return
+
+    def __reserve_sequence_numbers(
+        self, collection: pymongo.collection.Collection, count: int
+    ) -> int:
+        """
+        Reserves a range of sequence numbers of documents of the collection
+        (each rate or notification gets one when it is inserted, so they show
+        the order documents are inserted in).
 
-    def rate_is_new_or_changed(self, rate: dict) -> bool:
+        :return: the first number of the range
+        """
 
-        query = {
-            "$and": [
-                {"currency_code": {"$eq": rate["currency_code"]}},
-                {"rate_date": {"$eq": rate["rate_date"]}},
-                {"rate": {"$eq": rate["rate"]}},
+        counter = self.__COUNTERS_COLLECTION.find_one_and_update(
+            {"_id": collection.name},
+            {"$inc": {"value": count}},
+            upsert=True,
+            return_document=pymongo.ReturnDocument.AFTER,
+        )
+
+        return counter["value"] - count + 1
+
+    def backfill_sequence_numbers(self, batch_size: int = 10000) -> int:
+        """
+        Numbers rates inserted before sequence numbers have been introduced,
+        in the order they have been imported.
+
+        :return: the number of rates numbered
+        """
+
+        rates_number = 0
+
+        query_filter = {"sequence_number": {"$exists": False}}
+        query_sort = [("import_date", pymongo.ASCENDING), ("_id", pymongo.ASCENDING)]
+
+        while True:
+
+            rates_ids = [
+                rate["_id"]
+                for rate in self.__CURRENCY_RATES_COLLECTION.find(
+                    query_filter, {"_id": 1}, sort=query_sort, limit=batch_size
+                )
             ]
+
+            if len(rates_ids) == 0:
+                break
+
+            with self.__sequence_numbers_lock(self.__CURRENCY_RATES_COLLECTION):
+
+                first_sequence_number = self.__reserve_sequence_numbers(
+                    self.__CURRENCY_RATES_COLLECTION, len(rates_ids)
+                )
+
+                requests = [
+                    pymongo.UpdateOne(
+                        {"_id": rate_id},
+                        {"$set": {"sequence_number": sequence_number}},
+                    )
+                    for sequence_number, rate_id in enumerate(
+                        rates_ids, first_sequence_number
+                    )
+                ]
+
+                self.__CURRENCY_RATES_COLLECTION.bulk_write(requests)
+
+            rates_number += len(rates_ids)
+
+        return rates_number
+
+    def get_currency_rates_changes(
+        self, sequence_number: int, changes_number: int
+    ) -> list:
+        """
+        Returns rates (of all currencies) inserted after a rate with the given
+        sequence number, in the order they have been inserted. Rates of
+        an import which is not completed yet are not returned, and neither
+        are rates inserted after them, so no rate is ever skipped by a client
+        which asks for changes after the last one it has got (rates get
+        their numbers & are inserted under a lock for the same reason).
+        """
+
+        last_import_date = self.get_last_import_date()
+
+        if last_import_date is None:
+            return []
+
+        query_filter = {"sequence_number": {"$gt": sequence_number}}
+        query_fields = {
+            "_id": 0,
+            "sequence_number": 1,
+            "currency_code": 1,
+            "import_date": 1,
+            "rate_date": 1,
+            "rate": 1,
         }
 
-        return self.__CURRENCY_RATES_COLLECTION.count_documents(query) == 0
+        cursor = self.__CURRENCY_RATES_COLLECTION.find(
+            query_filter,
+            query_fields,
+            sort=[("sequence_number", pymongo.ASCENDING)],
+            limit=changes_number,
+        )
+
+        changes = []
+
+        for rate in cursor:
+
+            if rate["import_date"] > last_import_date:
+                break
+
+            changes.append(rate)
 
-    def insert_currency_rate(self, rate):
-        self.__CURRENCY_RATES_COLLECTION.insert_one(rate)
+        return changes
+
+    def create_notifications_collection(self, size: int) -> None:
+        """
+        Creates the collection of notifications about imports as a capped
+        one of the given size (in bytes): MongoDB removes the oldest
+        notifications once it is exceeded, and the collection can be tailed
+        (see iterate_notifications).
+        """
+
+        collection_name = self.__NOTIFICATIONS_COLLECTION.name
+
+        if collection_name not in self.__DATABASE.list_collection_names(
+            filter={"name": collection_name}
+        ):
+            self.__DATABASE.create_collection(collection_name, capped=True, size=size)
+
+        elif not self.__NOTIFICATIONS_COLLECTION.options().get("capped", False):
+            self.__DATABASE.command("convertToCapped", collection_name, size=size)
+
+    def insert_notification(self, import_date: datetime.datetime, rates: list):
+        """
+        Notifies the REST service about an import of rates.
+
+        :param import_date: the date of the import
+        :param rates: currency codes & rate dates of imported rates (tuples)
+        """
+
+        with self.__sequence_numbers_lock(self.__NOTIFICATIONS_COLLECTION):
+
+            self.__NOTIFICATIONS_COLLECTION.insert_one(
+                {
+                    "_id": self.__reserve_sequence_numbers(
+                        self.__NOTIFICATIONS_COLLECTION, 1
+                    ),
+                    "import_date": import_date,
+                    "rates": [
+                        {"currency_code": currency_code, "rate_date": rate_date}
+                        for currency_code, rate_date in rates
+                    ],
+                }
+            )
+
+    def get_last_notification_sequence_number(self) -> int:
+
+        notification = self.__NOTIFICATIONS_COLLECTION.find_one(
+            {}, {"_id": 1}, sort=[("_id", pymongo.DESCENDING)]
+        )
+
+        return 0 if notification is None else notification["_id"]
+
+    def iterate_notifications(
+        self, sequence_number: int, max_await_time: int
+    ) -> Iterator[dict]:
+        """
+        Yields notifications inserted after one with the given sequence
+        number, and then waits for new ones (for up to max_await_time
+        seconds per round trip) while the cursor is alive. The cursor dies
+        if the collection is empty or is not a capped one.
+        """
+
+        cursor = self.__NOTIFICATIONS_COLLECTION.find(
+            {"_id": {"$gt": sequence_number}},
+            cursor_type=pymongo.CursorType.TAILABLE_AWAIT,
+        ).max_await_time_ms(max_await_time * 1000)
+
+        while cursor.alive:
+            yield from cursor
 
     def insert_import_date(self, date):
         self.__IMPORT_DATES_COLLECTION.insert_one({"date": date})
+        self.__last_import_date_cache = None
 
     def insert_event_rates_updating(
         self,
@@ -189,7 +812,7 @@ class UAExchangeRatesCrawlerDB:
         rate_current: str,
     ):
 
-        self.__EVENTS_COLLECTION.insert_one(
+        self.__insert_event(
             {
                 "event_name": event.value,
                 "event_date": datetime.datetime.now(),
@@ -204,7 +827,7 @@ class UAExchangeRatesCrawlerDB:
         self, currency_code: str, rate_date: datetime.datetime, rate: str
     ):
 
-        self.__EVENTS_COLLECTION.insert_one(
+        self.__insert_event(
             {
                 "event_name": Event.CURRENT_RATES_AVAILABILITY.value,
                 "event_date": datetime.datetime.now(),
@@ -216,13 +839,83 @@ class UAExchangeRatesCrawlerDB:
 
     def insert_event_rates_loading(self, event: Event):
 
-        self.__EVENTS_COLLECTION.insert_one(
+        self.__insert_event(
             {
                 "event_name": event.value,
                 "event_date": datetime.datetime.now(),
             }
         )
 
+    @contextlib.contextmanager
+    def buffered_events(self):
+        """
+        Collects events inserted within the block and writes them
+        with a single query when the block is left (even if it is left
+        because of an exception).
+        """
+
+        if self.__events_buffer is not None:
+            yield
+            return
+
+        self.__events_buffer = []
+
+        try:
+            yield
+        finally:
+            self.flush_events()
+            self.__events_buffer = None
+
+    def flush_events(self) -> None:
+
+        if not self.__events_buffer:
+            return
+
+        events = self.__events_buffer
+        self.__events_buffer = []
+
+        events_collection = self.__EVENTS_COLLECTION.with_options(
+            write_concern=WriteConcern(w=1)
+        )
+        events_collection.insert_many(events, ordered=False)
+
+    def __insert_event(self, event: dict) -> None:
+
+        if self.__events_buffer is None:
+            self.__EVENTS_COLLECTION.insert_one(event)
+        else:
+            self.__events_buffer.append(event)
+
+    def get_cached_response(self, key: str) -> bytes | None:
+        """
+        Returns a response cached by any process of the REST service
+        (None if there is no such response or it has expired).
+        """
+
+        query_filter = {
+            "_id": key,
+            "expiration_date": {"$gt": datetime.datetime.now()},
+        }
+
+        cached_response = self.__RESPONSE_CACHE_COLLECTION.find_one(
+            query_filter, {"_id": 0, "response": 1}
+        )
+
+        return None if cached_response is None else cached_response["response"]
+
+    def set_cached_response(
+        self, key: str, response: bytes, expiration_date: datetime.datetime
+    ) -> None:
+
+        # Expired responses are deleted by MongoDB itself (see the TTL index
+        # on the expiration date).
+
+        self.__RESPONSE_CACHE_COLLECTION.replace_one(
+            {"_id": key},
+            {"response": response, "expiration_date": expiration_date},
+            upsert=True,
+        )
+
     def get_last_event(self, event: Event):
 
         query_filter = {"event_name": event.value}
@@ -231,3 +924,196 @@ class UAExchangeRatesCrawlerDB:
         return self.__EVENTS_COLLECTION.find_one(
             query_filter, query_fields, sort=[("event_date", -1)]
         )
+
+    def get_last_events_by_currencies(self, event: Event) -> dict:
+
+        stages = queries.get_last_events_by_currencies_stages(event.value)
+
+        events = {}
+
+        for record in self.__EVENTS_COLLECTION.aggregate(stages):
+            events[record["_id"]] = {"event_date": record["event_date"]}
+
+        return events
+
+    def create_indexes(self) -> None:
+        """
+        Creates indexes the application's queries rely on. Indexes which
+        already exist are left as they are, so it is safe to call it
+        every time the application is being deployed.
+        """
+
+        for collection, keys, options in self.__get_indexes():
+            collection.create_index(keys, **options)
+
+    def create_latest_rates_index(self) -> None:
+        """
+        Creates the unique index of latest rates, which updates of latest
+        rates rely on (see update_latest_rates), unless it already exists.
+        Crawlers create it themselves, so imports complete even before
+        migrate.py has been run against the database.
+        """
+
+        for collection, keys, options in self.__get_indexes():
+            if collection.name == self.__LATEST_RATES_COLLECTION.name:
+                collection.create_index(keys, **options)
+
+    def __get_indexes(self) -> list:
+
+        return [
+            (
+                self.__LATEST_RATES_COLLECTION,
+                [
+                    ("currency_code", pymongo.ASCENDING),
+                    ("rate_date", pymongo.ASCENDING),
+                ],
+                {"unique": True},
+            ),
+            (
+                self.__CURRENCY_RATES_COLLECTION,
+                [
+                    ("currency_code", pymongo.ASCENDING),
+                    ("rate_date", pymongo.ASCENDING),
+                    ("import_date", pymongo.ASCENDING),
+                ],
+                {},
+            ),
+            (
+                self.__EVENTS_COLLECTION,
+                [
+                    ("event_name", pymongo.ASCENDING),
+                    ("event_date", pymongo.DESCENDING),
+                ],
+                {},
+            ),
+            (
+                self.__EVENTS_COLLECTION,
+                [
+                    ("event_name", pymongo.ASCENDING),
+                    ("currency_code", pymongo.ASCENDING),
+                    ("event_date", pymongo.DESCENDING),
+                ],
+                {},
+            ),
+            (
+                self.__HISTORICAL_FILES_COLLECTION,
+                [
+                    ("link", pymongo.ASCENDING),
+                ],
+                {},
+            ),
+            (
+                self.__CURRENCY_RATES_COLLECTION,
+                [
+                    ("sequence_number", pymongo.ASCENDING),
+                ],
+                {
+                    "unique": True,
+                    "partialFilterExpression": {"sequence_number": {"$exists": True}},
+                },
+            ),
+            (
+                self.__RESPONSE_CACHE_COLLECTION,
+                [
+                    ("expiration_date", pymongo.ASCENDING),
+                ],
+                {"expireAfterSeconds": 0},
+            ),
+            (
+                self.__IMPORT_DATES_COLLECTION,
+                [
+                    ("date", pymongo.DESCENDING),
+                ],
+                {},
+            ),
+        ]
+
+    def get_collection_scans(self) -> list:
+        """
+        Explains each query the application makes and returns titles
+        of those which still fall back to a collection scan.
+        """
+
+        collection_scans = []
+
+        for title, explanation in self.__get_query_explanations().items():
+
+            if "COLLSCAN" in self.__get_plan_stages(explanation):
+                collection_scans.append(title)
+
+        return collection_scans
+
+    def __get_query_explanations(self) -> dict:
+
+        now = datetime.datetime.now()
+
+        return {
+            "last import date": self.__IMPORT_DATES_COLLECTION.find(
+                {}, sort=[("date", pymongo.DESCENDING)], limit=1
+            ).explain(),
+            "historical file": self.__HISTORICAL_FILES_COLLECTION.find(
+                {"link": ""}
+            ).explain(),
+            "currency rates": self.__explain_aggregation(
+                self.__CURRENCY_RATES_COLLECTION,
+                self.__get_currency_rates_stages(
+                    "USD", import_date=now, start_date=now, end_date=now
+                ),
+            ),
+            "currencies rates": self.__explain_aggregation(
+                self.__CURRENCY_RATES_COLLECTION,
+                self.__get_currencies_rates_stages(
+                    ["USD", "EUR"], import_date=now, start_date=now, end_date=now
+                ),
+            ),
+            "latest rates": self.__LATEST_RATES_COLLECTION.find(
+                queries.get_latest_rates_filter(["USD"], now, now)
+            ).explain(),
+            "currency rates changes": self.__CURRENCY_RATES_COLLECTION.find(
+                {"sequence_number": {"$gt": 0}},
+                sort=[("sequence_number", pymongo.ASCENDING)],
+                limit=1,
+            ).explain(),
+            "imported currency rates": self.__CURRENCY_RATES_COLLECTION.find(
+                self.__get_imported_currency_rates_filter(["USD"], now, now)
+            ).explain(),
+            "last event": self.__EVENTS_COLLECTION.find(
+                {"event_name": Event.NONE.value}, sort=[("event_date", -1)], limit=1
+            ).explain(),
+            "last events by currencies": self.__explain_aggregation(
+                self.__EVENTS_COLLECTION,
+                queries.get_last_events_by_currencies_stages(Event.NONE.value),
+            ),
+        }
+
+    def __explain_aggregation(
+        self, collection: pymongo.collection.Collection, stages: list
+    ) -> dict:
+
+        command = {"aggregate": collection.name, "pipeline": stages, "cursor": {}}
+
+        return self.__DATABASE.command("explain", command, verbosity="queryPlanner")
+
+    @staticmethod
+    def __get_plan_stages(explanation: dict | list) -> set:
+
+        stages = set()
+
+        if isinstance(explanation, dict):
+
+            for key, value in explanation.items():
+
+                if key == "rejectedPlans":
+                    continue
+
+                if key == "stage":
+                    stages.add(value)
+                else:
+                    stages.update(UAExchangeRatesCrawlerDB.__get_plan_stages(value))
+
+        elif isinstance(explanation, list):
+
+            for value in explanation:
+                stages.update(UAExchangeRatesCrawlerDB.__get_plan_stages(value))
+
+        return stages
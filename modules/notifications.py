@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+
+"""
+Notifications about imports of rates for clients of the REST service, which
+wait for them (long polling) instead of requesting rates on a schedule.
+A crawler inserts a notification into a capped collection when it completes
+an import; each process of the service tails the collection in a background
+thread and wakes up requests waiting for a notification, either in threads
+(the Flask app) or in event loops (the ASGI app).
+"""
+
+import asyncio
+import collections
+import contextlib
+import logging
+import threading
+import time
+
+import pymongo.errors
+
+from modules.db import UAExchangeRatesCrawlerDB
+
+# How many of the latest notifications each process keeps in memory,
+# so clients which fall behind a bit get all of them.
+
+NOTIFICATIONS_HISTORY_SIZE = 100
+
+# How long (in seconds) a background thread waits for new notifications
+# per query, and then before it tails the collection again if it is empty
+# or unavailable.
+
+TAILING_MAX_AWAIT_TIME = 10
+TAILING_RETRY_DELAY = 5
+
+
+class NotificationBroker:
+    """
+    Keeps the latest notifications and wakes up threads waiting for new ones.
+    Notifications are published either by a thread tailing the database
+    (see subscribe) or directly (see publish).
+    """
+
+    _notifications: collections.deque
+    _condition: threading.Condition
+    _last_sequence_number: int
+    _thread: threading.Thread | None
+    _async_waiters: set
+
+    def __init__(self, history_size: int = NOTIFICATIONS_HISTORY_SIZE) -> None:
+
+        self._notifications = collections.deque(maxlen=history_size)
+        self._condition = threading.Condition()
+        self._last_sequence_number = 0
+        self._thread = None
+        self._async_waiters = set()
+
+    def publish(self, notification: dict) -> None:
+
+        with self._condition:
+
+            if notification["_id"] <= self._last_sequence_number:
+                return
+
+            self._notifications.append(notification)
+            self._last_sequence_number = notification["_id"]
+
+            self._condition.notify_all()
+
+            # Events of coroutines are set by their own event loops, since
+            # notifications are published by another thread.
+
+            for loop, event in self._async_waiters:
+                loop.call_soon_threadsafe(event.set)
+
+    def wait(self, sequence_number: int, timeout: float) -> list:
+        """
+        Returns notifications published after one with the given sequence
+        number, waiting for up to timeout seconds if there are none yet
+        (an empty list is returned if there are still none).
+        """
+
+        with self._condition:
+
+            self._condition.wait_for(
+                lambda: self._last_sequence_number > sequence_number, timeout
+            )
+
+            return self._get_notifications_after(sequence_number)
+
+    async def wait_async(self, sequence_number: int, timeout: float) -> list:
+        """
+        Does the same wait does, but waits in the event loop, so a waiting
+        request holds no thread.
+        """
+
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+
+        with self._condition:
+
+            if self._last_sequence_number > sequence_number:
+                return self._get_notifications_after(sequence_number)
+
+            self._async_waiters.add(waiter)
+
+        try:
+
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(waiter[1].wait(), timeout)
+
+        finally:
+
+            with self._condition:
+                self._async_waiters.discard(waiter)
+
+        with self._condition:
+            return self._get_notifications_after(sequence_number)
+
+    def _get_notifications_after(self, sequence_number: int) -> list:
+
+        return [
+            notification
+            for notification in self._notifications
+            if notification["_id"] > sequence_number
+        ]
+
+    def subscribe(self, db: UAExchangeRatesCrawlerDB) -> None:
+        """
+        Starts a background thread which publishes notifications inserted
+        into the database (unless it has been started before).
+        """
+
+        with self._condition:
+
+            if self._thread is not None:
+                return
+
+            self._thread = threading.Thread(
+                target=self._tail, args=(db,), name="notifications", daemon=True
+            )
+            self._thread.start()
+
+    def _tail(self, db: UAExchangeRatesCrawlerDB) -> None:
+
+        while True:
+
+            try:
+
+                for notification in db.iterate_notifications(
+                    self._last_sequence_number, TAILING_MAX_AWAIT_TIME
+                ):
+                    self.publish(notification)
+
+            except pymongo.errors.PyMongoError as error:
+
+                logging.warning("Unable to read notifications: %s", error)
+
+            time.sleep(TAILING_RETRY_DELAY)
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+
+"""
+Parsers of pages with current exchange rates. Each parser takes a text
+of a page the bank returns and yields pairs of a currency title & its rate
+(as they are written in the page).
+
+Rates are written in <td> cells: a cell with a title of a currency is
+followed by a cell with its rate, and empty cells are skipped.
+"""
+
+import html.parser
+import logging
+from typing import Iterator
+
+from bs4 import BeautifulSoup
+
+ROW_CLOSING_TAGS = ("tr", "thead", "tbody", "tfoot", "table")
+
+
+class RatesHTMLParser(html.parser.HTMLParser):
+    """
+    Streaming parser, which collects pairs of a currency title & its rate
+    as soon as a <td> cell is closed, without building a tree of a page.
+    """
+
+    def __init__(self):
+
+        super().__init__()
+
+        self.rates = []
+
+        self._cell_depth = 0
+        self._cell_text = []
+        self._currency_title = None
+
+    def handle_starttag(self, tag, attrs):
+
+        if tag == "td":
+            self._cell_depth += 1
+
+    def handle_endtag(self, tag):
+
+        if self._cell_depth == 0:
+            return
+
+        # The end of a row closes its cells, even if their end tags
+        # are missing (the same way tree builders do it).
+
+        if tag in ROW_CLOSING_TAGS:
+            self._cell_depth = 0
+        elif tag == "td":
+            self._cell_depth -= 1
+        else:
+            return
+
+        if self._cell_depth == 0:
+            self._handle_cell_text("".join(self._cell_text))
+            self._cell_text = []
+
+    def handle_data(self, data):
+
+        if self._cell_depth > 0:
+            self._cell_text.append(data)
+
+    def _handle_cell_text(self, text: str) -> None:
+
+        pair = pair_cell_text(text, self._currency_title)
+
+        if pair is None:
+            return
+
+        self._currency_title, currency_rate = pair
+
+        if currency_rate is not None:
+            self.rates.append((self._currency_title, currency_rate))
+            self._currency_title = None
+
+
+def pair_cell_text(text: str, currency_title: str | None) -> tuple | None:
+    """
+    Handles a text of the next cell of a page.
+
+    :return: None if the cell is empty, a title of a currency & None
+    if the cell contains a title, or the previous title & a rate
+    if the cell contains a rate
+    """
+
+    # <td class="font-r fs-small text-navy-custom"></td>
+
+    if len(text) == 0:
+        return None
+
+    # <td class="font-r fs-small text-navy-custom">US Dollar</td>
+
+    if not text[0].isdigit():
+        return text, None
+
+    # <td class="font-r fs-small text-navy-custom">3.6725</td>
+
+    return currency_title, text
+
+
+def get_rates_using_html_parser(text: str) -> Iterator[tuple]:
+
+    parser = RatesHTMLParser()
+    parser.feed(text)
+    parser.close()
+
+    return iter(parser.rates)
+
+
+def get_rates_using_beautiful_soup(text: str) -> Iterator[tuple]:
+    """
+    Reference implementation, which builds a tree of a page.
+    """
+
+    soup = BeautifulSoup(text, features="html.parser")
+
+    currency_title = None
+
+    for tag in soup.find_all("td"):
+
+        pair = pair_cell_text(tag.get_text(), currency_title)
+
+        if pair is None:
+            continue
+
+        currency_title, currency_rate = pair
+
+        if currency_rate is not None:
+            yield currency_title, currency_rate
+            currency_title = None
+
+
+RATES_PARSERS = {
+    "html.parser": get_rates_using_html_parser,
+    "beautifulsoup": get_rates_using_beautiful_soup,
+}
+
+
+def get_rates_parser(parser_name: str):
+    """
+    Returns a parser by its name (see RATES_PARSERS), or the default one
+    if there is no such parser.
+    """
+
+    get_rates = RATES_PARSERS.get(parser_name)
+
+    if get_rates is None:
+
+        logging.warning(
+            'Unknown parser of current rates "%s" (current_rates_parser), '
+            "html.parser will be used instead.",
+            parser_name,
+        )
+
+        get_rates = get_rates_using_html_parser
+
+    return get_rates
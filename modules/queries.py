@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+
+"""
+Filters & aggregation pipelines of queries the REST service makes. They are
+shared by the synchronous & the asynchronous database clients, so both
+of them read exactly the same rates.
+"""
+
+import datetime
+
+
+def get_latest_rates_filter(
+    currency_codes: list,
+    start_date: datetime.datetime | None,
+    end_date: datetime.datetime | None,
+    after_date: datetime.datetime | None = None,
+) -> dict:
+
+    currency_codes = [currency_code.upper() for currency_code in currency_codes]
+
+    query_filter = {"currency_code": {"$in": currency_codes}}
+
+    rate_date_filter = get_rate_date_filter(start_date, end_date, after_date)
+
+    if rate_date_filter:
+        query_filter["rate_date"] = rate_date_filter
+
+    return query_filter
+
+
+def get_rate_date_filter(
+    start_date: datetime.datetime | None,
+    end_date: datetime.datetime | None,
+    after_date: datetime.datetime | None,
+) -> dict:
+    """
+    Returns a filter of rate dates within the period given (the start date
+    & the end date are included), which follow the date of the last rate
+    of the previous page (if any).
+    """
+
+    rate_date_filter = {}
+
+    if start_date is not None:
+        rate_date_filter["$gte"] = start_date
+
+    if end_date is not None:
+        rate_date_filter["$lte"] = end_date
+
+    if after_date is not None:
+        rate_date_filter["$gt"] = after_date
+
+    return rate_date_filter
+
+
+def get_currency_rates_stages(
+    currency_code: str,
+    import_date: datetime.datetime | None,
+    start_date: datetime.datetime | None,
+    end_date: datetime.datetime | None,
+    last_import_date: datetime.datetime | None,
+    after_date: datetime.datetime | None = None,
+    limit: int | None = None,
+) -> list:
+
+    matching_stage = get_currency_rates_matching_stage(
+        [currency_code],
+        import_date,
+        start_date,
+        end_date,
+        last_import_date,
+        after_date,
+    )
+
+    grouping_stage = {
+        "$group": {
+            "_id": "$rate_date",
+            "import_date": {"$max": {"import_date": "$import_date", "rate": "$rate"}},
+        }
+    }
+    sorting_stage = {"$sort": {"_id": 1}}
+
+    stages = [matching_stage, grouping_stage, sorting_stage]
+
+    # Revisions of a rate are grouped into one, so rates are limited after
+    # they are grouped: limiting revisions would cut off ones of the last
+    # rate. Still, only revisions after the previous page are read (via
+    # the index), and the sorting keeps only a page of rates in memory.
+
+    if limit is not None:
+        stages.append({"$limit": limit})
+
+    return stages
+
+
+def get_currencies_rates_stages(
+    currency_codes: list,
+    import_date: datetime.datetime | None,
+    start_date: datetime.datetime | None,
+    end_date: datetime.datetime | None,
+    last_import_date: datetime.datetime | None,
+) -> list:
+
+    matching_stage = get_currency_rates_matching_stage(
+        currency_codes, import_date, start_date, end_date, last_import_date
+    )
+
+    grouping_stage = {
+        "$group": {
+            "_id": {"currency_code": "$currency_code", "rate_date": "$rate_date"},
+            "import_date": {"$max": {"import_date": "$import_date", "rate": "$rate"}},
+        }
+    }
+    sorting_stage = {"$sort": {"_id.currency_code": 1, "_id.rate_date": 1}}
+
+    return [matching_stage, grouping_stage, sorting_stage]
+
+
+def get_currency_rates_matching_stage(
+    currency_codes: list,
+    import_date: datetime.datetime | None,
+    start_date: datetime.datetime | None,
+    end_date: datetime.datetime | None,
+    last_import_date: datetime.datetime | None,
+    after_date: datetime.datetime | None = None,
+) -> dict:
+
+    currency_codes = [currency_code.upper() for currency_code in currency_codes]
+
+    matching_stage = {"$match": {"currency_code": {"$in": currency_codes}}}
+
+    if last_import_date is not None or import_date is not None:
+        matching_stage["$match"]["import_date"] = {}
+
+    if last_import_date is not None:
+        matching_stage["$match"]["import_date"].update({"$lte": last_import_date})
+
+    if import_date is not None:
+        matching_stage["$match"]["import_date"].update({"$gt": import_date})
+
+    rate_date_filter = get_rate_date_filter(start_date, end_date, after_date)
+
+    if rate_date_filter:
+        matching_stage["$match"]["rate_date"] = rate_date_filter
+
+    return matching_stage
+
+
+def get_currency_rate_from_group(group: dict) -> dict:
+    """
+    Returns a rate the way it is stored in the database from a group
+    made by get_currency_rates_stages().
+    """
+
+    return {
+        "import_date": group["import_date"]["import_date"],
+        "rate_date": group["_id"],
+        "rate": group["import_date"]["rate"],
+    }
+
+
+def get_last_events_by_currencies_stages(event_name: str) -> list:
+
+    matching_stage = {"$match": {"event_name": event_name}}
+
+    sorting_stage = {"$sort": {"currency_code": 1, "event_date": -1}}
+
+    grouping_stage = {
+        "$group": {
+            "_id": "$currency_code",
+            "event_date": {"$first": "$event_date"},
+        }
+    }
+
+    return [matching_stage, sorting_stage, grouping_stage]
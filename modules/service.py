@@ -0,0 +1,1060 @@
+#!/usr/bin/env python3
+
+"""
+The REST service without a web framework's routing: it validates parameters
+of requests, reads the database & builds responses. It loads only what the
+service needs (the configuration, the database client & a cache),
+so a process of the service is ready to serve requests sooner.
+"""
+
+import base64
+import binascii
+import datetime
+import email.utils
+import hashlib
+import json
+import logging
+import os
+import time
+from typing import Iterator
+
+from modules.cache import LocalResponseCache, SharedResponseCache, get_response_cache
+from modules.config import get_config, setup_logging
+from modules.db import Event, UAExchangeRatesCrawlerDB
+from modules.notifications import NotificationBroker
+
+# Media types of rates which are streamed straight from a database cursor
+# instead of being serialized at once: a JSON document written in chunks,
+# newline-delimited JSON (a rate per line, then the max import date) & CSV.
+
+STREAMING_MIMETYPES = ("application/stream+json", "application/x-ndjson", "text/csv")
+
+# Media types of rates which are serialized at once from columns of values
+# read from a database cursor: MessagePack & Apache Arrow IPC stream.
+
+BINARY_MIMETYPES = ("application/msgpack", "application/vnd.apache.arrow.stream")
+
+RATES_PER_CHUNK = 1000
+
+
+def get_date(date_as_string):
+    year = int(date_as_string[:4])
+    month = int(date_as_string[4:6])
+    day = int(date_as_string[6:8])
+
+    if len(date_as_string) > 8:
+
+        hour = int(date_as_string[8:10])
+        minute = int(date_as_string[10:12])
+        second = int(date_as_string[12:])
+
+    else:
+
+        hour = 0
+        minute = 0
+        second = 0
+
+    return datetime.datetime(year, month, day, hour, minute, second)
+
+
+def get_date_as_string(date: datetime.datetime) -> str:
+    return date.strftime("%Y-%m-%dT%H:%M:%S")
+
+
+def get_limit(limit_as_string: str) -> int:
+    limit = int(limit_as_string)
+
+    if limit <= 0:
+        raise ValueError(f"A limit must be positive: {limit}")
+
+    return limit
+
+
+def get_cursor(rate_date: datetime.datetime) -> str:
+    """
+    Returns a cursor pointing to the rate date given. Clients are supposed
+    to pass it back as it is, so it is encoded to keep them from relying
+    on what it contains.
+    """
+
+    return base64.urlsafe_b64encode(rate_date.strftime("%Y%m%d").encode()).decode()
+
+
+def get_date_using_cursor(cursor: str) -> datetime.datetime:
+    try:
+        date_as_string = base64.urlsafe_b64decode(cursor.encode()).decode()
+    except (binascii.Error, UnicodeError) as error:
+        raise ValueError(f"Unable to decode a cursor: {cursor}") from error
+
+    return get_date(date_as_string)
+
+
+def get_best_mimetype(accept: str | None, mimetypes: tuple, default: str) -> str:
+    """
+    Returns the one of given media types the Accept header prefers the most
+    (the first one of equally preferred ones), or the default one if none
+    of them is acceptable or there is no header. It serves frameworks which
+    don't negotiate content themselves (see api_asgi.py).
+    """
+
+    accepted_ranges = []
+
+    for accepted_range in (accept or "").split(","):
+
+        media_range, *parameters = accepted_range.strip().lower().split(";")
+        quality = 1.0
+
+        for parameter in parameters:
+
+            name, _, value = parameter.strip().partition("=")
+
+            if name == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+
+        if media_range:
+            accepted_ranges.append((media_range, quality))
+
+    best_mimetype = default
+    best_order = (0.0, -1)
+
+    for mimetype in mimetypes:
+
+        mimetype_type = mimetype.split("/")[0]
+
+        # A quality of a media type is set by the most specific range
+        # matching it: "type/subtype", then "type/*", and then "*/*".
+
+        specificities = {"*/*": 0, f"{mimetype_type}/*": 1, mimetype: 2}
+        matching_ranges = [
+            (specificities[media_range], quality)
+            for media_range, quality in accepted_ranges
+            if media_range in specificities
+        ]
+
+        if len(matching_ranges) == 0:
+            continue
+
+        specificity, quality = max(matching_ranges)
+
+        if quality > 0 and (quality, specificity) > best_order:
+            best_mimetype = mimetype
+            best_order = (quality, specificity)
+
+    return best_mimetype
+
+
+def if_none_match_contains(if_none_match: str | None, etag: str) -> bool:
+    """
+    Returns whether the If-None-Match header lists the entity tag (weakly
+    or strongly, as "W/" is ignored by the weak comparison) or is "*".
+    """
+
+    for listed_etag in (if_none_match or "").split(","):
+
+        listed_etag = listed_etag.strip()
+
+        if listed_etag == "*":
+            return True
+
+        if listed_etag.removeprefix("W/").strip('"') == etag:
+            return True
+
+    return False
+
+
+class CrawlerHTTPService:
+    _config: dict
+    _db: UAExchangeRatesCrawlerDB
+    __heartbeat_cache: tuple | None = None
+    _response_cache: LocalResponseCache | SharedResponseCache | None = None
+    _notification_broker: NotificationBroker
+
+    def __init__(self, file):
+
+        start_time = time.perf_counter()
+
+        self._config = get_config(os.path.abspath(os.path.dirname(file)))
+
+        setup_logging(self._config, file)
+
+        self._db = UAExchangeRatesCrawlerDB(self._config, cache_last_import_date=True)
+        self._response_cache = get_response_cache(self._config, self._db)
+        self._notification_broker = NotificationBroker()
+
+        logging.debug(
+            "REST service initialized in %.3f second(s).",
+            time.perf_counter() - start_time,
+        )
+
+    def disconnect(self):
+
+        self._db.disconnect()
+
+    def get_response_cache_metrics(self) -> dict | None:
+        return (
+            None if self._response_cache is None else self._response_cache.get_metrics()
+        )
+
+    def get_error_response_using_date(self, date):
+        return self.get_error_response(
+            code=3, message=f"Unable to parse a date: {date}"
+        )
+
+    @staticmethod
+    def _get_event_ttl(event: dict, event_lifespan: int) -> int:
+        return round(
+            event_lifespan
+            - (datetime.datetime.now() - event["event_date"]).total_seconds()
+        )
+
+    def _fill_current_rates_loading_heartbeat(
+        self, heartbeat: dict, event: dict | None
+    ):
+
+        event_lifespan = self._config.get(
+            "heartbeat_current_rates_loading_event_lifespan"
+        )
+
+        if event is not None:
+
+            event_ttl = self._get_event_ttl(event, event_lifespan)
+            event_date = get_date_as_string(event["event_date"])
+
+            if event_ttl <= 0:
+                heartbeat["warnings"].append(
+                    f"The last current rates loading triggered over {event_lifespan} seconds ago. It looks like the "
+                    f"regular execution of load_current.py doesn't work."
+                )
+
+        else:
+
+            event_date = None
+
+            heartbeat["warnings"].append(
+                "Current rates loading has never been triggered. Perhaps this is not a problem (for instance, "
+                "if the application has just been deployed so load_current.py hasn't executed once yet)."
+            )
+
+        heartbeat["current_rates_loading_date"] = event_date
+
+    def _fill_current_rates_availability_heartbeat(self, heartbeat: dict, events: dict):
+
+        availability_dates = {}
+        available_currencies = []
+        unavailable_currencies = []
+
+        event_lifespan = self._config.get(
+            "heartbeat_current_rates_availability_event_lifespan"
+        )
+
+        currency_codes = self.get_currency_codes()
+
+        for currency_code in currency_codes:
+
+            event_ttl = 0
+            event_date = None
+
+            event = events.get(currency_code)
+
+            if event is not None:
+                event_ttl = self._get_event_ttl(event, event_lifespan)
+                event_date = get_date_as_string(event["event_date"])
+
+            availability_dates[currency_code] = event_date
+
+            if event_ttl > 0:
+                available_currencies.append(currency_code)
+            else:
+                unavailable_currencies.append(currency_code)
+
+        if unavailable_currencies:
+            heartbeat["warnings"].append(
+                f"At least one currency is not available at bank's website within {event_lifespan} last seconds."
+            )
+
+        heartbeat["currencies_availability"] = {
+            "availability_dates": availability_dates,
+            "available_currencies": available_currencies,
+            "unavailable_currencies": unavailable_currencies,
+        }
+
+    def _fill_historical_rates_loading_heartbeat(
+        self, heartbeat: dict, event: dict | None
+    ):
+
+        event_lifespan = self._config.get(
+            "heartbeat_historical_rates_loading_event_lifespan"
+        )
+
+        if event is not None:
+
+            event_ttl = self._get_event_ttl(event, event_lifespan)
+            event_date = get_date_as_string(event["event_date"])
+
+            if event_ttl < 0:
+                heartbeat["warnings"].append(
+                    f"The last successful historical rates loading triggered over {event_lifespan} seconds ago."
+                )
+
+        else:
+
+            event_date = None
+
+            heartbeat["warnings"].append(
+                "Historical rates loading has never been triggered. Perhaps this is not a problem (for instance, "
+                "if the application has just been deployed so load_history.py hasn't executed once yet)."
+            )
+
+        heartbeat["historical_rates_loading_date"] = event_date
+
+    def get_heartbeat(self) -> tuple:
+        """
+        Returns the heartbeat, which is cached for a few seconds
+        (see heartbeat_cache_lifespan), since load balancers tend
+        to poll it quite often.
+        """
+
+        result = self._get_cached_heartbeat()
+
+        if result is None:
+            result = self._get_heartbeat()
+            self._cache_heartbeat(result)
+
+        return result
+
+    def _get_cached_heartbeat(self) -> tuple | None:
+
+        if self.__heartbeat_cache is not None:
+
+            result, expiration_time = self.__heartbeat_cache
+
+            if time.monotonic() < expiration_time:
+                return result
+
+        return None
+
+    def _cache_heartbeat(self, result: tuple) -> None:
+
+        expiration_time = time.monotonic() + self._config["heartbeat_cache_lifespan"]
+        self.__heartbeat_cache = (result, expiration_time)
+
+    def _get_heartbeat(self) -> tuple:
+
+        return self.build_heartbeat(
+            current_rates_loading_event=self._db.get_last_event(
+                Event.CURRENT_RATES_LOADING
+            ),
+            historical_rates_loading_event=self._db.get_last_event(
+                Event.HISTORICAL_RATES_LOADING
+            ),
+            current_rates_availability_events=self._db.get_last_events_by_currencies(
+                Event.CURRENT_RATES_AVAILABILITY
+            ),
+            current_rates_updating_events=self._db.get_last_events_by_currencies(
+                Event.CURRENT_RATES_UPDATING
+            ),
+        )
+
+    def build_heartbeat(
+        self,
+        current_rates_loading_event: dict | None,
+        historical_rates_loading_event: dict | None,
+        current_rates_availability_events: dict,
+        current_rates_updating_events: dict,
+    ) -> tuple:
+        """
+        Builds the heartbeat using the last events, no matter how they have
+        been read from the database.
+        """
+
+        heartbeat = {
+            "warnings": [],
+            "current_date": get_date_as_string(datetime.datetime.now()),
+        }
+
+        self._fill_current_rates_loading_heartbeat(
+            heartbeat, current_rates_loading_event
+        )
+        self._fill_historical_rates_loading_heartbeat(
+            heartbeat, historical_rates_loading_event
+        )
+
+        self._fill_current_rates_availability_heartbeat(
+            heartbeat, current_rates_availability_events
+        )
+        self._fill_current_rates_updating_heartbeat(
+            heartbeat, current_rates_updating_events
+        )
+
+        return heartbeat, len(heartbeat["warnings"]) == 0
+
+    def _fill_current_rates_updating_heartbeat(self, heartbeat: dict, events: dict):
+
+        updating_dates = {}
+        updated_currencies = []
+        outdated_currencies = []
+
+        event_lifespan = self._config.get(
+            "heartbeat_current_rates_updating_event_lifespan"
+        )
+
+        currency_codes = self.get_currency_codes()
+
+        for currency_code in currency_codes:
+
+            event_ttl = 0
+            event_date = None
+
+            event = events.get(currency_code)
+
+            if event is not None:
+                event_ttl = self._get_event_ttl(event, event_lifespan)
+                event_date = get_date_as_string(event["event_date"])
+
+            updating_dates[currency_code] = event_date
+
+            if event_ttl > 0:
+                updated_currencies.append(currency_code)
+            else:
+                outdated_currencies.append(currency_code)
+
+        if outdated_currencies:
+            heartbeat["warnings"].append(
+                f"At least one currency is not available at bank's website within {event_lifespan} last seconds."
+            )
+
+        heartbeat["currencies_updating"] = {
+            "updating_dates": updating_dates,
+            "updated_currencies": updated_currencies,
+            "outdated_currencies": outdated_currencies,
+        }
+
+    def get_last_import_date(self) -> datetime.datetime | None:
+        return self._db.get_last_import_date()
+
+    @staticmethod
+    def get_etag(last_import_date: datetime.datetime, path: str, mimetype: str) -> str:
+        """
+        Returns an entity tag of a response, which is derived from the last
+        import date & the request.
+        """
+
+        etag_source = f"{last_import_date.isoformat()} {path} {mimetype}"
+
+        return hashlib.sha1(etag_source.encode()).hexdigest()
+
+    def get_caching_headers(
+        self, etag: str, last_import_date: datetime.datetime
+    ) -> dict:
+        """
+        Returns headers which let clients & proxies cache a response until
+        the next import (and then revalidate it using its entity tag).
+        """
+
+        last_modified = last_import_date.astimezone(datetime.timezone.utc)
+
+        return {
+            "ETag": f'"{etag}"',
+            "Last-Modified": email.utils.format_datetime(last_modified, usegmt=True),
+            "Cache-Control": f"public, max-age={self._config['http_cache_max_age']}",
+            "Vary": "Accept",
+        }
+
+    def get_raw_response(self, body: Iterator[str] | bytes, mimetype: str):
+        """
+        Returns a response of the web framework with the body as it is,
+        which is either chunks to stream or serialized rates.
+        """
+
+        # Flask is imported here rather than at startup, so the ASGI app
+        # (which overrides the method) doesn't load it.
+
+        from flask import Response
+
+        return Response(body, mimetype=mimetype)
+
+    @staticmethod
+    def get_error_response(code, message, status_code=200):
+        data = {"error_message": message, "error_code": code}
+
+        return data, status_code
+
+    def get_unknown_currency_code_response(self, currency_code: str):
+        message = (
+            f"Exchange rates for the currency code"
+            f' "{currency_code}" cannot be found at UAE CB.'
+        )
+
+        return self.get_error_response(code=4, message=message)
+
+    def get_currency_codes(self) -> list:
+        """
+        Returns the list of currency codes set in the configuration file.
+        """
+
+        currency_codes_filter = self._config["currency_codes_filter"]
+        currency_codes = self._config["currency_codes"].values()
+
+        return (
+            currency_codes_filter
+            if currency_codes_filter
+            else list(set(list(currency_codes)))
+        )
+
+    def get_currency_rates(
+        self,
+        currency_code: str,
+        import_date: datetime.datetime = None,
+        start_date: datetime.datetime = None,
+        end_date: datetime.datetime = None,
+        mimetype: str = "application/json",
+        limit: str | None = None,
+        cursor: str | None = None,
+    ):
+
+        currency_code = currency_code.upper()
+
+        if currency_code not in self.get_currency_codes():
+
+            return self.get_unknown_currency_code_response(currency_code)
+
+        elif mimetype != "application/json" and (
+            limit is not None or cursor is not None
+        ):
+
+            # Streamed & binary responses have nowhere to put the cursor
+            # of the next page, so they are never split into pages.
+
+            return self.get_error_response(
+                code=8,
+                message=f"Rates in {mimetype} cannot be split into pages.",
+                status_code=400,
+            )
+
+        elif mimetype in STREAMING_MIMETYPES:
+
+            rates = self._db.iterate_currency_rates(
+                currency_code, import_date, start_date, end_date
+            )
+
+            if mimetype == "application/x-ndjson":
+                chunks = self._get_currency_rates_ndjson_chunks(rates)
+            elif mimetype == "text/csv":
+                chunks = self._get_currency_rates_csv_chunks(rates)
+            else:
+                chunks = self._get_currency_rates_json_chunks(rates)
+
+            return self.get_raw_response(chunks, mimetype)
+
+        elif mimetype in BINARY_MIMETYPES:
+
+            rates = self._db.iterate_currency_rates(
+                currency_code, import_date, start_date, end_date
+            )
+
+            if mimetype == "application/msgpack":
+                data = self._get_currency_rates_msgpack(rates)
+            else:
+                data = self._get_currency_rates_arrow(rates)
+
+            return self.get_raw_response(data, mimetype)
+
+        else:
+
+            page_size, after_date, error_response = self.get_page_parameters(
+                limit, cursor
+            )
+
+            if error_response is not None:
+                return error_response
+
+            # Rates change only when a crawler imports them, so responses
+            # are cached until the next import.
+
+            cache_key = (
+                currency_code,
+                import_date,
+                start_date,
+                end_date,
+                after_date,
+                page_size,
+                self._db.get_last_import_date(),
+            )
+
+            data = None
+
+            if self._response_cache is not None:
+                data = self._response_cache.get(cache_key)
+
+            if data is None:
+
+                data = self._get_currency_rates_data(
+                    currency_code,
+                    import_date,
+                    start_date,
+                    end_date,
+                    after_date,
+                    page_size,
+                )
+
+                if self._response_cache is not None:
+                    self._response_cache.set(cache_key, data)
+
+            return data, 200
+
+    def get_page_parameters(self, limit: str | None, cursor: str | None) -> tuple:
+        """
+        Returns the size of a page of rates & the date of the last rate
+        of the previous page parsed from parameters of a request (None if
+        a parameter is absent), and an error response if one of them cannot
+        be parsed.
+        """
+
+        try:
+            page_size = None if limit is None else get_limit(limit)
+        except ValueError:
+            return (
+                None,
+                None,
+                self.get_error_response(
+                    code=6, message=f"Unable to parse a limit: {limit}"
+                ),
+            )
+
+        try:
+            after_date = None if cursor is None else get_date_using_cursor(cursor)
+        except ValueError:
+            return (
+                None,
+                None,
+                self.get_error_response(
+                    code=5, message=f"Unable to parse a cursor: {cursor}"
+                ),
+            )
+
+        return page_size, after_date, None
+
+    def _get_currency_rates_data(
+        self,
+        currency_code: str,
+        import_date: datetime.datetime | None,
+        start_date: datetime.datetime | None,
+        end_date: datetime.datetime | None,
+        after_date: datetime.datetime | None = None,
+        page_size: int | None = None,
+    ) -> dict:
+
+        # One more rate than a page has is read to find out whether there
+        # is the next page.
+
+        rates = self._db.get_currency_rates(
+            currency_code,
+            import_date,
+            start_date,
+            end_date,
+            after_date,
+            None if page_size is None else page_size + 1,
+        )
+
+        return self.get_currency_rates_data(rates, page_size)
+
+    @staticmethod
+    def get_currency_rates_data(rates: list, page_size: int | None = None) -> dict:
+        """
+        Returns a response with rates read from the database, no matter
+        how they have been read. If a page size is given, rates beyond it
+        are left out, and the response has a cursor of the next page (None
+        if there are no more rates).
+        """
+
+        datetime_format_string = "%Y%m%d%H%M%S"
+        date_format_string = "%Y%m%d"
+
+        next_cursor = None
+
+        if page_size is not None and len(rates) > page_size:
+            rates = rates[:page_size]
+            next_cursor = get_cursor(rates[-1]["rate_date"])
+
+        import_dates = []
+
+        for rate in rates:
+            import_dates.append(rate["import_date"])
+
+            rate.update(
+                {
+                    "import_date": rate["import_date"].strftime(datetime_format_string),
+                    "rate_date": rate["rate_date"].strftime(date_format_string),
+                }
+            )
+
+        max_import_date = (
+            max(import_dates) if len(import_dates) > 0 else datetime.datetime(1, 1, 1)
+        )
+        max_import_date = max_import_date.strftime(datetime_format_string)
+
+        data = {"rates": rates, "max_import_date": max_import_date}
+
+        if page_size is not None:
+            data["next"] = next_cursor
+
+        return data
+
+    @staticmethod
+    def _get_currency_rates_lines(rates: Iterator[dict]) -> Iterator[str]:
+        """
+        Yields rates serialized to JSON one by one, and then the max import
+        date, which is tracked along the way.
+        """
+
+        datetime_format_string = "%Y%m%d%H%M%S"
+        date_format_string = "%Y%m%d"
+
+        max_import_date = datetime.datetime(1, 1, 1)
+
+        for rate in rates:
+
+            max_import_date = max(max_import_date, rate["import_date"])
+
+            yield json.dumps(
+                {
+                    "import_date": rate["import_date"].strftime(datetime_format_string),
+                    "rate_date": rate["rate_date"].strftime(date_format_string),
+                    "rate": rate["rate"],
+                }
+            )
+
+        yield json.dumps(max_import_date.strftime(datetime_format_string))
+
+    def _get_currency_rates_json_chunks(self, rates: Iterator[dict]) -> Iterator[str]:
+
+        lines = self._get_currency_rates_lines(rates)
+        line = next(lines)
+        chunk = ['{"rates": [']
+        separator = ""
+
+        for next_line in lines:
+
+            chunk.append(f"{separator}{line}")
+            separator = ", "
+            line = next_line
+
+            if len(chunk) >= RATES_PER_CHUNK:
+                yield "".join(chunk)
+                chunk = []
+
+        chunk.append(f'], "max_import_date": {line}}}\n')
+
+        yield "".join(chunk)
+
+    def _get_currency_rates_ndjson_chunks(self, rates: Iterator[dict]) -> Iterator[str]:
+
+        lines = self._get_currency_rates_lines(rates)
+        line = next(lines)
+        chunk = []
+
+        for next_line in lines:
+
+            chunk.append(f"{line}\n")
+            line = next_line
+
+            if len(chunk) == RATES_PER_CHUNK:
+                yield "".join(chunk)
+                chunk = []
+
+        chunk.append(f'{{"max_import_date": {line}}}\n')
+
+        yield "".join(chunk)
+
+    @staticmethod
+    def _get_currency_rates_csv_chunks(rates: Iterator[dict]) -> Iterator[str]:
+
+        datetime_format_string = "%Y%m%d%H%M%S"
+        date_format_string = "%Y%m%d"
+
+        chunk = ["import_date,rate_date,rate\n"]
+
+        for rate in rates:
+
+            import_date = rate["import_date"].strftime(datetime_format_string)
+            rate_date = rate["rate_date"].strftime(date_format_string)
+
+            chunk.append(f'{import_date},{rate_date},{rate["rate"]!r}\n')
+
+            if len(chunk) >= RATES_PER_CHUNK:
+                yield "".join(chunk)
+                chunk = []
+
+        yield "".join(chunk)
+
+    @staticmethod
+    def _get_currency_rates_columns(rates: Iterator[dict]) -> tuple:
+        """
+        Splits rates read from a cursor into lists of import dates, rate dates
+        & rates, leaving the values as they are.
+        """
+
+        import_dates = []
+        rate_dates = []
+        rate_values = []
+
+        for rate in rates:
+            import_dates.append(rate["import_date"])
+            rate_dates.append(rate["rate_date"])
+            rate_values.append(rate["rate"])
+
+        return import_dates, rate_dates, rate_values
+
+    def _get_currency_rates_msgpack(self, rates: Iterator[dict]) -> bytes:
+
+        # MessagePack is imported by the first request which needs it,
+        # the same way PyArrow is.
+
+        import msgpack
+
+        datetime_format_string = "%Y%m%d%H%M%S"
+        date_format_string = "%Y%m%d"
+
+        import_dates, rate_dates, rate_values = self._get_currency_rates_columns(rates)
+
+        max_import_date = max(import_dates, default=datetime.datetime(1, 1, 1))
+
+        return msgpack.packb(
+            {
+                "import_dates": [
+                    import_date.strftime(datetime_format_string)
+                    for import_date in import_dates
+                ],
+                "rate_dates": [
+                    rate_date.strftime(date_format_string) for rate_date in rate_dates
+                ],
+                "rates": rate_values,
+                "max_import_date": max_import_date.strftime(datetime_format_string),
+            }
+        )
+
+    def _get_currency_rates_arrow(self, rates: Iterator[dict]) -> bytes:
+
+        # PyArrow takes quite a while to import, so it is imported
+        # by the first request which needs it rather than at startup.
+
+        import pyarrow
+        import pyarrow.ipc
+
+        datetime_format_string = "%Y%m%d%H%M%S"
+
+        import_dates, rate_dates, rate_values = self._get_currency_rates_columns(rates)
+
+        max_import_date = max(import_dates, default=datetime.datetime(1, 1, 1))
+
+        # Dates are kept as they are (rather than as strings), so a rate takes
+        # 20 bytes: a timestamp, a date & a double.
+
+        table = pyarrow.table(
+            {
+                "import_date": pyarrow.array(import_dates, pyarrow.timestamp("s")),
+                "rate_date": pyarrow.array(rate_dates, pyarrow.timestamp("s")).cast(
+                    pyarrow.date32()
+                ),
+                "rate": pyarrow.array(rate_values, pyarrow.float64()),
+            }
+        )
+        table = table.replace_schema_metadata(
+            {"max_import_date": max_import_date.strftime(datetime_format_string)}
+        )
+
+        sink = pyarrow.BufferOutputStream()
+
+        with pyarrow.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+
+        return sink.getvalue().to_pybytes()
+
+    def get_changes(self, token: str | None = None):
+        """
+        Returns a page of rates (of all currencies) imported after the rate
+        the token points to, and a token of the last of them, which is
+        supposed to be passed to get the next page.
+        """
+
+        if token is None:
+            sequence_number = 0
+        elif token.isdigit():
+            sequence_number = int(token)
+        else:
+            return self.get_error_response(
+                code=7, message=f"Unable to parse a token: {token}"
+            )
+
+        datetime_format_string = "%Y%m%d%H%M%S"
+        date_format_string = "%Y%m%d"
+
+        page_size = self._config["changes_page_size"]
+
+        rates = self._db.get_currency_rates_changes(sequence_number, page_size)
+
+        for rate in rates:
+            sequence_number = rate.pop("sequence_number")
+
+            rate.update(
+                {
+                    "import_date": rate["import_date"].strftime(datetime_format_string),
+                    "rate_date": rate["rate_date"].strftime(date_format_string),
+                }
+            )
+
+        data = {
+            "rates": rates,
+            "next": str(sequence_number),
+            "has_more": len(rates) == page_size,
+        }
+
+        return data, 200
+
+    def get_notifications(self, token: str | None = None):
+        """
+        Returns notifications about imports completed after the notification
+        the token points to (waiting for one for a while if there are none
+        yet), and a token of the last of them, which is supposed to be passed
+        to wait for the next ones. Without a token, only a token of the last
+        notification is returned at once.
+        """
+
+        sequence_number, error_response = self.get_notifications_sequence_number(token)
+
+        if error_response is not None:
+            return error_response
+
+        if sequence_number is None:
+            return self.get_notifications_data(
+                [], self._db.get_last_notification_sequence_number()
+            )
+
+        # The database is tailed only once someone waits for notifications,
+        # so a process which doesn't serve them has no background thread.
+
+        self._notification_broker.subscribe(self._db)
+
+        notifications = self._notification_broker.wait(
+            sequence_number, self._config["notifications_wait_timeout"]
+        )
+
+        return self.get_notifications_data(notifications, sequence_number)
+
+    def get_notifications_sequence_number(self, token: str | None) -> tuple:
+        """
+        Returns a sequence number of a notification parsed from a token (None
+        if there is no token), and an error response if it cannot be parsed.
+        """
+
+        if token is None:
+            return None, None
+
+        if not token.isdigit():
+            return None, self.get_error_response(
+                code=7, message=f"Unable to parse a token: {token}"
+            )
+
+        return int(token), None
+
+    @staticmethod
+    def get_notifications_data(notifications: list, sequence_number: int) -> tuple:
+        """
+        Returns a response with notifications published after one with
+        the given sequence number. If the first of them isn't the next one,
+        the process doesn't keep the ones in between anymore (the client has
+        fallen too far behind), so the response tells the client to resync,
+        e.g. by requesting /changes/ with its own token.
+        """
+
+        datetime_format_string = "%Y%m%d%H%M%S"
+        date_format_string = "%Y%m%d"
+
+        resync = (
+            len(notifications) > 0 and notifications[0]["_id"] > sequence_number + 1
+        )
+
+        data = {"notifications": [], "next": str(sequence_number), "resync": resync}
+
+        for notification in notifications:
+
+            data["notifications"].append(
+                {
+                    "import_date": notification["import_date"].strftime(
+                        datetime_format_string
+                    ),
+                    "rates": [
+                        {
+                            "currency_code": rate["currency_code"],
+                            "rate_date": rate["rate_date"].strftime(date_format_string),
+                        }
+                        for rate in notification["rates"]
+                    ],
+                }
+            )
+
+            data["next"] = str(notification["_id"])
+
+        return data, 200
+
+    def get_currencies_rates(
+        self,
+        currency_codes: str,
+        import_date: datetime.datetime = None,
+        start_date: datetime.datetime = None,
+        end_date: datetime.datetime = None,
+    ):
+        """
+        Returns rates of several currencies (comma-separated codes or "all")
+        at once. Rates are grouped by currencies & split into columns, so
+        the response doesn't repeat keys for each rate.
+        """
+
+        if currency_codes.lower() == "all":
+            currency_codes = self.get_currency_codes()
+        else:
+            currency_codes = [
+                currency_code.strip().upper()
+                for currency_code in currency_codes.split(",")
+                if currency_code.strip()
+            ]
+
+        for currency_code in currency_codes:
+
+            if currency_code not in self.get_currency_codes():
+
+                return self.get_unknown_currency_code_response(currency_code)
+
+        datetime_format_string = "%Y%m%d%H%M%S"
+        date_format_string = "%Y%m%d"
+
+        currencies = {
+            currency_code: {"rate_dates": [], "rates": [], "import_dates": []}
+            for currency_code in sorted(currency_codes)
+        }
+        max_import_date = datetime.datetime(1, 1, 1)
+
+        rates = self._db.get_currencies_rates(
+            currency_codes, import_date, start_date, end_date
+        )
+
+        for rate in rates:
+
+            max_import_date = max(max_import_date, rate["import_date"])
+
+            columns = currencies[rate["currency_code"]]
+            columns["rate_dates"].append(rate["rate_date"].strftime(date_format_string))
+            columns["rates"].append(rate["rate"])
+            columns["import_dates"].append(
+                rate["import_date"].strftime(datetime_format_string)
+            )
+
+        data = {
+            "currencies": currencies,
+            "max_import_date": max_import_date.strftime(datetime_format_string),
+        }
+
+        return data, 200
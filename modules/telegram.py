@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+
+"""
+Notifier which sends messages to a Telegram chat. Messages are sent
+by a background thread, so the import never waits for Telegram.
+Texts sent during a run are coalesced into as few messages
+as the Telegram message size limit allows, and a text longer than that
+is split into several messages.
+"""
+
+import logging
+import queue
+import re
+import threading
+import time
+
+import requests
+
+MESSAGE_MAX_LENGTH = 4096
+MESSAGES_SEPARATOR = "\n\n"
+
+# Room left in each part of a split text for tags closed at the end
+# of the part & opened again at the start of the next one.
+
+SPLIT_TAGS_RESERVE = 64
+
+TAG_PATTERN = re.compile(r"<(/?)([a-zA-Z-]+)[^>]*>")
+
+
+class TelegramNotifier:
+    _url: str
+    _chat_id: int | str
+    _enabled: bool
+    _timeout: int
+    _max_attempts: int
+    _queue: queue.Queue
+    _thread: threading.Thread | None = None
+
+    def __init__(
+        self,
+        bot_api_token: str,
+        chat_id: int | str,
+        api_url: str = "https://api.telegram.org",
+        timeout: int = 10,
+        max_attempts: int = 3,
+    ) -> None:
+
+        self._url = f"{api_url}/bot{bot_api_token}/sendMessage"
+        self._chat_id = chat_id
+        self._enabled = bot_api_token != "" and bool(chat_id)
+        self._timeout = timeout
+        self._max_attempts = max_attempts
+        self._queue = queue.Queue()
+
+    def send(self, text: str) -> None:
+        """
+        Puts a text to the queue of texts to send. It never blocks.
+        """
+
+        if not self._enabled:
+            return
+
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+        self._queue.put_nowait(text)
+
+    def close(self) -> None:
+        """
+        Sends texts remaining in the queue and stops the background thread.
+        """
+
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+
+        with requests.Session() as session:
+
+            texts = []
+            texts_length = 0
+
+            while True:
+
+                text = self._queue.get()
+
+                if text is None:
+                    break
+
+                for text_part in split_text(text):
+
+                    text_length = len(MESSAGES_SEPARATOR) + len(text_part)
+
+                    if texts and texts_length + text_length > MESSAGE_MAX_LENGTH:
+                        self._send_message(session, MESSAGES_SEPARATOR.join(texts))
+                        texts = []
+                        texts_length = 0
+
+                    texts.append(text_part)
+                    texts_length += text_length
+
+            if texts:
+                self._send_message(session, MESSAGES_SEPARATOR.join(texts))
+
+    def _send_message(self, session: requests.Session, text: str) -> None:
+
+        data = {
+            "parse_mode": "HTML",
+            "chat_id": self._chat_id,
+            "text": text,
+        }
+
+        for attempt in range(1, self._max_attempts + 1):
+
+            try:
+
+                response = session.post(self._url, data=data, timeout=self._timeout)
+
+            except requests.exceptions.RequestException as error:
+
+                logging.error("Error while sending a message to Telegram: %s", error)
+
+                time.sleep(attempt)
+                continue
+
+            # Telegram asks to wait for a while if messages are sent too often.
+
+            if response.status_code == requests.codes.too_many_requests:
+                time.sleep(self._get_retry_after(response, default=attempt))
+                continue
+
+            if response.status_code != requests.codes.ok:
+                logging.error(
+                    "Error while sending a message to Telegram: %s", response.text
+                )
+
+            return
+
+        logging.error("Unable to send a message to Telegram.")
+
+    def _get_retry_after(self, response: requests.Response, default: int) -> int:
+
+        try:
+            retry_after = int(response.json()["parameters"]["retry_after"])
+        except (ValueError, KeyError, TypeError):
+            retry_after = default
+
+        return min(retry_after, self._timeout * self._max_attempts)
+
+
+def split_text(text: str, max_length: int = MESSAGE_MAX_LENGTH) -> list:
+    """
+    Splits a text which is too long for a message into parts at line breaks
+    (a line which is too long itself is split outside tags & entities).
+    HTML tags open at the end of a part are closed there & opened again
+    at the start of the next part, so Telegram accepts each of them.
+    """
+
+    if len(text) <= max_length:
+        return [text]
+
+    parts_max_length = max_length - SPLIT_TAGS_RESERVE
+
+    parts = []
+    lines = []
+    part_length = 0
+    part_prefix = ""
+    open_tags = []
+
+    for line in get_lines(text, parts_max_length):
+
+        if lines and part_length + len(line) + 1 > parts_max_length:
+
+            parts.append(part_prefix + "\n".join(lines) + get_closing_tags(open_tags))
+
+            part_prefix = "".join(open_tags)
+            lines = []
+            part_length = len(part_prefix)
+
+        lines.append(line)
+        part_length += len(line) + 1
+
+        update_open_tags(open_tags, line)
+
+    parts.append(part_prefix + "\n".join(lines))
+
+    return parts
+
+
+def get_lines(text: str, max_length: int):
+
+    for line in text.split("\n"):
+
+        while len(line) > max_length:
+
+            split_position = get_split_position(line, max_length)
+
+            yield line[:split_position]
+            line = line[split_position:]
+
+        yield line
+
+
+def get_split_position(line: str, max_length: int) -> int:
+    """
+    Returns a position to split a line which is too long at: as close
+    to the limit as possible, but outside HTML tags & entities, since
+    Telegram rejects a message with a broken one.
+    """
+
+    split_position = max_length
+
+    tag_start = line.rfind("<", 0, split_position)
+
+    if tag_start != -1 and line.find(">", tag_start, split_position) == -1:
+        split_position = tag_start
+
+    entity_start = line.rfind("&", 0, split_position)
+
+    if entity_start != -1 and line.find(";", entity_start, split_position) == -1:
+        split_position = entity_start
+
+    # A tag or an entity longer than the limit cannot be kept whole anyway.
+
+    return split_position if split_position > 0 else max_length
+
+
+def update_open_tags(open_tags: list, line: str) -> None:
+
+    for match in TAG_PATTERN.finditer(line):
+
+        is_closing_tag, tag_name = match.groups()
+
+        if not is_closing_tag:
+            open_tags.append(match.group(0))
+            continue
+
+        for index in range(len(open_tags) - 1, -1, -1):
+
+            if TAG_PATTERN.match(open_tags[index]).group(2) == tag_name:
+                del open_tags[index]
+                break
+
+
+def get_closing_tags(open_tags: list) -> str:
+
+    return "".join(
+        f"</{TAG_PATTERN.match(open_tag).group(2)}>" for open_tag in reversed(open_tags)
+    )
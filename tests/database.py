@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+
+"""
+A MongoDB server for tests which need the database itself: the one
+MONGODB_TEST_CONNECTION_STRING points to, or an in-memory one started
+by pymongo_inmemory (if it is installed & able to get a mongod binary).
+Tests are skipped if there is neither, or the server is older than 4.2
+(queries rely on $merge, update pipelines & $$NOW).
+"""
+
+import os
+import unittest
+import uuid
+
+import pymongo
+
+from modules.config import check_parameters
+from modules.db import UAExchangeRatesCrawlerDB
+
+MONGODB_MIN_VERSION = [4, 2]
+
+
+class DatabaseTestCase(unittest.TestCase):
+    """
+    Gives each test a database of its own, which is dropped afterwards.
+    """
+
+    connection_string: str | None = None
+    _mongod = None
+
+    @classmethod
+    def setUpClass(cls):
+
+        cls.connection_string = os.environ.get("MONGODB_TEST_CONNECTION_STRING")
+
+        if cls.connection_string is None:
+            cls._start_mongod()
+
+        client = pymongo.MongoClient(cls.connection_string)
+
+        try:
+            version = client.server_info()["versionArray"]
+        finally:
+            client.close()
+
+        if version < MONGODB_MIN_VERSION:
+
+            cls.tearDownClass()
+
+            version = ".".join(map(str, version[:3]))
+
+            raise unittest.SkipTest(f"MongoDB {version} is older than 4.2")
+
+    @classmethod
+    def _start_mongod(cls):
+
+        try:
+
+            from pymongo_inmemory import Mongod
+
+            cls._mongod = Mongod(None)
+            cls._mongod.start()
+
+        except Exception as error:
+
+            raise unittest.SkipTest(f"No MongoDB server to test against: {error}")
+
+        cls.connection_string = cls._mongod.connection_string
+
+    @classmethod
+    def tearDownClass(cls):
+
+        if cls._mongod is not None:
+            cls._mongod.stop()
+            cls._mongod = None
+
+    def setUp(self):
+
+        self.config = {
+            "mongodb_connection_string": self.connection_string,
+            "mongodb_database_name": f"test_{uuid.uuid4().hex}",
+            "mongodb_max_delay": 5000,
+        }
+
+        check_parameters(self.config)
+
+        client = pymongo.MongoClient(self.connection_string)
+
+        self.database = client[self.config["mongodb_database_name"]]
+
+        self.addCleanup(client.close)
+        self.addCleanup(client.drop_database, self.config["mongodb_database_name"])
+
+    def get_db(self, **options) -> UAExchangeRatesCrawlerDB:
+
+        db = UAExchangeRatesCrawlerDB(self.config, **options)
+
+        self.addCleanup(db.disconnect)
+
+        return db
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+
+"""
+Fixtures shared by tests & benchmarks: workbooks laid out the way
+the bank's historical files are, and crawlers & the REST service which
+need neither the configuration file nor the database.
+"""
+
+import datetime
+import os
+
+import openpyxl
+
+from modules.config import check_parameters, get_yaml_data
+from modules.crawler import UAExchangeRatesCrawler
+from modules.currencies import CurrencyCodes
+from modules.notifications import NotificationBroker
+from modules.service import CrawlerHTTPService
+
+CURRENCY_CODES = {
+    "US Dollar": "USD",
+    "Euro": "EUR",
+    "Japanese Yen": "JPY",
+    "Indian Rupee": "INR",
+}
+
+UNKNOWN_CURRENCY = "Unknown Currency"
+
+IMPORT_DATE = datetime.datetime(2023, 2, 1, 10, 0, 0)
+
+
+def write_historical_workbook(
+    file_path: str, first_date: datetime.date, days_number: int, with_footer: bool
+) -> None:
+    """
+    Writes a workbook with a rate of each currency (and of an unknown one)
+    for each day: a title, an empty row & a header, then rates, and then
+    (optionally) a footer with a note.
+    """
+
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+
+    sheet.append(["Exchange rates"])
+    sheet.append([])
+    sheet.append(["Currency", "Rate", "Date"])
+
+    currency_names = [UNKNOWN_CURRENCY] + list(CURRENCY_CODES)
+
+    for day_number in range(days_number):
+
+        # Some dates have a time, which is supposed to be ignored.
+
+        rate_date = datetime.datetime.combine(
+            first_date + datetime.timedelta(days=day_number),
+            datetime.time(hour=day_number % 3),
+        )
+
+        for currency_number, currency_name in enumerate(currency_names):
+            rate = round(1 + currency_number + day_number / 1000, 6)
+            sheet.append([currency_name, rate, rate_date])
+
+    if with_footer:
+        sheet.append(["Rates are indicative only."])
+
+    workbook.save(file_path)
+
+
+def get_crawler(crawler_class: type, currency_codes_filter: list):
+    """
+    Returns a crawler able to convert data to rates only.
+    """
+
+    crawler = crawler_class.__new__(crawler_class)
+
+    crawler._currency_codes = CurrencyCodes(CURRENCY_CODES, currency_codes_filter)
+    crawler._current_datetime = IMPORT_DATE
+
+    return crawler
+
+
+def get_currency_codes_from_config() -> CurrencyCodes:
+    """
+    Returns currency codes from config.yaml of the repository (bank pages
+    use currency titles which are there).
+    """
+
+    config_filepath = os.path.join(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "config.yaml"
+    )
+
+    return CurrencyCodes(get_yaml_data(config_filepath)["currency_codes"], [])
+
+
+def load_currency_rates_row_by_row(crawler, excel_data) -> list:
+    """
+    Converts data of a historical file to rates the way the crawler used
+    to do it before the conversion has been vectorized: row by row,
+    skipping the last row.
+    """
+
+    currency_rates = []
+
+    excel_dict = excel_data.to_dict()
+
+    currency_column = excel_dict["Currency"]
+    rate_column = excel_dict["Rate"]
+    date_column = excel_dict["Date"]
+
+    max_index = len(currency_column) - 1
+
+    for index in range(0, max_index):
+
+        currency_code = crawler.get_currency_code(currency_column[index])
+
+        if currency_code is None:
+            continue
+
+        if not crawler._is_currency_code_allowed(currency_code):
+            continue
+
+        rate_date = UAExchangeRatesCrawler.get_datetime_from_date(date_column[index])
+
+        currency_rates.append(
+            {
+                "currency_code": currency_code,
+                "import_date": crawler._current_datetime,
+                "rate_date": rate_date + datetime.timedelta(days=1),
+                "rate": float(rate_column[index]),
+            }
+        )
+
+    return currency_rates
+
+
+def get_rates(currency_codes: list, first_date: datetime.date, days_number: int):
+    """
+    Returns latest rates of the currencies for each day.
+    """
+
+    return [
+        {
+            "currency_code": currency_code,
+            "import_date": IMPORT_DATE,
+            "rate_date": datetime.datetime.combine(
+                first_date + datetime.timedelta(days=day_number), datetime.time()
+            ),
+            "rate": round(1 + currency_number + day_number / 1000, 6),
+        }
+        for currency_number, currency_code in enumerate(currency_codes)
+        for day_number in range(days_number)
+    ]
+
+
+class ServiceDatabase:
+    """
+    Stands in for the database of the REST service: keeps latest rates
+    in memory (numbered in the order they are given) and answers queries
+    of the service the way MongoDB does.
+    """
+
+    def __init__(self, rates: list, last_import_date: datetime.datetime = IMPORT_DATE):
+
+        self.changes = [
+            dict(rate, sequence_number=sequence_number)
+            for sequence_number, rate in enumerate(rates, 1)
+        ]
+        self.rates = sorted(
+            rates, key=lambda rate: (rate["currency_code"], rate["rate_date"])
+        )
+        self.last_import_date = last_import_date
+        self.notifications = []
+        self.queries_number = 0
+
+    def get_last_import_date(self) -> datetime.datetime | None:
+        return self.last_import_date
+
+    def iterate_currency_rates(
+        self,
+        currency_code: str,
+        import_date: datetime.datetime | None,
+        start_date: datetime.datetime | None,
+        end_date: datetime.datetime | None,
+        after_date: datetime.datetime | None = None,
+        limit: int | None = None,
+    ):
+
+        self.queries_number += 1
+
+        rates = [
+            {key: rate[key] for key in ("import_date", "rate_date", "rate")}
+            for rate in self._get_rates([currency_code], start_date, end_date)
+            if after_date is None or rate["rate_date"] > after_date
+        ]
+
+        yield from rates[:limit] if limit else rates
+
+    def get_currency_rates(self, *args, **kwargs) -> list:
+        return list(self.iterate_currency_rates(*args, **kwargs))
+
+    def get_currencies_rates(
+        self,
+        currency_codes: list,
+        import_date: datetime.datetime | None,
+        start_date: datetime.datetime | None,
+        end_date: datetime.datetime | None,
+    ) -> list:
+
+        self.queries_number += 1
+
+        return [
+            dict(rate) for rate in self._get_rates(currency_codes, start_date, end_date)
+        ]
+
+    def get_currency_rates_changes(
+        self, sequence_number: int, changes_number: int
+    ) -> list:
+
+        self.queries_number += 1
+
+        changes = []
+
+        for rate in self.changes[sequence_number : sequence_number + changes_number]:
+
+            if rate["import_date"] > self.last_import_date:
+                break
+
+            changes.append(dict(rate))
+
+        return changes
+
+    def get_last_notification_sequence_number(self) -> int:
+        return self.notifications[-1]["_id"] if self.notifications else 0
+
+    def iterate_notifications(self, sequence_number: int, max_await_time: int):
+
+        for notification in self.notifications:
+            if notification["_id"] > sequence_number:
+                yield notification
+
+    def _get_rates(
+        self,
+        currency_codes: list,
+        start_date: datetime.datetime | None,
+        end_date: datetime.datetime | None,
+    ) -> list:
+
+        return [
+            rate
+            for rate in self.rates
+            if rate["currency_code"] in currency_codes
+            and (start_date is None or rate["rate_date"] >= start_date)
+            and (end_date is None or rate["rate_date"] <= end_date)
+        ]
+
+
+def get_service(db, service_class: type = CrawlerHTTPService, **config):
+    """
+    Returns the REST service which reads the given stand-in of the database
+    (without a response cache, unless one is set afterwards).
+    """
+
+    service = service_class.__new__(service_class)
+
+    service._config = {"currency_codes": CURRENCY_CODES, **config}
+    check_parameters(service._config)
+
+    service._db = db
+    service._response_cache = None
+    service._notification_broker = NotificationBroker()
+
+    return service
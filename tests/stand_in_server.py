@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+
+"""
+A local HTTP server standing in for a remote one (the bank's website,
+Telegram Bot API, etc.) in tests.
+"""
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StandInServer:
+    """
+    Answers each request with a response the given function returns for it
+    (a status code, headers & a body) and keeps requests it has got.
+    It is started & stopped as a context manager.
+    """
+
+    def __init__(self, respond) -> None:
+
+        self.requests = []
+
+        server = self
+
+        class RequestHandler(BaseHTTPRequestHandler):
+            def do_GET(self):  # pylint: disable=invalid-name
+                self._respond()
+
+            def do_POST(self):  # pylint: disable=invalid-name
+                self._respond()
+
+            def _respond(self):
+
+                content_length = int(self.headers.get("Content-Length") or 0)
+
+                request = {
+                    "method": self.command,
+                    "path": self.path,
+                    "headers": dict(self.headers),
+                    "body": self.rfile.read(content_length),
+                }
+                server.requests.append(request)
+
+                status_code, headers, body = respond(request)
+
+                self.send_response(status_code)
+
+                for name, value in headers.items():
+                    self.send_header(name, value)
+
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._http_server = ThreadingHTTPServer(("127.0.0.1", 0), RequestHandler)
+        self._thread = threading.Thread(
+            target=self._http_server.serve_forever, daemon=True
+        )
+
+    @property
+    def url(self) -> str:
+
+        host, port = self._http_server.server_address
+
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+
+        self._thread.start()
+
+        return self
+
+    def __exit__(self, *args):
+
+        self._http_server.shutdown()
+        self._http_server.server_close()
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+
+"""
+Tests of caching headers & conditional requests of the Flask app (api.py)
+against a stand-in of the database (see fixtures.py).
+"""
+
+import datetime
+import unittest
+from unittest import mock
+
+import fixtures
+
+import api
+
+NEXT_IMPORT_DATE = datetime.datetime(2023, 2, 1, 11, 0, 0)
+
+
+class CachingTestCase(unittest.TestCase):
+    def setUp(self):
+
+        self.db = fixtures.ServiceDatabase(
+            fixtures.get_rates(["EUR", "USD"], datetime.date(2023, 1, 1), 3)
+        )
+        self.service = fixtures.get_service(self.db)
+
+        patcher = mock.patch.object(api, "crawler", self.service)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.client = api.app.test_client()
+
+    def get_etag(self, path: str, mimetype: str = "application/json") -> str:
+
+        etag = self.service.get_etag(self.db.last_import_date, path, mimetype)
+
+        return f'"{etag}"'
+
+    def test_etag_depends_on_import_date_path_and_media_type(self):
+
+        response = self.client.get("/rates/USD/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["ETag"], self.get_etag("/rates/USD/?"))
+        self.assertEqual(response.headers["Vary"], "Accept")
+        self.assertEqual(
+            response.headers["Last-Modified"],
+            self.service.get_caching_headers("", fixtures.IMPORT_DATE)["Last-Modified"],
+        )
+
+        etags = {response.headers["ETag"]}
+
+        response = self.client.get("/rates/USD/?limit=2")
+        etags.add(response.headers["ETag"])
+
+        self.assertEqual(response.headers["ETag"], self.get_etag("/rates/USD/?limit=2"))
+
+        response = self.client.get("/rates/USD/", headers={"Accept": "text/csv"})
+        etags.add(response.headers["ETag"])
+
+        self.assertEqual(
+            response.headers["ETag"], self.get_etag("/rates/USD/?", "text/csv")
+        )
+        self.assertEqual(response.headers["Vary"], "Accept")
+
+        self.db.last_import_date = NEXT_IMPORT_DATE
+
+        response = self.client.get("/rates/USD/")
+        etags.add(response.headers["ETag"])
+
+        self.assertEqual(len(etags), 4)
+
+    def test_not_modified(self):
+
+        etag = self.client.get("/bulk-rates/all/").headers["ETag"]
+        queries_number = self.db.queries_number
+
+        response = self.client.get("/bulk-rates/all/", headers={"If-None-Match": etag})
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.data, b"")
+        self.assertEqual(response.headers["ETag"], etag)
+        self.assertEqual(response.headers["Vary"], "Accept")
+
+        # Rates are not read to answer a conditional request.
+
+        self.assertEqual(self.db.queries_number, queries_number)
+
+        response = self.client.get(
+            "/bulk-rates/all/", headers={"If-None-Match": f'"other", {etag}'}
+        )
+
+        self.assertEqual(response.status_code, 304)
+
+    def test_modified(self):
+
+        etag = self.client.get("/rates/USD/").headers["ETag"]
+
+        response = self.client.get(
+            "/rates/USD/", headers={"If-None-Match": etag, "Accept": "text/csv"}
+        )
+
+        self.assertEqual(response.status_code, 200)
+
+        self.db.last_import_date = NEXT_IMPORT_DATE
+
+        response = self.client.get("/rates/USD/", headers={"If-None-Match": etag})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers["ETag"], etag)
+
+    def test_changes_are_not_cached(self):
+
+        response = self.client.get("/changes/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json["rates"]), 6)
+        self.assertNotIn("ETag", response.headers)
+        self.assertNotIn("Cache-Control", response.headers)
+
+        # A crawler which started before the last import completed inserts
+        # rates after it, so they appear among changes without a new import.
+
+        self.db.last_import_date = NEXT_IMPORT_DATE
+
+        response = self.client.get("/changes/6/")
+
+        self.assertEqual(response.json["rates"], [])
+
+        self.db.changes.append(
+            dict(
+                self.db.changes[0],
+                import_date=datetime.datetime(2023, 2, 1, 10, 30, 0),
+                sequence_number=7,
+            )
+        )
+
+        response = self.client.get("/changes/6/")
+
+        self.assertEqual(len(response.json["rates"]), 1)
+        self.assertEqual(response.json["next"], "7")
+
+    def test_pages_in_json_only(self):
+
+        response = self.client.get(
+            "/rates/USD/?limit=2", headers={"Accept": "application/x-ndjson"}
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json["error_code"], 8)
+        self.assertNotIn("ETag", response.headers)
+
+
+if __name__ == "__main__":
+    unittest.main()
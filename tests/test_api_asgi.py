@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+
+"""
+Tests of routes of the ASGI app (api_asgi.py) against stand-ins of both
+the synchronous & the asynchronous database (see fixtures.py). They are
+skipped unless requirements-asgi.txt is installed.
+"""
+
+import csv
+import datetime
+import io
+import unittest
+from unittest import mock
+
+import fixtures
+
+try:
+
+    import msgpack
+    from starlette.testclient import TestClient
+
+    import api_asgi
+
+except ImportError as error:
+
+    raise unittest.SkipTest(f"The ASGI app cannot be imported: {error}")
+
+
+class AsyncServiceDatabase:
+    """
+    Stands in for the asynchronous database of the ASGI app, answering
+    queries using a stand-in of the synchronous one.
+    """
+
+    def __init__(self, db: fixtures.ServiceDatabase) -> None:
+        self._db = db
+
+    async def get_last_import_date(self) -> datetime.datetime | None:
+        return self._db.get_last_import_date()
+
+    async def get_currency_rates(self, *args) -> list:
+        return self._db.get_currency_rates(*args)
+
+
+class RoutesTestCase(unittest.TestCase):
+    def setUp(self):
+
+        self.db = fixtures.ServiceDatabase(
+            fixtures.get_rates(["EUR", "USD"], datetime.date(2023, 1, 1), 3)
+        )
+
+        self.service = fixtures.get_service(self.db, api_asgi.AsyncCrawlerHTTPService)
+        self.service._async_db = AsyncServiceDatabase(self.db)
+
+        patcher = mock.patch.object(api_asgi, "crawler", self.service)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        # The app is started without its lifespan, which would disconnect
+        # the service from the database.
+
+        self.client = TestClient(api_asgi.app)
+
+    def test_json(self):
+
+        response = self.client.get("/rates/usd/20230201/20230102/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["content-type"], "application/json")
+        self.assertEqual(
+            response.json(),
+            {
+                "rates": [
+                    {
+                        "import_date": "20230201100000",
+                        "rate_date": "20230102",
+                        "rate": 2.001,
+                    },
+                    {
+                        "import_date": "20230201100000",
+                        "rate_date": "20230103",
+                        "rate": 2.002,
+                    },
+                ],
+                "max_import_date": "20230201100000",
+            },
+        )
+
+    def test_json_pages(self):
+
+        response = self.client.get("/rates/USD/?limit=2")
+
+        self.assertEqual(len(response.json()["rates"]), 2)
+
+        response = self.client.get(
+            f"/rates/USD/?limit=2&cursor={response.json()['next']}"
+        )
+
+        self.assertEqual(
+            [rate["rate_date"] for rate in response.json()["rates"]], ["20230103"]
+        )
+        self.assertIsNone(response.json()["next"])
+
+    def test_csv(self):
+
+        response = self.client.get("/rates/USD/", headers={"Accept": "text/csv"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.headers["content-type"].startswith("text/csv"))
+        self.assertEqual(
+            list(csv.reader(io.StringIO(response.text))),
+            [
+                ["import_date", "rate_date", "rate"],
+                ["20230201100000", "20230101", "2.0"],
+                ["20230201100000", "20230102", "2.001"],
+                ["20230201100000", "20230103", "2.002"],
+            ],
+        )
+
+    def test_msgpack(self):
+
+        response = self.client.get(
+            "/rates/EUR/", headers={"Accept": "application/msgpack"}
+        )
+
+        self.assertEqual(response.headers["content-type"], "application/msgpack")
+        self.assertEqual(
+            msgpack.unpackb(response.content),
+            {
+                "import_dates": ["20230201100000"] * 3,
+                "rate_dates": ["20230101", "20230102", "20230103"],
+                "rates": [1.0, 1.001, 1.002],
+                "max_import_date": "20230201100000",
+            },
+        )
+
+    def test_not_modified(self):
+
+        response = self.client.get("/rates/USD/")
+
+        self.assertEqual(response.headers["vary"], "Accept")
+
+        etag = response.headers["etag"]
+        queries_number = self.db.queries_number
+
+        response = self.client.get("/rates/USD/", headers={"If-None-Match": etag})
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.headers["etag"], etag)
+        self.assertEqual(self.db.queries_number, queries_number)
+
+        # A response of another media type has an entity tag of its own.
+
+        response = self.client.get(
+            "/rates/USD/", headers={"If-None-Match": etag, "Accept": "text/csv"}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers["etag"], etag)
+
+    def test_bulk_rates(self):
+
+        response = self.client.get("/bulk-rates/usd,eur/20230201/20230103/")
+
+        self.assertEqual(
+            response.json()["currencies"]["USD"],
+            {
+                "rate_dates": ["20230103"],
+                "rates": [2.002],
+                "import_dates": ["20230201100000"],
+            },
+        )
+        self.assertIn("etag", response.headers)
+
+        response = self.client.get("/bulk-rates/USD,XXX/")
+
+        self.assertEqual(response.json()["error_code"], 4)
+
+    def test_changes(self):
+
+        response = self.client.get("/changes/4/")
+
+        self.assertEqual(
+            response.json(),
+            {
+                "rates": [
+                    {
+                        "currency_code": "USD",
+                        "import_date": "20230201100000",
+                        "rate_date": "20230102",
+                        "rate": 2.001,
+                    },
+                    {
+                        "currency_code": "USD",
+                        "import_date": "20230201100000",
+                        "rate_date": "20230103",
+                        "rate": 2.002,
+                    },
+                ],
+                "next": "6",
+                "has_more": False,
+            },
+        )
+        self.assertNotIn("etag", response.headers)
+
+        response = self.client.get("/changes/next/")
+
+        self.assertEqual(response.json()["error_code"], 7)
+
+    def test_notifications(self):
+
+        self.db.notifications.append(
+            {
+                "_id": 1,
+                "import_date": fixtures.IMPORT_DATE,
+                "rates": [
+                    {"currency_code": "USD", "rate_date": datetime.datetime(2023, 1, 3)}
+                ],
+            }
+        )
+
+        response = self.client.get("/notifications/")
+
+        self.assertEqual(
+            response.json(), {"notifications": [], "next": "1", "resync": False}
+        )
+
+        response = self.client.get("/notifications/0/")
+
+        self.assertEqual(
+            response.json(),
+            {
+                "notifications": [
+                    {
+                        "import_date": "20230201100000",
+                        "rates": [{"currency_code": "USD", "rate_date": "20230103"}],
+                    }
+                ],
+                "next": "1",
+                "resync": False,
+            },
+        )
+
+    def test_pages_in_json_only(self):
+
+        response = self.client.get(
+            "/rates/USD/?limit=2", headers={"Accept": "application/x-ndjson"}
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["error_code"], 8)
+        self.assertNotIn("ETag", response.headers)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+
+"""
+Tests of caches of responses of the REST service (modules/cache.py).
+"""
+
+import json
+import unittest
+from unittest import mock
+
+from database import DatabaseTestCase
+
+from modules.cache import LocalResponseCache, SharedResponseCache
+
+RESPONSE = {"rates": [{"rate_date": "20230201", "rate": 36.5686}]}
+RESPONSE_SIZE = len(json.dumps(RESPONSE).encode())
+
+
+class LocalResponseCacheTestCase(unittest.TestCase):
+    def setUp(self):
+
+        self.monotonic = 100.0
+
+        patcher = mock.patch("modules.cache.time.monotonic", lambda: self.monotonic)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_least_recently_used_responses_are_evicted(self):
+
+        cache = LocalResponseCache(RESPONSE_SIZE * 2 + RESPONSE_SIZE // 2, 60)
+
+        cache.set(("USD",), RESPONSE)
+        cache.set(("EUR",), RESPONSE)
+
+        # The first response is used, so the second one is evicted instead.
+
+        self.assertEqual(cache.get(("USD",)), RESPONSE)
+
+        cache.set(("JPY",), RESPONSE)
+
+        self.assertIsNone(cache.get(("EUR",)))
+        self.assertEqual(cache.get(("USD",)), RESPONSE)
+        self.assertEqual(cache.get(("JPY",)), RESPONSE)
+
+        metrics = cache.get_metrics()
+
+        self.assertEqual(metrics["evictions"], 1)
+        self.assertEqual(metrics["entries"], 2)
+        self.assertEqual(metrics["size"], RESPONSE_SIZE * 2)
+
+    def test_response_larger_than_cache_is_not_cached(self):
+
+        cache = LocalResponseCache(RESPONSE_SIZE - 1, 60)
+
+        cache.set(("USD",), RESPONSE)
+
+        self.assertIsNone(cache.get(("USD",)))
+        self.assertEqual(cache.get_metrics()["size"], 0)
+
+    def test_responses_expire(self):
+
+        cache = LocalResponseCache(RESPONSE_SIZE, 60)
+
+        cache.set(("USD",), RESPONSE)
+
+        self.monotonic += 59.9
+
+        self.assertEqual(cache.get(("USD",)), RESPONSE)
+
+        self.monotonic += 0.1
+
+        self.assertIsNone(cache.get(("USD",)))
+
+        metrics = cache.get_metrics()
+
+        self.assertEqual(metrics["expirations"], 1)
+        self.assertEqual(metrics["entries"], 0)
+        self.assertEqual(metrics["size"], 0)
+
+    def test_metrics(self):
+
+        cache = LocalResponseCache(RESPONSE_SIZE * 2, 60)
+
+        self.assertIsNone(cache.get(("USD", None)))
+
+        cache.set(("USD", None), RESPONSE)
+
+        # Each hit returns a copy of the response.
+
+        cache.get(("USD", None))["rates"].clear()
+
+        self.assertEqual(cache.get(("USD", None)), RESPONSE)
+
+        self.assertIsNone(cache.get(("EUR", None)))
+
+        self.assertEqual(
+            cache.get_metrics(),
+            {
+                "backend": "local",
+                "hits": 2,
+                "misses": 2,
+                "evictions": 0,
+                "expirations": 0,
+                "entries": 1,
+                "size": RESPONSE_SIZE,
+                "max_size": RESPONSE_SIZE * 2,
+            },
+        )
+
+
+class SharedResponseCacheTestCase(DatabaseTestCase):
+    def test_responses_are_shared(self):
+
+        first_cache = SharedResponseCache(self.get_db(), 60)
+        second_cache = SharedResponseCache(self.get_db(), 60)
+
+        self.assertIsNone(second_cache.get(("USD",)))
+
+        first_cache.set(("USD",), RESPONSE)
+
+        self.assertEqual(second_cache.get(("USD",)), RESPONSE)
+        self.assertEqual(
+            second_cache.get_metrics(), {"backend": "shared", "hits": 1, "misses": 1}
+        )
+
+    def test_responses_expire(self):
+
+        db = self.get_db()
+        db.create_indexes()
+
+        SharedResponseCache(db, 0).set(("USD",), RESPONSE)
+
+        # MongoDB removes the response a while later, but it is not returned
+        # as soon as it expires.
+
+        self.assertIsNone(SharedResponseCache(db, 60).get(("USD",)))
+
+        ttl_indexes = [
+            index["key"]
+            for index in self.database["response_cache"].list_indexes()
+            if index.get("expireAfterSeconds") == 0
+        ]
+
+        self.assertEqual(ttl_indexes, [{"expiration_date": 1}])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+
+"""
+Tests of loading of the configuration file (modules/config.py).
+"""
+
+import datetime
+import json
+import os
+import tempfile
+import unittest
+
+from modules.config import CONFIG_CACHE_FILE_NAME, check_parameters, get_config
+
+
+class CheckParametersTestCase(unittest.TestCase):
+    def test_counts_of_workers_must_be_positive(self):
+
+        for parameter_key in ("max_concurrency", "history_max_workers"):
+
+            for value in (0, -1, "2", 2.0, None):
+
+                config = {parameter_key: value}
+                check_parameters(config)
+
+                self.assertEqual(config[parameter_key], 4, value)
+
+            config = {parameter_key: 2}
+            check_parameters(config)
+
+            self.assertEqual(config[parameter_key], 2)
+
+
+class ConfigCacheTestCase(unittest.TestCase):
+    def setUp(self):
+
+        temporary_directory = tempfile.TemporaryDirectory()
+        self.addCleanup(temporary_directory.cleanup)
+
+        self.directory = temporary_directory.name
+        self.cache_filepath = os.path.join(self.directory, CONFIG_CACHE_FILE_NAME)
+
+    def write_config(self, text: str, mtime_ns: int) -> None:
+
+        config_filepath = os.path.join(self.directory, "config.yaml")
+
+        with open(config_filepath, "w", encoding="utf-8") as config_file:
+            config_file.write(text)
+
+        os.utime(config_filepath, ns=(mtime_ns, mtime_ns))
+
+    def change_cached_config(self, key: str, value) -> None:
+
+        with open(self.cache_filepath, encoding="utf-8") as cache_file:
+            cache = json.load(cache_file)
+
+        cache["config"][key] = value
+
+        with open(self.cache_filepath, "w", encoding="utf-8") as cache_file:
+            json.dump(cache, cache_file)
+
+    def test_cache_is_reused_while_config_is_unchanged(self):
+
+        self.write_config("changes_page_size: 100\n", 10**18)
+
+        self.assertEqual(get_config(self.directory)["changes_page_size"], 100)
+
+        # The YAML file isn't parsed again, so a change of the cache shows.
+
+        self.change_cached_config("changes_page_size", 200)
+
+        self.assertEqual(get_config(self.directory)["changes_page_size"], 200)
+
+        # The YAML file is parsed again once its size changes...
+
+        self.write_config("changes_page_size: 1000\n", 10**18)
+
+        self.assertEqual(get_config(self.directory)["changes_page_size"], 1000)
+
+        self.change_cached_config("changes_page_size", 200)
+
+        # ...or the time it has been modified at does.
+
+        self.write_config("changes_page_size: 3000\n", 10**18 + 1)
+
+        self.assertEqual(get_config(self.directory)["changes_page_size"], 3000)
+
+    def test_config_json_cannot_represent_is_not_cached(self):
+
+        for text, key, value in (
+            ("start_date: 2023-02-01\n", "start_date", datetime.date(2023, 2, 1)),
+            ("currency_codes: {1: USD}\n", "currency_codes", {1: "USD"}),
+        ):
+
+            self.write_config(text, 10**18)
+
+            self.assertEqual(get_config(self.directory)[key], value)
+            self.assertFalse(os.path.exists(self.cache_filepath))
+
+    def test_invalid_cache_is_ignored(self):
+
+        self.write_config("changes_page_size: 100\n", 10**18)
+
+        with open(self.cache_filepath, "w", encoding="utf-8") as cache_file:
+            cache_file.write('{"version": ')
+
+        self.assertEqual(get_config(self.directory)["changes_page_size"], 100)
+
+        # The cache is written anew.
+
+        self.change_cached_config("changes_page_size", 200)
+
+        self.assertEqual(get_config(self.directory)["changes_page_size"], 200)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+
+"""
+Tests of queries of modules/db.py against a MongoDB server (see database.py).
+"""
+
+import datetime
+import threading
+import time
+import unittest
+from unittest import mock
+
+from database import DatabaseTestCase
+
+IMPORT_DATE = datetime.datetime(2023, 2, 1, 10, 0, 0)
+NEXT_IMPORT_DATE = datetime.datetime(2023, 2, 1, 11, 0, 0)
+RATE_DATE = datetime.datetime(2023, 2, 1)
+
+
+class LastImportDateTestCase(DatabaseTestCase):
+    def test_crawler_sees_new_imports_at_once(self):
+
+        crawler_db = self.get_db()
+        service_db = self.get_db(cache_last_import_date=True)
+
+        crawler_db.insert_import_date(IMPORT_DATE)
+
+        self.assertEqual(crawler_db.get_last_import_date(), IMPORT_DATE)
+        self.assertEqual(service_db.get_last_import_date(), IMPORT_DATE)
+
+        self.get_db().insert_import_date(NEXT_IMPORT_DATE)
+
+        self.assertEqual(crawler_db.get_last_import_date(), NEXT_IMPORT_DATE)
+
+        # The service sees the import once its cache expires.
+
+        self.assertEqual(service_db.get_last_import_date(), IMPORT_DATE)
+
+
+class RatesTestCase(DatabaseTestCase):
+    """
+    A base of tests which insert rates of one currency & date.
+    """
+
+    def setUp(self):
+
+        super().setUp()
+
+        self.db = self.get_db()
+
+        # Crawlers create the index when they start (see UAExchangeRatesCrawler),
+        # and it is created twice here to check that it is safe to do so.
+
+        self.db.create_latest_rates_index()
+        self.db.create_latest_rates_index()
+
+    def insert_rate(self, import_date: datetime.datetime, rate: float) -> None:
+
+        self.db.insert_currency_rates(
+            [
+                {
+                    "currency_code": "USD",
+                    "import_date": import_date,
+                    "rate_date": RATE_DATE,
+                    "rate": rate,
+                }
+            ]
+        )
+
+    def complete_import(self, import_date: datetime.datetime) -> None:
+        """
+        Completes an import the way a crawler does it.
+        """
+
+        self.db.update_latest_rates(import_date)
+        self.db.insert_import_date(import_date)
+
+    def get_latest_rates(self) -> list:
+
+        return [
+            (latest_rate["import_date"], latest_rate["rate"])
+            for latest_rate in self.database["latest_rates"].find(
+                {"currency_code": "USD", "rate_date": RATE_DATE}
+            )
+        ]
+
+
+class LatestRatesTestCase(RatesTestCase):
+    def test_later_revision_replaces_earlier_one(self):
+
+        self.insert_rate(IMPORT_DATE, 3.6725)
+        self.complete_import(IMPORT_DATE)
+
+        self.assertEqual(self.get_latest_rates(), [(IMPORT_DATE, 3.6725)])
+
+        self.insert_rate(NEXT_IMPORT_DATE, 3.6730)
+        self.complete_import(NEXT_IMPORT_DATE)
+
+        self.assertEqual(self.get_latest_rates(), [(NEXT_IMPORT_DATE, 3.6730)])
+
+    def test_earlier_revision_never_replaces_later_one(self):
+
+        # Crawlers overlap: the one started later completes its import first,
+        # and then the one started earlier writes a rate & completes its one.
+
+        self.insert_rate(NEXT_IMPORT_DATE, 3.6730)
+        self.complete_import(NEXT_IMPORT_DATE)
+
+        self.assertEqual(self.get_latest_rates(), [(NEXT_IMPORT_DATE, 3.6730)])
+
+        self.insert_rate(IMPORT_DATE, 3.6725)
+        self.complete_import(IMPORT_DATE)
+
+        self.assertEqual(self.get_latest_rates(), [(NEXT_IMPORT_DATE, 3.6730)])
+
+    def test_revisions_of_crashed_import_are_picked_up(self):
+
+        # The import of the first crawler is never completed.
+
+        self.insert_rate(IMPORT_DATE, 3.6725)
+
+        self.complete_import(NEXT_IMPORT_DATE)
+
+        self.assertEqual(self.get_latest_rates(), [(IMPORT_DATE, 3.6725)])
+
+    def test_revisions_of_later_import_wait_for_it(self):
+
+        self.insert_rate(NEXT_IMPORT_DATE, 3.6730)
+        self.complete_import(IMPORT_DATE)
+
+        self.assertEqual(self.get_latest_rates(), [])
+
+        self.complete_import(NEXT_IMPORT_DATE)
+
+        self.assertEqual(self.get_latest_rates(), [(NEXT_IMPORT_DATE, 3.6730)])
+
+
+class ChangesTestCase(RatesTestCase):
+    def test_changes_stop_at_incomplete_import(self):
+
+        self.insert_rate(IMPORT_DATE, 3.6725)
+        self.complete_import(IMPORT_DATE)
+
+        self.insert_rate(NEXT_IMPORT_DATE, 3.6730)
+
+        changes = self.db.get_currency_rates_changes(0, 10)
+
+        self.assertEqual(
+            [(change["sequence_number"], change["rate"]) for change in changes],
+            [(1, 3.6725)],
+        )
+
+        self.complete_import(NEXT_IMPORT_DATE)
+
+        changes = self.db.get_currency_rates_changes(1, 10)
+
+        self.assertEqual(
+            [(change["sequence_number"], change["rate"]) for change in changes],
+            [(2, 3.6730)],
+        )
+
+
+class SequenceNumbersLockTestCase(DatabaseTestCase):
+    def get_lock(self, db):
+        return db._UAExchangeRatesCrawlerDB__sequence_numbers_lock(
+            self.database["currency_rates"]
+        )
+
+    def get_lock_document(self) -> dict | None:
+        return self.database["counters"].find_one({"_id": "currency_rates_lock"})
+
+    def acquire_lock_in_thread(self, db) -> tuple:
+        """
+        Starts a thread, which holds the lock until it is told to release it.
+
+        :return: events the thread sets once it acquires the lock & is told
+            to release it
+        """
+
+        acquired = threading.Event()
+        released = threading.Event()
+
+        def hold_lock():
+            with self.get_lock(db):
+                acquired.set()
+                released.wait()
+
+        thread = threading.Thread(target=hold_lock)
+        thread.start()
+
+        self.addCleanup(thread.join)
+        self.addCleanup(released.set)
+
+        return acquired, released
+
+    def test_lock_is_held_by_one_process_at_a_time(self):
+
+        with self.get_lock(self.get_db()):
+
+            acquired, released = self.acquire_lock_in_thread(self.get_db())
+
+            self.assertFalse(acquired.wait(1))
+
+        self.assertTrue(acquired.wait(5))
+
+        released.set()
+
+    def test_expired_lock_is_taken_over(self):
+
+        # A process holding the lock has crashed a while ago.
+
+        self.database["counters"].insert_one(
+            {
+                "_id": "currency_rates_lock",
+                "owner": "crashed",
+                "expiration_date": datetime.datetime(2023, 2, 1),
+            }
+        )
+
+        acquired, released = self.acquire_lock_in_thread(self.get_db())
+
+        self.assertTrue(acquired.wait(5))
+        self.assertNotEqual(self.get_lock_document()["owner"], "crashed")
+
+        released.set()
+
+    @mock.patch(
+        "modules.db.UAExchangeRatesCrawlerDB"
+        "._UAExchangeRatesCrawlerDB__SEQUENCE_NUMBERS_LOCK_LIFESPAN",
+        1,
+    )
+    def test_lock_is_renewed_while_held(self):
+
+        with self.get_lock(self.get_db()):
+
+            expiration_date = self.get_lock_document()["expiration_date"]
+
+            acquired, released = self.acquire_lock_in_thread(self.get_db())
+
+            # The lock would have expired twice if it wasn't renewed.
+
+            self.assertFalse(acquired.wait(2))
+            self.assertGreater(
+                self.get_lock_document()["expiration_date"], expiration_date
+            )
+
+        self.assertTrue(acquired.wait(5))
+
+        released.set()
+
+        # The lock is released, rather than left to expire.
+
+        time.sleep(0.5)
+
+        self.assertIsNone(self.get_lock_document())
+
+
+if __name__ == "__main__":
+    unittest.main()
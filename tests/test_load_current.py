@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+
+"""
+Tests of the crawler for current rates (load_current.py) beyond parsing
+of pages, which is tested by test_parsers.py.
+"""
+
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+import fixtures
+import load_current
+
+
+class SessionTestCase(unittest.TestCase):
+    def test_each_thread_has_a_session_of_its_own(self):
+
+        crawler = fixtures.get_crawler(load_current.CurrentUAExchangeRatesCrawler, [])
+
+        # Both threads hold on until the other one has got its session,
+        # so the pool doesn't run both calls in the same thread.
+
+        barrier = threading.Barrier(2)
+
+        def get_sessions(_) -> tuple:
+
+            session = crawler._get_session()
+            barrier.wait(timeout=5)
+
+            return session, crawler._get_session()
+
+        with ThreadPoolExecutor(2) as executor:
+            sessions = list(executor.map(get_sessions, range(2)))
+
+        for first_session, second_session in sessions:
+            self.assertIs(first_session, second_session)
+
+        self.assertIsNot(sessions[0][0], sessions[1][0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+
+"""
+Tests of downloading & parsing of historical files (load_history.py).
+"""
+
+import datetime
+import hashlib
+import os
+import tempfile
+import unittest
+
+import requests
+
+import fixtures
+import load_history
+from stand_in_server import StandInServer
+
+FILE_CONTENT = b"historical file " * 10000
+FILE_ETAG = '"v1"'
+FILE_LAST_MODIFIED = "Wed, 01 Feb 2023 10:00:00 GMT"
+
+
+def respond_with_file(request: dict) -> tuple:
+    """
+    Responds the way the bank's website does: with the file, or with 304
+    Not Modified if the request has validators of its current version.
+    """
+
+    if request["path"] != "/file.xlsx":
+        return 500, {}, b""
+
+    headers = {"ETag": FILE_ETAG, "Last-Modified": FILE_LAST_MODIFIED}
+
+    if request["headers"].get("If-None-Match") == FILE_ETAG:
+        return 304, headers, b""
+
+    return 200, headers, FILE_CONTENT
+
+
+class DownloadFileTestCase(unittest.TestCase):
+    def setUp(self):
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+
+        self.file_path = os.path.join(directory.name, "file.xlsx")
+
+        self.server = StandInServer(respond_with_file)
+        self.server.__enter__()
+        self.addCleanup(self.server.__exit__)
+
+    def test_file_is_downloaded(self):
+
+        response, file_hash = load_history.download_file(
+            f"{self.server.url}/file.xlsx", self.file_path, {}, "md5"
+        )
+
+        self.assertEqual(response.status_code, requests.codes.ok)
+        self.assertEqual(file_hash, hashlib.md5(FILE_CONTENT).hexdigest())
+
+        with open(self.file_path, "rb") as file:
+            self.assertEqual(file.read(), FILE_CONTENT)
+
+        self.assertEqual(
+            load_history.get_response_validators(response),
+            {
+                "etag": FILE_ETAG,
+                "last_modified": FILE_LAST_MODIFIED,
+                "content_length": str(len(FILE_CONTENT)),
+            },
+        )
+
+    def test_file_is_not_downloaded_if_not_modified(self):
+
+        historical_file = {"hash": "previous hash", "etag": FILE_ETAG}
+
+        request_headers = load_history.get_conditional_request_headers(historical_file)
+        response, file_hash = load_history.download_file(
+            f"{self.server.url}/file.xlsx", self.file_path, request_headers, "md5"
+        )
+
+        self.assertEqual(response.status_code, requests.codes.not_modified)
+        self.assertIsNone(file_hash)
+        self.assertFalse(os.path.exists(self.file_path))
+
+        self.assertEqual(self.server.requests[0]["headers"]["If-None-Match"], FILE_ETAG)
+
+    def test_stored_validators_are_kept_if_not_modified(self):
+
+        historical_file = {
+            "hash": "previous hash",
+            "etag": FILE_ETAG,
+            "last_modified": FILE_LAST_MODIFIED,
+            "content_length": "1",
+        }
+
+        file_is_modified, file_hash, file_validators, excel_data = (
+            load_history.load_historical_file(
+                f"{self.server.url}/file.xlsx", self.file_path, historical_file, "md5"
+            )
+        )
+
+        self.assertFalse(file_is_modified)
+        self.assertEqual(file_hash, "previous hash")
+        self.assertEqual(
+            file_validators, load_history.get_file_validators(historical_file)
+        )
+        self.assertIsNone(excel_data)
+
+        self.assertEqual(
+            self.server.requests[0]["headers"]["If-Modified-Since"],
+            FILE_LAST_MODIFIED,
+        )
+
+    def test_error_response(self):
+
+        response, file_hash = load_history.download_file(
+            f"{self.server.url}/missing.xlsx", self.file_path, {}, "md5"
+        )
+
+        self.assertIsNone(response)
+        self.assertIsNone(file_hash)
+
+        # The file is requested again a couple of times before giving up.
+
+        self.assertEqual(len(self.server.requests), 3)
+
+
+class HashAlgorithmTestCase(unittest.TestCase):
+    def test_supported_algorithm(self):
+
+        self.assertEqual(load_history.get_hash_algorithm("sha256"), "sha256")
+
+    def test_unsupported_algorithm(self):
+
+        for hash_algorithm in ("md6", "shake_128", ""):
+
+            with self.assertLogs(level="WARNING"):
+                self.assertEqual(load_history.get_hash_algorithm(hash_algorithm), "md5")
+
+
+class HistoricalFileNameTestCase(unittest.TestCase):
+    def test_links_ending_with_the_same_name(self):
+
+        first_link = "https://www.centralbank.ae/media/abc/rates.xlsx"
+        second_link = "https://www.centralbank.ae/media/def/rates.xlsx"
+
+        first_file_name = load_history.get_historical_file_name(first_link)
+
+        self.assertTrue(first_file_name.endswith("_rates.xlsx"))
+        self.assertEqual(
+            load_history.get_historical_file_name(first_link), first_file_name
+        )
+        self.assertNotEqual(
+            load_history.get_historical_file_name(second_link), first_file_name
+        )
+
+
+class ExcelDataTestCase(unittest.TestCase):
+    """
+    Compares rates converted from a fixture workbook with ones the crawler
+    used to get from it converting data row by row.
+    """
+
+    def setUp(self):
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+
+        self.file_path = os.path.join(directory.name, "rates.xlsx")
+
+    def get_currency_rates(self, with_footer: bool, currency_codes_filter: list):
+
+        fixtures.write_historical_workbook(
+            self.file_path, datetime.date(2022, 12, 30), 5, with_footer
+        )
+
+        excel_data = load_history.read_excel_file(self.file_path)
+        crawler = fixtures.get_crawler(
+            load_history.HistoricalUAExchangeRatesCrawler, currency_codes_filter
+        )
+
+        with self.assertLogs(level="WARNING") as logs:
+
+            currency_rates = []
+            crawler._load_currency_rates_from_excel_data(excel_data, currency_rates)
+
+        self.assertIn(fixtures.UNKNOWN_CURRENCY, logs.output[0])
+
+        return currency_rates, fixtures.load_currency_rates_row_by_row(
+            crawler, excel_data
+        )
+
+    def test_file_with_footer(self):
+
+        for currency_codes_filter in ([], ["USD", "EUR"]):
+
+            currency_rates, previous_currency_rates = self.get_currency_rates(
+                True, currency_codes_filter
+            )
+
+            self.assertEqual(currency_rates, previous_currency_rates)
+
+    def test_file_without_footer(self):
+
+        # The last rate used to be lost if a file had no footer.
+
+        currency_rates, previous_currency_rates = self.get_currency_rates(False, [])
+
+        self.assertEqual(currency_rates[:-1], previous_currency_rates)
+        self.assertEqual(
+            currency_rates[-1],
+            {
+                "currency_code": "INR",
+                "import_date": fixtures.IMPORT_DATE,
+                "rate_date": datetime.datetime(2023, 1, 4),
+                "rate": 5.004,
+            },
+        )
+
+    def test_rates_types(self):
+
+        currency_rates, _ = self.get_currency_rates(True, [])
+
+        for currency_rate in currency_rates:
+            self.assertIs(type(currency_rate["rate_date"]), datetime.datetime)
+            self.assertIs(type(currency_rate["rate"]), float)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+
+"""
+Tests of notifications about imports (modules/notifications.py) & responses
+of the REST service to clients waiting for them.
+"""
+
+import asyncio
+import datetime
+import threading
+import time
+import unittest
+
+import fixtures
+
+from modules.notifications import NOTIFICATIONS_HISTORY_SIZE, NotificationBroker
+
+
+def get_notification(sequence_number: int) -> dict:
+
+    return {
+        "_id": sequence_number,
+        "import_date": fixtures.IMPORT_DATE,
+        "rates": [{"currency_code": "USD", "rate_date": datetime.datetime(2023, 2, 1)}],
+    }
+
+
+class NotificationBrokerTestCase(unittest.TestCase):
+    def setUp(self):
+
+        self.broker = NotificationBroker()
+
+    def publish_later(self, notification: dict) -> None:
+
+        timer = threading.Timer(0.2, self.broker.publish, (notification,))
+        timer.start()
+
+        self.addCleanup(timer.join)
+
+    def test_wait_is_woken_up_by_publish(self):
+
+        self.publish_later(get_notification(1))
+
+        start_time = time.monotonic()
+
+        self.assertEqual(self.broker.wait(0, 10), [get_notification(1)])
+        self.assertLess(time.monotonic() - start_time, 5)
+
+    def test_wait_async_is_woken_up_by_publish(self):
+
+        self.publish_later(get_notification(1))
+
+        start_time = time.monotonic()
+
+        self.assertEqual(
+            asyncio.run(self.broker.wait_async(0, 10)), [get_notification(1)]
+        )
+        self.assertLess(time.monotonic() - start_time, 5)
+
+    def test_wait_times_out(self):
+
+        self.broker.publish(get_notification(1))
+
+        for wait in (
+            self.broker.wait,
+            lambda *args: asyncio.run(self.broker.wait_async(*args)),
+        ):
+
+            start_time = time.monotonic()
+
+            self.assertEqual(wait(1, 0.2), [])
+            self.assertGreaterEqual(time.monotonic() - start_time, 0.2)
+
+    def test_published_notifications_are_returned_at_once(self):
+
+        for sequence_number in (1, 2, 3):
+            self.broker.publish(get_notification(sequence_number))
+
+        # Notifications the tailing thread has already published are ignored.
+
+        self.broker.publish(get_notification(2))
+
+        self.assertEqual(
+            self.broker.wait(1, 10), [get_notification(2), get_notification(3)]
+        )
+        self.assertEqual(
+            asyncio.run(self.broker.wait_async(2, 10)), [get_notification(3)]
+        )
+
+
+class NotificationsResponseTestCase(unittest.TestCase):
+    def setUp(self):
+
+        self.service = fixtures.get_service(
+            fixtures.ServiceDatabase([]), notifications_wait_timeout=1
+        )
+
+        self.last_sequence_number = NOTIFICATIONS_HISTORY_SIZE + 10
+
+        for sequence_number in range(1, self.last_sequence_number + 1):
+            self.service._notification_broker.publish(get_notification(sequence_number))
+
+    def test_resync_if_token_is_older_than_history(self):
+
+        data, _ = self.service.get_notifications("9")
+
+        self.assertEqual(len(data["notifications"]), NOTIFICATIONS_HISTORY_SIZE)
+        self.assertEqual(data["next"], str(self.last_sequence_number))
+        self.assertTrue(data["resync"])
+
+    def test_no_resync_if_token_is_in_history(self):
+
+        data, _ = self.service.get_notifications("10")
+
+        self.assertEqual(len(data["notifications"]), NOTIFICATIONS_HISTORY_SIZE)
+        self.assertFalse(data["resync"])
+
+        data, _ = self.service.get_notifications(str(self.last_sequence_number - 1))
+
+        self.assertEqual(
+            data["notifications"],
+            [
+                {
+                    "import_date": "20230201100000",
+                    "rates": [{"currency_code": "USD", "rate_date": "20230201"}],
+                }
+            ],
+        )
+        self.assertFalse(data["resync"])
+
+    def test_timeout(self):
+
+        data, _ = self.service.get_notifications(str(self.last_sequence_number))
+
+        self.assertEqual(
+            data,
+            {
+                "notifications": [],
+                "next": str(self.last_sequence_number),
+                "resync": False,
+            },
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
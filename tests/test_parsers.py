@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+
+"""
+Tests of parsers of pages with current rates (modules/parsers.py) on saved
+responses of the bank (the tests/responses directory).
+"""
+
+import datetime
+import os
+import unittest
+
+from bs4 import BeautifulSoup
+
+import fixtures
+import load_current
+from modules import parsers
+
+RESPONSES_DIRECTORY = os.path.join(os.path.dirname(__file__), "responses")
+
+
+def get_responses() -> dict:
+
+    responses = {}
+
+    for file_name in sorted(os.listdir(RESPONSES_DIRECTORY)):
+
+        if file_name.startswith("current_rates"):
+
+            file_path = os.path.join(RESPONSES_DIRECTORY, file_name)
+
+            with open(file_path, encoding="utf-8") as file:
+                responses[file_name] = file.read()
+
+    return responses
+
+
+def get_rates_the_previous_way(text: str) -> list:
+    """
+    Parses a page the way the crawler used to do it before parsers have
+    become pluggable: walking all <td> tags of a tree of the page.
+    """
+
+    rates = []
+
+    currency_title = None
+
+    for tag in BeautifulSoup(text, features="html.parser").find_all("td"):
+
+        if len(tag.text) == 0:
+            continue
+
+        if not tag.text[0].isdigit():
+            currency_title = tag.text
+            continue
+
+        rates.append((currency_title, tag.text))
+
+        currency_title = None
+
+    return rates
+
+
+class ParsersTestCase(unittest.TestCase):
+    def test_parsers_parity(self):
+
+        for file_name, text in get_responses().items():
+
+            with self.subTest(file_name):
+
+                previous_rates = get_rates_the_previous_way(text)
+
+                for parser_name, get_rates in parsers.RATES_PARSERS.items():
+                    self.assertEqual(list(get_rates(text)), previous_rates, parser_name)
+
+    def test_rates(self):
+
+        rates = list(
+            parsers.get_rates_using_html_parser(get_responses()["current_rates.html"])
+        )
+
+        self.assertEqual(len(rates), 7)
+        self.assertEqual(rates[0], ("دولار امريكي", "3.6725"))
+
+    def test_unclosed_cell(self):
+
+        text = get_responses()["current_rates_with_markup.html"]
+        rates = dict(parsers.get_rates_using_html_parser(text))
+
+        self.assertEqual(float(rates["كرون دانماركي"]), 0.5298)
+        self.assertEqual(rates["دينار جزائري"], "0.0270")
+
+    def test_unknown_parser(self):
+
+        with self.assertLogs(level="WARNING"):
+            get_rates = parsers.get_rates_parser("lxml")
+
+        self.assertIs(get_rates, parsers.get_rates_using_html_parser)
+
+        self.assertIs(
+            parsers.get_rates_parser("beautifulsoup"),
+            parsers.get_rates_using_beautiful_soup,
+        )
+
+
+class CrawlerTestCase(unittest.TestCase):
+    def test_rates_parity(self):
+
+        rate_date = datetime.datetime(2023, 2, 1)
+
+        crawler = fixtures.get_crawler(load_current.CurrentUAExchangeRatesCrawler, [])
+        crawler._currency_codes = fixtures.get_currency_codes_from_config()
+
+        for file_name, text in get_responses().items():
+
+            results = []
+
+            for get_rates in parsers.RATES_PARSERS.values():
+                crawler._get_rates = get_rates
+                results.append(crawler._parse_rates_text_for_date(text, rate_date))
+
+            with self.subTest(file_name):
+                self.assertEqual(results[0], results[1])
+
+            if file_name == "current_rates_with_markup.html":
+                exchange_rates, unknown_currencies = results[0]
+                self.assertEqual(len(exchange_rates), 6)
+                self.assertEqual(unknown_currencies, ["عملة غير معروفة"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+
+"""
+Tests of the REST service without a web framework (modules/service.py)
+against a stand-in of the database (see fixtures.py).
+"""
+
+import datetime
+import unittest
+
+import fixtures
+
+from modules.service import (
+    BINARY_MIMETYPES,
+    STREAMING_MIMETYPES,
+    get_cursor,
+    get_date_using_cursor,
+)
+
+FIRST_DATE = datetime.date(2023, 1, 1)
+
+
+class BulkRatesTestCase(unittest.TestCase):
+    def setUp(self):
+
+        self.rates = fixtures.get_rates(["EUR", "INR", "JPY", "USD"], FIRST_DATE, 3)
+        self.service = fixtures.get_service(fixtures.ServiceDatabase(self.rates))
+
+    def test_comma_separated_currency_codes(self):
+
+        data, status_code = self.service.get_currencies_rates(" usd,EUR ,, ")
+
+        self.assertEqual(status_code, 200)
+        self.assertEqual(list(data["currencies"]), ["EUR", "USD"])
+
+    def test_all_currencies(self):
+
+        for currency_codes in ("all", "ALL"):
+
+            data, _ = self.service.get_currencies_rates(currency_codes)
+
+            self.assertEqual(
+                sorted(data["currencies"]), sorted(fixtures.CURRENCY_CODES.values())
+            )
+
+    def test_unknown_currency_code(self):
+
+        data, _ = self.service.get_currencies_rates("USD,XXX")
+
+        self.assertEqual(data["error_code"], 4)
+        self.assertIn('"XXX"', data["error_message"])
+
+        # Nothing is read if any of currency codes is unknown.
+
+        self.assertEqual(self.service._db.queries_number, 0)
+
+    def test_columns(self):
+
+        start_date = datetime.datetime(2023, 1, 2)
+
+        data, _ = self.service.get_currencies_rates("USD,JPY", None, start_date)
+
+        self.assertEqual(
+            data,
+            {
+                "currencies": {
+                    "JPY": {
+                        "rate_dates": ["20230102", "20230103"],
+                        "rates": [3.001, 3.002],
+                        "import_dates": ["20230201100000", "20230201100000"],
+                    },
+                    "USD": {
+                        "rate_dates": ["20230102", "20230103"],
+                        "rates": [4.001, 4.002],
+                        "import_dates": ["20230201100000", "20230201100000"],
+                    },
+                },
+                "max_import_date": "20230201100000",
+            },
+        )
+
+    def test_no_rates(self):
+
+        data, _ = self.service.get_currencies_rates(
+            "USD", None, datetime.datetime(2024, 1, 1)
+        )
+
+        self.assertEqual(
+            data["currencies"],
+            {"USD": {"rate_dates": [], "rates": [], "import_dates": []}},
+        )
+
+
+class PagesTestCase(unittest.TestCase):
+    def setUp(self):
+
+        self.rates = fixtures.get_rates(["USD"], FIRST_DATE, 3)
+        self.service = fixtures.get_service(fixtures.ServiceDatabase(self.rates))
+
+    def get_rate_dates(self, limit: str, cursor: str | None = None) -> tuple:
+
+        data, _ = self.service.get_currency_rates("USD", limit=limit, cursor=cursor)
+
+        return [rate["rate_date"] for rate in data["rates"]], data["next"]
+
+    def test_cursor(self):
+
+        rate_date = datetime.datetime(2023, 2, 1)
+        cursor = get_cursor(rate_date)
+
+        self.assertNotIn("20230201", cursor)
+        self.assertEqual(get_date_using_cursor(cursor), rate_date)
+
+    def test_pages(self):
+
+        rate_dates, cursor = self.get_rate_dates("2")
+
+        self.assertEqual(rate_dates, ["20230101", "20230102"])
+        self.assertEqual(get_date_using_cursor(cursor), datetime.datetime(2023, 1, 2))
+
+        rate_dates, cursor = self.get_rate_dates("2", cursor)
+
+        self.assertEqual(rate_dates, ["20230103"])
+        self.assertIsNone(cursor)
+
+    def test_last_page_has_no_cursor(self):
+
+        # One more rate than the limit is read, so a page, which has as many
+        # rates as there are left, is known to be the last one.
+
+        self.assertEqual(
+            self.get_rate_dates("3"), (["20230101", "20230102", "20230103"], None)
+        )
+
+        rate_dates, cursor = self.get_rate_dates(
+            "2", get_cursor(self.rates[0]["rate_date"])
+        )
+
+        self.assertEqual((rate_dates, cursor), (["20230102", "20230103"], None))
+
+    def test_invalid_cursor(self):
+
+        for cursor in ("2023-01-01", "MjAyMzAxMDE", "MjAyMw==", "////"):
+
+            data, _ = self.service.get_currency_rates("USD", cursor=cursor)
+
+            self.assertEqual(data["error_code"], 5, cursor)
+
+    def test_invalid_limit(self):
+
+        for limit in ("0", "-1", "1.5", "all", ""):
+
+            data, _ = self.service.get_currency_rates("USD", limit=limit)
+
+            self.assertEqual(data["error_code"], 6, limit)
+
+    def test_pages_in_json_only(self):
+
+        for mimetype in STREAMING_MIMETYPES + BINARY_MIMETYPES:
+
+            for page in (
+                {"limit": "2"},
+                {"cursor": get_cursor(datetime.datetime.now())},
+            ):
+
+                data, status_code = self.service.get_currency_rates(
+                    "USD", mimetype=mimetype, **page
+                )
+
+                self.assertEqual((data["error_code"], status_code), (8, 400))
+
+        self.assertEqual(self.service._db.queries_number, 0)
+
+
+class ChangesTestCase(unittest.TestCase):
+    def setUp(self):
+
+        self.rates = fixtures.get_rates(["EUR", "USD"], FIRST_DATE, 3)
+        self.service = fixtures.get_service(
+            fixtures.ServiceDatabase(self.rates), changes_page_size=4
+        )
+
+    def test_pages(self):
+
+        data, _ = self.service.get_changes()
+
+        self.assertEqual(
+            [(rate["currency_code"], rate["rate_date"]) for rate in data["rates"]],
+            [("EUR", "20230101"), ("EUR", "20230102"), ("EUR", "20230103")]
+            + [("USD", "20230101")],
+        )
+        self.assertEqual((data["next"], data["has_more"]), ("4", True))
+
+        data, _ = self.service.get_changes(data["next"])
+
+        self.assertEqual(len(data["rates"]), 2)
+        self.assertEqual((data["next"], data["has_more"]), ("6", False))
+
+        # The token stays the same until there are new rates.
+
+        data, _ = self.service.get_changes(data["next"])
+
+        self.assertEqual((data["rates"], data["next"]), ([], "6"))
+
+    def test_invalid_token(self):
+
+        for token in ("", "next", "-1", "1.5"):
+
+            data, _ = self.service.get_changes(token)
+
+            self.assertEqual(data["error_code"], 7, token)
+
+            data, _ = self.service.get_notifications(token)
+
+            self.assertEqual(data["error_code"], 7, token)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+
+"""
+Tests of the Telegram notifier (modules/telegram.py) against a local server
+standing in for Telegram Bot API.
+"""
+
+import json
+import unittest
+import urllib.parse
+
+import migrate
+from modules import telegram
+from modules.crawler import UAExchangeRatesCrawler
+from stand_in_server import StandInServer
+
+
+def respond_ok(_request: dict) -> tuple:
+
+    return 200, {"Content-Type": "application/json"}, b'{"ok": true}'
+
+
+def get_sent_texts(server: StandInServer) -> list:
+
+    return [
+        urllib.parse.parse_qs(request["body"].decode())["text"][0]
+        for request in server.requests
+    ]
+
+
+class TelegramNotifierTestCase(unittest.TestCase):
+    def get_notifier(self, server: StandInServer) -> telegram.TelegramNotifier:
+
+        return telegram.TelegramNotifier("token", 1, api_url=server.url, timeout=1)
+
+    def test_texts_are_coalesced(self):
+
+        with StandInServer(respond_ok) as server:
+
+            notifier = self.get_notifier(server)
+
+            for number in range(10):
+                notifier.send(f"Text #{number}")
+
+            notifier.close()
+
+        self.assertEqual(len(server.requests), 1)
+        self.assertEqual(server.requests[0]["path"], "/bottoken/sendMessage")
+        self.assertEqual(
+            get_sent_texts(server)[0],
+            telegram.MESSAGES_SEPARATOR.join(f"Text #{number}" for number in range(10)),
+        )
+
+    def test_long_text_is_split(self):
+
+        lines = [f"USD 2023-01-01 3.{number:04}" for number in range(1000)]
+        text = "Summary:\n<pre>\n" + "\n".join(lines) + "\n</pre>"
+
+        with StandInServer(respond_ok) as server:
+
+            notifier = self.get_notifier(server)
+            notifier.send(text)
+            notifier.close()
+
+        sent_texts = get_sent_texts(server)
+
+        self.assertGreater(len(sent_texts), 1)
+
+        for sent_text in sent_texts:
+            self.assertLessEqual(len(sent_text), telegram.MESSAGE_MAX_LENGTH)
+            self.assertEqual(sent_text.count("<pre>"), sent_text.count("</pre>"))
+
+        sent_lines = "\n".join(sent_texts).replace("<pre>", "").replace("</pre>", "")
+        self.assertEqual(
+            [line for line in sent_lines.split("\n") if line.startswith("USD")], lines
+        )
+
+    def test_long_line_is_split_outside_tags_and_entities(self):
+
+        line = "".join(
+            f'<a href="https://example.com/{number}">USD</a> &amp; &#8364; '
+            for number in range(400)
+        )
+
+        for max_length in (100, 101, 150, 1000):
+
+            parts = list(telegram.get_lines(line, max_length))
+
+            self.assertEqual("".join(parts), line)
+
+            for part in parts:
+
+                self.assertLessEqual(len(part), max_length)
+                self.assertEqual(part.count("<"), part.count(">"), part)
+                self.assertEqual(part.count("&"), part.count(";"), part)
+
+    def test_too_many_requests(self):
+
+        responses = [
+            (429, {}, json.dumps({"parameters": {"retry_after": 0}}).encode()),
+            respond_ok(None),
+        ]
+
+        with StandInServer(lambda request: responses.pop(0)) as server:
+
+            notifier = self.get_notifier(server)
+            notifier.send("Text")
+            notifier.close()
+
+        self.assertEqual(get_sent_texts(server), ["Text", "Text"])
+
+    def test_disabled_notifier(self):
+
+        with StandInServer(respond_ok) as server:
+
+            notifier = telegram.TelegramNotifier("", 0, api_url=server.url)
+            notifier.send("Text")
+            notifier.close()
+
+        self.assertEqual(server.requests, [])
+
+
+class Database:
+    disconnected = False
+
+    def disconnect(self):
+        self.disconnected = True
+
+
+class UnavailableDatabase(Database):
+    def create_indexes(self):
+        raise RuntimeError("The database is unavailable.")
+
+
+class FailingCrawler(UAExchangeRatesCrawler):
+    def _import(self):
+
+        self.send_to_telegram_chat("Import has started.")
+
+        raise RuntimeError("Import has failed.")
+
+
+class CrawlerTestCase(unittest.TestCase):
+    def test_texts_are_sent_if_import_fails(self):
+
+        with StandInServer(respond_ok) as server:
+
+            crawler = FailingCrawler.__new__(FailingCrawler)
+            crawler._notifier = telegram.TelegramNotifier(
+                "token", 1, api_url=server.url
+            )
+            crawler._db = Database()
+
+            with self.assertRaises(RuntimeError):
+                crawler.run()
+
+        self.assertEqual(get_sent_texts(server), ["Import has started."])
+        self.assertTrue(crawler._db.disconnected)
+
+    def test_migration_disconnects_if_it_fails(self):
+
+        migration = migrate.UAExchangeRatesDBMigration.__new__(
+            migrate.UAExchangeRatesDBMigration
+        )
+        migration._notifier = telegram.TelegramNotifier("", 0)
+        migration._db = UnavailableDatabase()
+
+        with self.assertRaises(RuntimeError):
+            migration.run()
+
+        self.assertTrue(migration._db.disconnected)
+
+
+if __name__ == "__main__":
+    unittest.main()